@@ -11,6 +11,14 @@ src_companies_dir = os.path.join(current_dir, 'src_companies')
 if src_companies_dir not in sys.path:
     sys.path.insert(0, src_companies_dir)
 
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import connect
+from crm.campaigns import describe_query, count_new_companies, add_companies_from_query
+
 # Set up project root path for database access if not already set
 if 'PROJECT_ROOT' not in os.environ:
     project_root = os.path.dirname(os.path.dirname(current_dir))
@@ -34,120 +42,13 @@ class Colors:
 
 def get_db_connection():
     """
-    Create a database connection to the SQLite database.
+    Get a pooled connection to the SQLite database.
     """
-    # DEBUG OUTPUT
-    print(f"[DEBUG] Current working directory: {os.getcwd()}")
-    print(f"[DEBUG] __file__: {__file__}")
-    print(f"[DEBUG] abspath(__file__): {os.path.abspath(__file__)}")
-    print(f"[DEBUG] Environment vars: PROJECT_ROOT={os.environ.get('PROJECT_ROOT')}")
-    
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    print(f"{Colors.CYAN}Trying hardcoded database path: {windows_path}{Colors.END}")
-    
-    # Try hardcoded path first
     try:
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"{Colors.GREEN}Created hardcoded database directory{Colors.END}")
-            
-        conn = sqlite3.connect(windows_path)
-        conn.row_factory = sqlite3.Row
-        print(f"{Colors.GREEN}Successfully connected using hardcoded path{Colors.END}")
-        return conn
+        return connect(row_factory=sqlite3.Row)  # This enables column access by name
     except Exception as e:
-        print(f"{Colors.RED}Hardcoded path failed: {e}{Colors.END}")
-    
-    # If hardcoded fails, try with PROJECT_ROOT
-    try:
-        # First, check if PROJECT_ROOT is set in the environment
-        project_root = os.environ.get('PROJECT_ROOT')
-        print(f"[DEBUG] Using project_root: {project_root}")
-        
-        # If not set, calculate it
-        if not project_root:
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            print(f"[DEBUG] Calculated project_root: {project_root}")
-            # Store it for future use
-            os.environ['PROJECT_ROOT'] = project_root
-            
-        # EXPLICIT WINDOWS FIX
-        if "\\" in project_root:  # Windows path
-            project_root = project_root.replace("/", "\\")
-            print(f"[DEBUG] Windows path detected, fixed to: {project_root}")
-        
-        # Create the database path using the project root
-        db_path = os.path.join(project_root, 'databases', 'database.db')
-        print(f"[DEBUG] Final db_path: {db_path}")
-        
-        # Ensure the database directory exists
-        db_folder = os.path.join(project_root, 'databases')
-        print(f"[DEBUG] Database folder: {db_folder}")
-        print(f"[DEBUG] Folder exists: {os.path.exists(db_folder)}")
-        
-        if not os.path.exists(db_folder):
-            try:
-                os.makedirs(db_folder, exist_ok=True)
-                print(f"{Colors.GREEN}Created database directory at: {db_folder}{Colors.END}")
-            except Exception as e:
-                print(f"{Colors.RED}Could not create database directory at {db_folder}: {e}{Colors.END}")
-                print(f"[DEBUG] Exception type: {type(e)}")
-                # Fall back to user home directory below
-        
-        print(f"{Colors.CYAN}Connecting to database at: {db_path}{Colors.END}")
-        
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        print(f"{Colors.GREEN}Successfully connected to database{Colors.END}")
-        return conn
-    except Error as e:
         print(f"{Colors.RED}Error connecting to database: {e}{Colors.END}")
-        print(f"[DEBUG] Exception type: {type(e)}")
-        
-        # Try alternate location in user's home directory
-        try:
-            user_home = os.path.expanduser("~")
-            print(f"[DEBUG] User home directory: {user_home}")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            
-            # Ensure the directory exists
-            db_folder = os.path.join(user_home, 'databases')
-            if not os.path.exists(db_folder):
-                os.makedirs(db_folder, exist_ok=True)
-                
-            print(f"{Colors.YELLOW}Trying alternate database path: {alt_db_path}{Colors.END}")
-            conn = sqlite3.connect(alt_db_path)
-            conn.row_factory = sqlite3.Row
-            
-            # Store this path for future use
-            os.environ['PROJECT_ROOT'] = user_home
-            print(f"{Colors.GREEN}Successfully connected to alternate database path{Colors.END}")
-            return conn
-        except Exception as e2:
-            print(f"{Colors.RED}Database connection failed: {e2}{Colors.END}")
-            print(f"[DEBUG] Final exception type: {type(e2)}")
-            
-            # ONE FINAL ATTEMPT - TRY APPDATA FOLDER
-            try:
-                if os.name == 'nt':  # Windows
-                    appdata = os.environ.get('APPDATA', '')
-                    print(f"[DEBUG] Trying APPDATA folder: {appdata}")
-                    if appdata:
-                        app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                        if not os.path.exists(app_db_dir):
-                            os.makedirs(app_db_dir, exist_ok=True)
-                        app_db_path = os.path.join(app_db_dir, 'database.db')
-                        print(f"{Colors.YELLOW}Trying APPDATA database path: {app_db_path}{Colors.END}")
-                        conn = sqlite3.connect(app_db_path)
-                        conn.row_factory = sqlite3.Row
-                        print(f"{Colors.GREEN}Successfully connected to APPDATA database{Colors.END}")
-                        return conn
-            except Exception as e3:
-                print(f"{Colors.RED}APPDATA attempt failed: {e3}{Colors.END}")
-            
-            return None
+        return None
 
 def list_campaigns():
     """
@@ -224,24 +125,21 @@ def create_campaign():
                     print(f"{Colors.RED}Query must be a SELECT statement and include company_id field.{Colors.END}")
                     continue
                 
-                # Test run the query
-                cursor = conn.cursor()
-                cursor.execute(query)
-                results = cursor.fetchall()
+                # Test run the query (columns and row count only, the rows stay in SQLite)
+                columns, total_results = describe_query(conn, query)
+                
+                # Verify company_id is in results
+                if 'company_id' not in columns:
+                    print(f"{Colors.RED}Query results must include company_id field.{Colors.END}")
+                    continue
                 
                 # Check if any results were returned
-                if not results:
+                if not total_results:
                     print(f"{Colors.YELLOW}Warning: This query returned 0 results. Are you sure you want to continue?{Colors.END}")
                     confirm = input(f"{Colors.BOLD}Continue with this query? (y/n): {Colors.END}").strip().lower()
                     if confirm != 'y':
                         continue
                 else:
-                    # Verify company_id is in results
-                    if 'company_id' not in dict(results[0]):
-                        print(f"{Colors.RED}Query results must include company_id field.{Colors.END}")
-                        continue
-                    
-                    total_results = len(results)
                     print(f"{Colors.GREEN}Query validated successfully! Found {total_results} matching companies.{Colors.END}")
                 
                 break
@@ -291,28 +189,11 @@ def create_campaign():
         )
         campaign_id = cursor.lastrowid
         
-        # Insert companies into companies_campaign table with batch information
-        cursor.execute(query)
-        companies = cursor.fetchall()
-        
-        # Limit to the requested number of companies
-        companies = companies[:num_companies]
-        
-        added_count = 0
-        for company in companies:
-            try:
-                cursor.execute(
-                    """INSERT INTO companies_campaign 
-                       (company_id, campaign_id, campaign_name, 
-                        campaign_batch_tag, campaign_batch_id) 
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (company['company_id'], campaign_id, campaign_name, 
-                     campaign_batch_tag, campaign_batch_id)
-                )
-                added_count += 1
-            except sqlite3.IntegrityError:
-                # Skip duplicates (although there shouldn't be any in a new campaign)
-                continue
+        # Insert the requested number of companies into companies_campaign in one statement
+        added_count = add_companies_from_query(
+            conn, query, campaign_id, campaign_name,
+            campaign_batch_tag, campaign_batch_id, limit=num_companies
+        )
         
         # Log the import
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -359,24 +240,21 @@ def add_companies_to_campaign(campaign_id, campaign_name):
                     print(f"{Colors.RED}Query must be a SELECT statement and include company_id field.{Colors.END}")
                     continue
                 
-                # Test run the query
-                cursor = conn.cursor()
-                cursor.execute(query)
-                results = cursor.fetchall()
+                # Test run the query (columns and row count only, the rows stay in SQLite)
+                columns, total_results = describe_query(conn, query)
+                
+                # Verify company_id is in results
+                if 'company_id' not in columns:
+                    print(f"{Colors.RED}Query results must include company_id field.{Colors.END}")
+                    continue
                 
                 # Check if any results were returned
-                if not results:
+                if not total_results:
                     print(f"{Colors.YELLOW}Warning: This query returned 0 results. Are you sure you want to continue?{Colors.END}")
                     confirm = input(f"{Colors.BOLD}Continue with this query? (y/n): {Colors.END}").strip().lower()
                     if confirm != 'y':
                         continue
                 else:
-                    # Verify company_id is in results
-                    if 'company_id' not in dict(results[0]):
-                        print(f"{Colors.RED}Query results must include company_id field.{Colors.END}")
-                        continue
-                    
-                    total_results = len(results)
                     print(f"{Colors.GREEN}Query validated successfully! Found {total_results} matching companies.{Colors.END}")
                 
                 break
@@ -384,15 +262,9 @@ def add_companies_to_campaign(campaign_id, campaign_name):
                 print(f"{Colors.RED}Error in SQL query: {e}{Colors.END}")
                 continue
         
-        # Get list of companies already in campaign
+        # Count the companies of the query that are not already in the campaign
         cursor = conn.cursor()
-        cursor.execute("SELECT company_id FROM companies_campaign WHERE campaign_id = ?", (campaign_id,))
-        existing_company_ids = set([row['company_id'] for row in cursor.fetchall()])
-        
-        # Filter query results to exclude companies already in campaign
-        cursor.execute(query)
-        all_companies = cursor.fetchall()
-        new_companies = [company for company in all_companies if company['company_id'] not in existing_company_ids]
+        new_companies = count_new_companies(conn, query, campaign_id)
         
         if not new_companies:
             print(f"{Colors.YELLOW}Warning: All companies from this query are already in the campaign.{Colors.END}")
@@ -400,10 +272,10 @@ def add_companies_to_campaign(campaign_id, campaign_name):
             if confirm != 'y':
                 return False
         else:
-            print(f"{Colors.GREEN}Found {len(new_companies)} new companies that are not already in this campaign.{Colors.END}")
+            print(f"{Colors.GREEN}Found {new_companies} new companies that are not already in this campaign.{Colors.END}")
         
         # Ask for number of companies to import
-        max_companies = len(new_companies)
+        max_companies = new_companies
         while True:
             try:
                 num_companies = input(f"{Colors.BOLD}How many companies to import (max {max_companies}, enter 0 for all): {Colors.END}").strip()
@@ -436,25 +308,11 @@ def add_companies_to_campaign(campaign_id, campaign_name):
         # Generate a unique campaign batch ID
         campaign_batch_id = str(uuid.uuid4())
         
-        # Limit to the requested number of companies
-        companies_to_add = new_companies[:num_companies]
-        
-        # Insert companies into companies_campaign table with batch information
-        added_count = 0
-        for company in companies_to_add:
-            try:
-                cursor.execute(
-                    """INSERT INTO companies_campaign 
-                       (company_id, campaign_id, campaign_name, 
-                        campaign_batch_tag, campaign_batch_id) 
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (company['company_id'], campaign_id, campaign_name, 
-                     campaign_batch_tag, campaign_batch_id)
-                )
-                added_count += 1
-            except sqlite3.IntegrityError:
-                # This should not happen since we filtered out existing companies
-                continue
+        # Insert the requested number of new companies in one statement (existing ones are skipped)
+        added_count = add_companies_from_query(
+            conn, query, campaign_id, campaign_name,
+            campaign_batch_tag, campaign_batch_id, limit=num_companies
+        )
         
         # Log the import
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
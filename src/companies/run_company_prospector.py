@@ -4,9 +4,12 @@ import sqlite3
 from sqlite3 import Error
 import time
 import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import quote_plus
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton, 
-                           QVBoxLayout, QHBoxLayout, QWidget, QComboBox)
-from PyQt5.QtCore import Qt
+                           QVBoxLayout, QHBoxLayout, QWidget, QComboBox, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 import warnings
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -34,6 +37,15 @@ src_companies_dir = os.path.join(current_dir, 'src_companies')
 if src_companies_dir not in sys.path:
     sys.path.insert(0, src_companies_dir)
 
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import connect
+from crm.state_updates import (queue_state_update, flush_state_updates, close_state_writer,
+                                add_failure_handler, remove_failure_handler)
+
 # Set up project root path for database access
 project_root = os.path.dirname(os.path.dirname(current_dir))
 os.environ['PROJECT_ROOT'] = project_root
@@ -52,86 +64,12 @@ class Colors:
 
 def get_db_connection():
     """
-    Create a database connection to the SQLite database.
+    Get a pooled connection to the SQLite database.
     """
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    print(f"{Colors.CYAN}Trying hardcoded Windows database path: {windows_path}{Colors.END}")
-    
-    # Try hardcoded path first
     try:
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"{Colors.GREEN}Created hardcoded database directory{Colors.END}")
-            
-        conn = sqlite3.connect(windows_path)
-        conn.row_factory = sqlite3.Row
-        print(f"{Colors.GREEN}Successfully connected using hardcoded path{Colors.END}")
-        # Set the project root for future use
-        os.environ['PROJECT_ROOT'] = os.path.dirname(db_dir)
-        return conn
+        return connect(row_factory=sqlite3.Row)  # This enables column access by name
     except Exception as e:
-        print(f"{Colors.RED}Hardcoded path failed: {e}{Colors.END}")
-    
-    # Get project root from environment variable
-    project_root = os.environ.get('PROJECT_ROOT')
-    if not project_root:
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    
-    db_path = os.path.join(project_root, 'databases', 'database.db')
-    print(f"{Colors.CYAN}Trying environment/calculated path: {db_path}{Colors.END}")
-    
-    try:
-        # Ensure the database directory exists
-        db_dir = os.path.dirname(db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"{Colors.GREEN}Created database directory{Colors.END}")
-        
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        print(f"{Colors.GREEN}Successfully connected using project path{Colors.END}")
-        return conn
-    except Error as e:
         print(f"{Colors.RED}Error connecting to database: {e}{Colors.END}")
-        
-        # Try user's home directory as fallback
-        try:
-            user_home = os.path.expanduser("~")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            
-            # Ensure the directory exists
-            alt_db_dir = os.path.dirname(alt_db_path)
-            if not os.path.exists(alt_db_dir):
-                os.makedirs(alt_db_dir, exist_ok=True)
-                print(f"{Colors.GREEN}Created user home database directory{Colors.END}")
-            
-            print(f"{Colors.YELLOW}Trying alternate database path: {alt_db_path}{Colors.END}")
-            conn = sqlite3.connect(alt_db_path)
-            conn.row_factory = sqlite3.Row
-            print(f"{Colors.GREEN}Successfully connected using home directory path{Colors.END}")
-            return conn
-        except Exception as e2:
-            print(f"{Colors.RED}Home directory database failed: {e2}{Colors.END}")
-            
-            # Final attempt for Windows - try APPDATA
-            if os.name == 'nt':  # Windows
-                try:
-                    appdata = os.environ.get('APPDATA', '')
-                    if appdata:
-                        app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                        if not os.path.exists(app_db_dir):
-                            os.makedirs(app_db_dir, exist_ok=True)
-                        app_db_path = os.path.join(app_db_dir, 'database.db')
-                        print(f"{Colors.YELLOW}Trying APPDATA database path: {app_db_path}{Colors.END}")
-                        conn = sqlite3.connect(app_db_path)
-                        conn.row_factory = sqlite3.Row
-                        print(f"{Colors.GREEN}Successfully connected using APPDATA path{Colors.END}")
-                        return conn
-                except Exception as e3:
-                    print(f"{Colors.RED}APPDATA database failed: {e3}{Colors.END}")
-        
         return None
 
 def get_campaigns():
@@ -183,116 +121,447 @@ def get_campaign_batches(campaign_id):
     finally:
         conn.close()
 
+# Companies are read a page at a time, keyed on (added_at, counter)
+COMPANY_PAGE_SIZE = 200
+MAX_CACHED_PAGES = 5
+PREFETCH_MARGIN = 20  # rows from the page edge at which the adjacent page is prefetched
+
+# One headquarters row and the latest rating per company, so a company with
+# several locations or ratings still comes back once
+COMPANY_COLUMNS = """
+    cc.counter,
+    cc.added_at,
+    cc.company_id,
+    cc.current_state,
+    c.name,
+    c.website,
+    c.headcount,
+    c.revenue,
+    c.founded,
+    cl.country,
+    cl.state,
+    cl.city,
+    cr.overall_rating,
+    cr.review_count
+"""
+COMPANY_FROM = """
+    FROM companies_campaign cc
+    JOIN companies c ON cc.company_id = c.company_id
+    LEFT JOIN company_locations cl ON cl.location_id = (
+        SELECT location_id FROM company_locations
+        WHERE company_id = cc.company_id
+            AND (office_type = 'headquarters' OR office_type IS NULL)
+        ORDER BY office_type IS NULL, location_id
+        LIMIT 1
+    )
+    LEFT JOIN company_ratings cr ON cr.rating_id = (
+        SELECT MAX(rating_id) FROM company_ratings WHERE company_id = cc.company_id
+    )
+"""
+
+class CampaignCompanies:
+    """
+    Read-only sequence over the companies of a campaign (newest first),
+    loaded lazily with keyset pagination.
+
+    Only a few pages are kept in memory; the page next to the one being
+    viewed is fetched in a background thread before it's needed. Rows are
+    dictionaries, so callers can update them in place (e.g. current_state).
+    """
+
+    def __init__(self, campaign_id, batch_id=None, page_size=COMPANY_PAGE_SIZE):
+        self.campaign_id = campaign_id
+        self.batch_id = batch_id
+        self.page_size = page_size
+        self._pages = OrderedDict()  # page -> rows, least recently used first
+        self._bounds = {}            # page -> (first key, last key), kept for every page seen
+        self._loading = {}           # page -> threading.Event while it's being fetched
+        self._generation = 0         # bumped by reload(), so fetches started before it are not kept
+        self._lock = threading.Lock()
+        self._total = self._count()
+
+    def _filter(self):
+        where = " WHERE cc.campaign_id = ?"
+        params = [self.campaign_id]
+        if self.batch_id:
+            where += " AND cc.campaign_batch_id = ?"
+            params.append(self.batch_id)
+        return where, params
+
+    def _execute(self, query, params):
+        conn = get_db_connection()
+        if not conn:
+            raise Error("Database connection failed")
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def _count(self, after_key=None):
+        where, params = self._filter()
+        if after_key is not None:
+            where += " AND (cc.added_at, cc.counter) > (?, ?)"
+            params += list(after_key)
+        query = "SELECT COUNT(*) FROM companies_campaign cc JOIN companies c ON cc.company_id = c.company_id" + where
+        return self._execute(query, params)[0][0]
+
+    def _select(self, key=None, backwards=False, limit=COMPANY_PAGE_SIZE, offset=0):
+        """Rows after key in display order (before it if backwards), as dictionaries in display order."""
+        where, params = self._filter()
+        if key is not None:
+            where += f" AND (cc.added_at, cc.counter) {'>' if backwards else '<'} (?, ?)"
+            params += list(key)
+        order = "ASC" if backwards else "DESC"
+        query = (f"SELECT {COMPANY_COLUMNS} {COMPANY_FROM} {where}"
+                 f" ORDER BY cc.added_at {order}, cc.counter {order} LIMIT ? OFFSET ?")
+        rows = [dict(row) for row in self._execute(query, params + [limit, offset])]
+        if backwards:
+            rows.reverse()
+        return rows
+
+    def _fetch_page(self, page):
+        """Seeks to the page from a neighbouring page boundary; OFFSET only for a jump."""
+        flush_state_updates()  # read back decisions still queued
+        last_page = (self._total - 1) // self.page_size
+        if page == 0:
+            return self._select()
+        if page - 1 in self._bounds:
+            return self._select(self._bounds[page - 1][1])
+        if page + 1 in self._bounds:
+            return self._select(self._bounds[page + 1][0], backwards=True)
+        if page == last_page:
+            return self._select(backwards=True, limit=self._total - page * self.page_size)
+        return self._select(offset=page * self.page_size)
+
+    def _load(self, page):
+        while True:
+            with self._lock:
+                if page in self._pages:
+                    self._pages.move_to_end(page)
+                    return self._pages[page]
+                loading = self._loading.get(page)
+                if loading is None:
+                    loading = self._loading[page] = threading.Event()
+                    generation = self._generation
+                    break
+            loading.wait()  # fetched by another thread (or it failed and we retry)
+
+        try:
+            rows = self._fetch_page(page)
+            with self._lock:
+                if generation != self._generation:
+                    return rows
+                self._pages[page] = rows
+                if rows:
+                    self._bounds[page] = (
+                        (rows[0]['added_at'], rows[0]['counter']),
+                        (rows[-1]['added_at'], rows[-1]['counter'])
+                    )
+                while len(self._pages) > MAX_CACHED_PAGES:
+                    self._pages.popitem(last=False)
+            return rows
+        finally:
+            with self._lock:
+                del self._loading[page]
+            loading.set()
+
+    def _prefetch(self, page):
+        if not 0 <= page * self.page_size < self._total:
+            return
+        with self._lock:
+            if page in self._pages or page in self._loading:
+                return
+
+        def load():
+            try:
+                self._load(page)
+            except Exception as e:
+                logging.error(f"Error prefetching companies page {page}: {e}")
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def __len__(self):
+        return self._total
+
+    def _expected_rows(self, page):
+        return min(self.page_size, self._total - page * self.page_size)
+
+    def __getitem__(self, index):
+        for attempt in range(2):
+            position = index + self._total if index < 0 else index
+            if not 0 <= position < self._total:
+                raise IndexError("company index out of range")
+            page, offset = divmod(position, self.page_size)
+            rows = self._load(page)
+            if len(rows) == self._expected_rows(page):
+                break
+            # Companies were added to or removed from the campaign since it was counted
+            self.reload()
+        if offset >= len(rows):
+            raise IndexError("company index out of range")
+
+        # Fetch the adjacent page before the user gets to it
+        if offset >= self.page_size - PREFETCH_MARGIN:
+            self._prefetch(page + 1)
+        elif offset < PREFETCH_MARGIN:
+            self._prefetch(page - 1 if page > 0 else (self._total - 1) // self.page_size)
+        return rows[offset]
+
+    def reload(self):
+        """Counts the companies again and drops the cached pages, so rows are read again from the database."""
+        total = self._count()
+        with self._lock:
+            self._generation += 1
+            self._total = total
+            self._pages.clear()
+            self._bounds.clear()
+
+    def first_index_with_state(self, state):
+        """Position of the first company in the given state, or None."""
+        where, params = self._filter()
+        rows = self._execute(
+            "SELECT cc.added_at, cc.counter FROM companies_campaign cc "
+            "JOIN companies c ON cc.company_id = c.company_id"
+            + where + " AND cc.current_state = ? ORDER BY cc.added_at DESC, cc.counter DESC LIMIT 1",
+            params + [state]
+        )
+        if not rows:
+            return None
+        return self._count(after_key=tuple(rows[0]))
+
 def get_companies_for_campaign(campaign_id, batch_id=None):
     """
-    Get all companies for a specific campaign, optionally filtered by batch.
+    Get the companies of a specific campaign, optionally filtered by batch.
     
     Args:
         campaign_id: The ID of the campaign
         batch_id: Optional batch ID to filter by
         
     Returns:
-        List of companies with their details as dictionaries (not sqlite3.Row objects)
+        A CampaignCompanies sequence of company dictionaries, loaded page by page
+        as they are accessed (an empty list on error)
     """
-    conn = get_db_connection()
-    if not conn:
-        return []
-    
     try:
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT 
-                cc.company_id,
-                cc.current_state,
-                c.name,
-                c.website,
-                c.headcount,
-                c.revenue,
-                c.founded,
-                cl.country,
-                cl.state,
-                cl.city,
-                cr.overall_rating,
-                cr.review_count
-            FROM companies_campaign cc
-            JOIN companies c ON cc.company_id = c.company_id
-            LEFT JOIN company_locations cl ON cc.company_id = cl.company_id 
-                AND (cl.office_type = 'headquarters' OR cl.office_type IS NULL)
-            LEFT JOIN company_ratings cr ON cc.company_id = cr.company_id
-            WHERE cc.campaign_id = ?
-        """
-        
-        params = [campaign_id]
-        
-        if batch_id:
-            query += " AND cc.campaign_batch_id = ?"
-            params.append(batch_id)
-            
-        query += " ORDER BY cc.added_at DESC"
-        
-        cursor.execute(query, params)
-        
-        # Convert sqlite3.Row objects to regular dictionaries so we can modify them
-        rows = cursor.fetchall()
-        companies = []
-        for row in rows:
-            company_dict = {key: row[key] for key in row.keys()}
-            companies.append(company_dict)
-            
-        return companies
+        return CampaignCompanies(campaign_id, batch_id)
     except Error as e:
         print(f"{Colors.RED}Error fetching companies: {e}{Colors.END}")
         return []
-    finally:
-        conn.close()
 
 def update_company_state(company_id, campaign_id, new_state):
     """
     Update the state of a company in a campaign.
     
+    The update is queued and written in the background, batched with the
+    next decisions (see crm.state_updates).
+    
     Args:
         company_id: The ID of the company
         campaign_id: The ID of the campaign
         new_state: The new state ('approved', 'rejected', or 'undecided')
     
     Returns:
-        True if successful, False otherwise
+        True once the update is queued (updates that fail to be written are
+        reported to the handlers of crm.state_updates.add_failure_handler)
     """
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE companies_campaign
-            SET current_state = ?
-            WHERE company_id = ? AND campaign_id = ?
-        """, (new_state, company_id, campaign_id))
-        
-        conn.commit()
-        return True
-    except Error as e:
-        print(f"{Colors.RED}Error updating company state: {e}{Colors.END}")
-        return False
-    finally:
-        conn.close()
+    queue_state_update(
+        'companies_campaign',
+        {'company_id': company_id, 'campaign_id': campaign_id},
+        {'current_state': new_state}
+    )
+    return True
+
+# Company websites loaded ahead of the one on screen
+PREFETCH_TABS = int(os.environ.get("PROSPECTOR_PREFETCH_TABS", "3"))
+
+# Milliseconds between checks of a website still loading on screen, and how long to keep checking
+TAB_CHECK_INTERVAL = 1000
+TAB_CHECK_TIMEOUT = 30000
+
+# 'error' when the tab shows Chrome's network error page, 'ok' once the page has loaded
+TAB_STATUS_SCRIPT = """
+if (location.href.indexOf('chrome-error://') === 0 ||
+        (document.body && document.body.classList.contains('neterror'))) return 'error';
+return document.readyState === 'complete' ? 'ok' : 'loading';
+"""
+
+def get_company_url(company):
+    """The company website with an http(s) prefix, or None."""
+    website = company['website']
+    if not website or not website.strip():
+        return None
+    website = website.strip()
+    if not website.startswith(('http://', 'https://')):
+        website = 'https://' + website
+    return website
+
+def get_search_url(company):
+    """Web search for the company, shown when it has no reachable website."""
+    company_name = company['name'] or company['company_id']
+    return f"https://www.google.com/search?q={quote_plus(str(company_name))}"
+
+class WebsiteTabPool:
+    """
+    Browser tabs holding the company on screen and the next companies.
+
+    The upcoming websites start loading in background tabs while the user is
+    still looking at the current one. Tabs are recycled (navigated to the next
+    website) instead of closed and reopened. Each tab has a window name and is
+    navigated with window.open(url, name) from the window on screen, so
+    loading a background tab doesn't bring it to the front; the driver only
+    switches to the tab being shown. Websites that turn out to be unreachable
+    are remembered, so from then on their tab goes straight to the search
+    fallback.
+
+    Needs a driver with page_load_strategy 'none', so navigating a tab doesn't
+    wait for the page to load.
+    """
+
+    def __init__(self, driver, prefetch=PREFETCH_TABS):
+        self.driver = driver
+        self.size = prefetch + 1
+        self.tabs = OrderedDict()  # handle -> URL loaded in it, least recently shown first
+        self.names = {}            # handle -> window name used to navigate it
+        self.opened = 0
+        self.reachable = set()
+        self.unreachable = set()
+        self.current = None  # company on screen
+
+    def get_target_url(self, company):
+        website = get_company_url(company)
+        if website and website not in self.unreachable:
+            return website
+        return get_search_url(company)
+
+    def _find_tab(self, url):
+        for handle, tab_url in self.tabs.items():
+            if tab_url == url:
+                return handle
+        return None
+
+    def _window_open(self, url, name):
+        """Runs window.open(url, name) in the current window; returns the handle of a tab it created, or None."""
+        before = set(self.driver.window_handles)
+        self.driver.execute_script("window.open(arguments[0], arguments[1]);", url, name)
+        return next(iter(set(self.driver.window_handles) - before), None)
+
+    def _open_tab(self, url):
+        self.opened += 1
+        name = f"prospector-{self.opened}"
+        handle = self._window_open(url, name)
+        self.names[handle] = name
+        self.tabs[handle] = url
+        return handle
+
+    def _navigate(self, handle, url):
+        """Loads url in the tab without switching to it; returns the tab's handle."""
+        name = self.names[handle]
+        opened = self._window_open(url, name)
+        if opened is not None:
+            # The tab can't be reached by name from this window any more (e.g. the
+            # site it showed isolated it); the new tab with that name replaces it
+            current = self.driver.current_window_handle
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+            self.driver.switch_to.window(opened if current == handle else current)
+            del self.tabs[handle]
+            del self.names[handle]
+            self.names[opened] = name
+            handle = opened
+        self.tabs[handle] = url
+        return handle
+
+    def _check_website(self, company):
+        """
+        Switches the company's tab to the search fallback if its website didn't load.
+
+        Returns the status of the tab ('ok', 'error', 'loading'), or None if
+        there was nothing to check.
+        """
+        website = get_company_url(company)
+        handle = self._find_tab(website) if website else None
+        if handle is None or website in self.reachable:
+            return None
+        self.driver.switch_to.window(handle)
+        status = self.driver.execute_script(TAB_STATUS_SCRIPT)
+        if status == 'ok':
+            self.reachable.add(website)
+        elif status == 'error':
+            logging.info(f"Unreachable website {website}, showing search instead")
+            self.unreachable.add(website)
+            self._navigate(handle, get_search_url(company))
+        return status
+
+    def check_current(self):
+        """Re-checks the tab on screen; returns True while its website is still loading."""
+        if self.current is None:
+            return False
+        return self._check_website(self.current) == 'loading'
+
+    def show(self, company, upcoming):
+        """
+        Brings the company's tab to the front and keeps the upcoming companies
+        loading in the other tabs.
+        """
+        open_handles = set(self.driver.window_handles)
+        closed = [handle for handle in self.tabs if handle not in open_handles]
+        for handle in closed:  # closed by the user
+            del self.tabs[handle]
+            del self.names[handle]
+        if closed:
+            # Scripts run in the current window, which may be one of them
+            self.driver.switch_to.window(self.driver.window_handles[0])
+
+        # Only the tab coming on screen is checked: reading a tab's status means
+        # switching to it. The others are checked when they are shown.
+        self._check_website(company)
+
+        wanted = [company] + list(upcoming)[:self.size - 1]
+        urls = [self.get_target_url(wanted_company) for wanted_company in wanted]
+        free = [handle for handle, url in self.tabs.items() if url not in urls]
+        for url in urls:
+            if self._find_tab(url):
+                continue
+            if free:
+                self._navigate(free.pop(0), url)
+            elif len(self.tabs) < self.size:
+                # New tabs may open in front; the company's tab is brought back below
+                self._open_tab(url)
+            else:
+                break
+
+        current = self._find_tab(urls[0])
+        self.tabs.move_to_end(current)
+        self.driver.switch_to.window(current)
+        self.current = company
 
 class CompanyProspectorWindow(QMainWindow):
+    # Emitted from the state writer thread when decisions could not be saved
+    decisions_failed = pyqtSignal()
+
     def __init__(self, campaign_id, companies, parent=None):
         super().__init__(parent)
         self.campaign_id = campaign_id
         self.companies = companies
         self.current_index = 0
         self.driver = None
-        self.current_tab_index = 1  # Start with index 1 (second tab)
+        self.tab_pool = None
+        
+        # Re-checks the website on screen until it has loaded or failed
+        self.tab_check_timer = QTimer(self)
+        self.tab_check_timer.setInterval(TAB_CHECK_INTERVAL)
+        self.tab_check_timer.timeout.connect(self.check_browser_tab)
+        self.tab_checks_left = 0
+        
+        # Decisions the background writer could not save
+        self.failed_updates = []
+        self.failed_updates_lock = threading.Lock()
+        self.decisions_failed.connect(self.on_decisions_failed)
+        add_failure_handler(self.on_state_write_failure)
         
         # Find first undecided company
-        for i, company in enumerate(self.companies):
-            if company['current_state'] == 'undecided':
-                self.current_index = i
-                break
+        first_undecided = self.companies.first_index_with_state('undecided') if self.companies else None
+        if first_undecided is not None:
+            self.current_index = first_undecided
         
         self.init_ui()
         self.init_browser()
@@ -390,6 +659,9 @@ class CompanyProspectorWindow(QMainWindow):
             chrome_options.add_argument("--disable-features=VizDisplayCompositor")
             chrome_options.add_argument("--disable-popup-blocking")
             
+            # Don't block on page loads, websites are loaded in background tabs
+            chrome_options.page_load_strategy = 'none'
+            
             # Initialize Chrome without ChromeDriverManager since it seems to be causing issues
             try:
                 self.driver = webdriver.Chrome(options=chrome_options)
@@ -400,39 +672,9 @@ class CompanyProspectorWindow(QMainWindow):
                 # In production we would handle this better with fallbacks
                 raise  # Re-raise to exit the application
             
-            # Open DuckDuckGo in the first tab
+            # Open DuckDuckGo in the first tab; company websites go in the tab pool
             self.driver.get("https://duckduckgo.com")
-            
-            # Prepare to open company website in a new tab
-            if self.companies and self.current_index < len(self.companies):
-                company = self.companies[self.current_index]
-                website = company['website']
-                
-                if website and website.strip():
-                    # Make sure website has http/https prefix
-                    if not website.startswith(('http://', 'https://')):
-                        website = 'https://' + website
-                    
-                    try:
-                        # Open the company website in a new tab
-                        self.driver.execute_script(f"window.open('{website}');")
-                        # Switch to the new tab
-                        self.driver.switch_to.window(self.driver.window_handles[1])
-                    except Exception as tab_error:
-                        if debug_mode:
-                            print(f"{Colors.RED}Error opening company website tab: {tab_error}{Colors.END}")
-                        logging.error(f"Error opening company website tab: {tab_error}")
-                        # Try Google search as fallback
-                        company_name = company['name']
-                        if company_name:
-                            search_url = f"https://www.google.com/search?q={company_name.replace(' ', '+')}"
-                            try:
-                                self.driver.execute_script(f"window.open('{search_url}');")
-                                self.driver.switch_to.window(self.driver.window_handles[1])
-                            except Exception as search_error:
-                                if debug_mode:
-                                    print(f"{Colors.RED}Error opening Google search: {search_error}{Colors.END}")
-                                logging.error(f"Error opening Google search: {search_error}")
+            self.tab_pool = WebsiteTabPool(self.driver)
         except Exception as e:
             if debug_mode:
                 print(f"{Colors.RED}Error initializing browser: {e}{Colors.END}")
@@ -443,7 +685,12 @@ class CompanyProspectorWindow(QMainWindow):
             self.name_label.setText("No companies available")
             return
         
-        company = self.companies[self.current_index]
+        try:
+            company = self.companies[self.current_index]
+        except IndexError:
+            # Companies were removed from the campaign since it was counted
+            self.current_index = max(len(self.companies) - 1, 0)
+            return self.show_current_company()
         
         # Update labels with company information - handle potential None values safely
         name = company['name'] if company['name'] is not None else "Unknown"
@@ -510,49 +757,33 @@ class CompanyProspectorWindow(QMainWindow):
         self.update_browser_tab()
     
     def update_browser_tab(self):
-        if not self.driver:
+        if not self.driver or not self.tab_pool:
             return
             
         try:
-            # Get the current company website
+            # Show the current company website and start loading the next ones
             company = self.companies[self.current_index]
-            website = company['website']
-            
-            if website and website.strip():
-                # Make sure website has http/https prefix
-                if not website.startswith(('http://', 'https://')):
-                    website = 'https://' + website
-                
-                # Check if we have more than 1 tab open
-                if len(self.driver.window_handles) > 1:
-                    # Close the company tab if it exists (keep the DuckDuckGo tab)
-                    if len(self.driver.window_handles) > 1:
-                        self.driver.switch_to.window(self.driver.window_handles[1])
-                        self.driver.close()
-                    
-                    # Switch back to the first tab
-                    self.driver.switch_to.window(self.driver.window_handles[0])
-                
-                # Open the new company website in a new tab
-                try:
-                    self.driver.execute_script(f"window.open('{website}');")
-                    
-                    # Switch to the new tab
-                    self.driver.switch_to.window(self.driver.window_handles[1])
-                except Exception as e:
-                    print(f"Error opening company website: {e}")
-                    # If there was an error, try with a Google search instead
-                    company_name = company['name']
-                    if company_name:
-                        search_url = f"https://www.google.com/search?q={company_name.replace(' ', '+')}"
-                        try:
-                            self.driver.execute_script(f"window.open('{search_url}');")
-                            self.driver.switch_to.window(self.driver.window_handles[1])
-                        except Exception as e2:
-                            print(f"Error opening Google search: {e2}")
+            upcoming = [
+                self.companies[(self.current_index + offset) % len(self.companies)]
+                for offset in range(1, min(PREFETCH_TABS, len(self.companies) - 1) + 1)
+            ]
+            self.tab_pool.show(company, upcoming)
+            self.tab_checks_left = TAB_CHECK_TIMEOUT // TAB_CHECK_INTERVAL
+            self.tab_check_timer.start()
         except Exception as e:
             print(f"Error updating browser tab: {e}")
     
+    def check_browser_tab(self):
+        """Timer slot: switches to the search fallback if the website on screen fails after show()."""
+        self.tab_checks_left -= 1
+        try:
+            still_loading = self.tab_pool.check_current()
+        except Exception as e:
+            logging.error(f"Error checking browser tab: {e}")
+            still_loading = False
+        if not still_loading or self.tab_checks_left <= 0:
+            self.tab_check_timer.stop()
+    
     def go_to_previous(self):
         if self.current_index > 0:
             self.current_index -= 1
@@ -617,7 +848,44 @@ class CompanyProspectorWindow(QMainWindow):
                 print(f"{Colors.RED}Error updating company state: {e}{Colors.END}")
             logging.error(f"Error updating company state when approving: {e}")
     
+    def on_state_write_failure(self, updates):
+        """Failure handler of the state writer; runs on the writer thread."""
+        with self.failed_updates_lock:
+            self.failed_updates.extend(updates)
+        self.decisions_failed.emit()
+
+    def take_failed_updates(self):
+        with self.failed_updates_lock:
+            updates, self.failed_updates = self.failed_updates, []
+        return updates
+
+    def on_decisions_failed(self):
+        updates = self.take_failed_updates()
+        if not updates:
+            return
+        
+        # Show the states the database actually has
+        if self.companies:
+            self.companies.reload()
+            self.show_current_company()
+        QMessageBox.warning(
+            self, "Decisions Not Saved",
+            f"{len(updates)} decision(s) could not be saved to the database and were reverted."
+        )
+
     def closeEvent(self, event):
+        self.tab_check_timer.stop()
+        
+        # Write the decisions still queued
+        close_state_writer()
+        remove_failure_handler(self.on_state_write_failure)
+        unsaved = self.take_failed_updates()
+        if unsaved:
+            QMessageBox.warning(
+                self, "Decisions Not Saved",
+                f"{len(unsaved)} decision(s) could not be saved to the database."
+            )
+        
         # Clean up browser when window is closed
         if self.driver:
             self.driver.quit()
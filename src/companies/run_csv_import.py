@@ -11,5 +11,10 @@ os.environ['PROJECT_ROOT'] = os.path.dirname(os.path.dirname(current_dir))
 os.environ['DB_PATH'] = r"C:\Users\EliasTsoukatos\Documents\software_code\Elias_CRM\databases\database.db"
 
 from src_companies.csv_import_gui import run_csv_import_gui
-run_csv_import_gui()
+
+# Guarded: the preprocessing worker processes re-import this script (spawn)
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    run_csv_import_gui()
                     
\ No newline at end of file
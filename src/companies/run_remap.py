@@ -0,0 +1,41 @@
+import sys
+import os
+
+# Set up path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_companies_dir = os.path.join(current_dir, 'src_companies')
+if src_companies_dir not in sys.path:
+    sys.path.insert(0, src_companies_dir)
+
+# Set up project root path for database access
+project_root = os.path.dirname(os.path.dirname(current_dir))
+os.environ['PROJECT_ROOT'] = project_root
+
+from db_initializer import check_for_database
+from payload_store import list_stored_batches, remap_batch
+
+def print_usage():
+    print("Usage:")
+    print("  python run_remap.py list                       List batches with stored payloads")
+    print("  python run_remap.py <batch_id> [<batch_id>...]  Re-import stored batches with the current mapper")
+    print("  python run_remap.py all                        Re-import every stored batch")
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print_usage()
+        sys.exit(1)
+
+    if not check_for_database():
+        print("Database not found.")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'list':
+        for batch_id, batch_tag, item_count in list_stored_batches():
+            print(f"{batch_id}  {batch_tag or '-'}  {item_count} items")
+    elif command == 'all':
+        for batch_id, batch_tag, _ in list_stored_batches():
+            remap_batch(batch_id, batch_tag)
+    else:
+        for batch_id in sys.argv[1:]:
+            remap_batch(batch_id)
@@ -1,75 +1,17 @@
+import os
+import sys
 import sqlite3
 
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import connect
+
 def get_db_connection():
-    """Gets a connection to the database with fallbacks"""
-    import os
-    
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    
-    # Try hardcoded path first
-    try:
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            
-        conn = sqlite3.connect(windows_path)
-        print(f"Connected to database at: {windows_path}")
-        return conn
-    except Exception as e:
-        print(f"Hardcoded path failed: {e}")
-    
-    # Try project root path
-    try:
-        # Connect to the database at project root
-        project_root = os.environ.get('PROJECT_ROOT')
-        if not project_root:
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        
-        db_path = os.path.join(project_root, 'databases', 'database.db')
-        db_dir = os.path.dirname(db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            
-        conn = sqlite3.connect(db_path)
-        print(f"Connected to database at: {db_path}")
-        return conn
-    except Exception as e:
-        print(f"Project root path failed: {e}")
-        
-        # Try user's home directory
-        try:
-            user_home = os.path.expanduser("~")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            
-            # Ensure the directory exists
-            db_folder = os.path.join(user_home, 'databases')
-            if not os.path.exists(db_folder):
-                os.makedirs(db_folder, exist_ok=True)
-                
-            conn = sqlite3.connect(alt_db_path)
-            print(f"Connected to database at: {alt_db_path}")
-            return conn
-        except Exception as e2:
-            print(f"User home path failed: {e2}")
-            
-            # Try APPDATA for Windows
-            if os.name == 'nt':  # Windows
-                try:
-                    appdata = os.environ.get('APPDATA', '')
-                    if appdata:
-                        app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                        if not os.path.exists(app_db_dir):
-                            os.makedirs(app_db_dir, exist_ok=True)
-                        app_db_path = os.path.join(app_db_dir, 'database.db')
-                        conn = sqlite3.connect(app_db_path)
-                        print(f"Connected to database at: {app_db_path}")
-                        return conn
-                except Exception as e3:
-                    print(f"APPDATA path failed: {e3}")
-    
-    # If all attempts fail, raise an exception
-    raise Exception("Could not connect to database with any of the fallback paths")
+    """Gets a pooled connection to the database"""
+    return connect()
 
 def clean_verification_records():
     """
@@ -0,0 +1,150 @@
+"""
+Streaming consumer for the Clutch actor's Apify dataset.
+
+Items are read page by page while the actor is still running and handed to
+the preprocessor as each page arrives. After every page the offset reached is
+stored in clutch_checkpoints, keyed by batch_id and run_key (one key per
+actor run when a batch is sourced from several runs), so a run that crashes is
+resumed from that offset instead of starting the actor and re-importing
+everything again. Each page is also kept in the local payload store
+(payload_store.py) so the batch can be remapped later without Apify.
+
+Anything with the small subset of the ApifyClient interface used here
+(actor().start(), run().get(), dataset().list_items()) can be passed in as the
+client; LocalDatasetClient serves a JSON/JSONL file for offline runs.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from preprocessor import preprocessor
+from domain_index import DomainIndex
+from payload_store import store_payloads
+
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_connection
+
+# Items requested from the dataset per page
+DATASET_PAGE_SIZE = 100
+
+# Seconds to wait before polling again when the actor has not produced new items
+POLL_INTERVAL = 5
+
+# Apify run statuses after which no more items will be added to the dataset
+TERMINAL_STATUSES = ("SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT")
+
+
+def get_checkpoint(batch_id, run_key=""):
+    """Returns the checkpoint row of (batch_id, run_key) as a dict, or None."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT run_id, dataset_id, last_offset, status FROM clutch_checkpoints WHERE batch_id = ? AND run_key = ?",
+            (batch_id, run_key)
+        )
+        row = cursor.fetchone()
+    if not row:
+        return None
+    return {"run_id": row[0], "dataset_id": row[1], "last_offset": row[2] or 0, "status": row[3]}
+
+
+def save_checkpoint(batch_id, run_id, dataset_id, last_offset, status="running", run_key=""):
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO clutch_checkpoints (batch_id, run_key, run_id, dataset_id, last_offset, status, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(batch_id, run_key) DO UPDATE SET
+                run_id = excluded.run_id,
+                dataset_id = excluded.dataset_id,
+                last_offset = excluded.last_offset,
+                status = excluded.status,
+                updated_at = excluded.updated_at
+        """, (batch_id, run_key, run_id, dataset_id, last_offset, status, datetime.now().isoformat()))
+
+
+def run_is_finished(client, run_id):
+    """True when the actor run can no longer add items (or there is no run to wait for)."""
+    if not run_id:
+        return True
+    run = client.run(run_id).get() or {}
+    return run.get("status") in TERMINAL_STATUSES
+
+
+def consume_dataset(client, batch_id, batch_tag, run_id, dataset_id, offset=0,
+                    page_size=DATASET_PAGE_SIZE, poll_interval=POLL_INTERVAL,
+                    run_key="", domain_index=None, on_page=None):
+    """
+    Preprocesses the dataset from offset onwards, one page at a time.
+
+    Keeps polling while the run is active and returns the number of items
+    processed once the run has finished and the dataset is drained.
+    on_page(offset) is called after every page that was imported.
+    """
+    if domain_index is None:
+        domain_index = DomainIndex()
+    processed = 0
+    while True:
+        # Check the status before reading so the last page written before the run finished is not missed
+        finished = run_is_finished(client, run_id)
+        page = client.dataset(dataset_id).list_items(offset=offset, limit=page_size)
+        items = list(page.items or [])
+
+        if items:
+            print(f"Processing items {offset + 1}-{offset + len(items)} of dataset {dataset_id}")
+            store_payloads(batch_id, items)
+            preprocessor(items, batch_id, batch_tag, domain_index=domain_index)
+            offset += len(items)
+            processed += len(items)
+            save_checkpoint(batch_id, run_id, dataset_id, offset, run_key=run_key)
+            if on_page:
+                on_page(offset)
+            continue
+
+        if finished:
+            save_checkpoint(batch_id, run_id, dataset_id, offset, status="done", run_key=run_key)
+            return processed
+
+        time.sleep(poll_interval)
+
+
+class LocalDatasetClient:
+    """
+    Stand-in for ApifyClient that serves items from a local JSON or JSONL file.
+
+    actor().start() does not run anything; it just points the dataset at the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._items = None
+
+    def _load(self):
+        if self._items is None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                if self.path.endswith(".jsonl"):
+                    self._items = [json.loads(line) for line in f if line.strip()]
+                else:
+                    self._items = json.load(f)
+        return self._items
+
+    def actor(self, actor_id):
+        return SimpleNamespace(start=lambda run_input=None: {"id": None, "defaultDatasetId": self.path})
+
+    def run(self, run_id):
+        return SimpleNamespace(get=lambda: {"id": run_id, "status": "SUCCEEDED"})
+
+    def dataset(self, dataset_id):
+        def list_items(offset=0, limit=None):
+            items = self._load()
+            end = len(items) if limit is None else offset + limit
+            page = items[offset:end]
+            return SimpleNamespace(items=page, offset=offset, count=len(page), total=len(items))
+        return SimpleNamespace(list_items=list_items)
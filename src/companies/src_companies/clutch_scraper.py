@@ -1,7 +1,25 @@
-from apify_client import ApifyClient
-from preprocessor import preprocessor
+try:
+    from apify_client import ApifyClient
+except ImportError:
+    ApifyClient = None
+from clutch_dataset import get_checkpoint, save_checkpoint, consume_dataset
 
-def run_clutch_scraper(startUrls, maxItems, excludePortfolio, includeReviews, maxReviewsPerCompany, batch_tag, batch_id):
+CLUTCH_ACTOR_ID = "XBE8BJUuJZgMf2sms"
+
+def run_clutch_scraper(startUrls, maxItems, excludePortfolio, includeReviews, maxReviewsPerCompany, batch_tag, batch_id,
+                       client=None, run_key="", domain_index=None, on_progress=None):
+    """
+    Runs the Clutch actor and imports its dataset page by page as it fills.
+
+    If (batch_id, run_key) already has a checkpoint the actor is not started
+    again; the existing dataset is read from the last processed offset. Pass
+    client to use something other than ApifyClient (e.g.
+    clutch_dataset.LocalDatasetClient). on_progress(items_done) is called after
+    every imported page.
+
+    Returns the number of items in the dataset that have been imported, or
+    None if the run failed.
+    """
     try:
         # Validación de parámetros
         if not isinstance(startUrls, list):
@@ -18,35 +36,51 @@ def run_clutch_scraper(startUrls, maxItems, excludePortfolio, includeReviews, ma
         if not isinstance(includeReviews, bool):
             raise ValueError("includeReviews must be boolean.")
 
-        client = ApifyClient("apify_api_udzZbFR9UMrpwm4W5cefPGfRksMsI02sedK4")
+        if client is None:
+            if ApifyClient is None:
+                raise ImportError("apify_client is not installed.")
+            client = ApifyClient("apify_api_udzZbFR9UMrpwm4W5cefPGfRksMsI02sedK4")
         print("Apify client initialized.")
-        
-        run_input = {
-            "customMapFunction": "(object) => { return object }",
-            "excludePortfolio": excludePortfolio,
-            "extendOutputFunction": "($) => { return {} }",
-            "includeReviews": includeReviews,
-            "maxItems": maxItems,
-            "maxReviewsPerCompany": maxReviewsPerCompany,
-            "mode": "profiles",
-            "proxy": {"useApifyProxy": True},
-            "startUrls": startUrls
-        }
-        print(f"Running scraper for {len(startUrls)} URL(s)...")
-        run = client.actor("XBE8BJUuJZgMf2sms").call(run_input=run_input)
-        dataset_id = run.get("defaultDatasetId")
-        if not dataset_id:
-            raise ValueError("No default dataset found.")
-
-        items = list(client.dataset(dataset_id).iterate_items())
-        print(f"Found {len(items)} items in the dataset")
-        for item in items:
-            print(f"Processing URL: {item.get('url')}")
-            preprocessor(item, batch_id, batch_tag)
 
+        checkpoint = get_checkpoint(batch_id, run_key)
+        if checkpoint and checkpoint["status"] == "done":
+            print(f"Batch {batch_id} was already imported ({checkpoint['last_offset']} items), nothing to do.")
+            return checkpoint["last_offset"]
+        if checkpoint and checkpoint["dataset_id"]:
+            run_id = checkpoint["run_id"]
+            dataset_id = checkpoint["dataset_id"]
+            offset = checkpoint["last_offset"]
+            print(f"Resuming batch {batch_id} from item {offset} of dataset {dataset_id}")
+        else:
+            run_input = {
+                "customMapFunction": "(object) => { return object }",
+                "excludePortfolio": excludePortfolio,
+                "extendOutputFunction": "($) => { return {} }",
+                "includeReviews": includeReviews,
+                "maxItems": maxItems,
+                "maxReviewsPerCompany": maxReviewsPerCompany,
+                "mode": "profiles",
+                "proxy": {"useApifyProxy": True},
+                "startUrls": startUrls
+            }
+            print(f"Running scraper for {len(startUrls)} URL(s)...")
+            # start() returns right away so items can be imported while the actor is still scraping
+            run = client.actor(CLUTCH_ACTOR_ID).start(run_input=run_input)
+            run_id = run.get("id")
+            dataset_id = run.get("defaultDatasetId")
+            if not dataset_id:
+                raise ValueError("No default dataset found.")
+            offset = 0
+            save_checkpoint(batch_id, run_id, dataset_id, offset, run_key=run_key)
+
+        processed = consume_dataset(client, batch_id, batch_tag, run_id, dataset_id, offset=offset,
+                                    run_key=run_key, domain_index=domain_index, on_page=on_progress)
+        print(f"Processed {processed} items from the dataset")
         print(f"Scraper completed for batch_id: {batch_id}")
+        return offset + processed
     except Exception as e:
         print(f"Error running scraper: {e}")
+        return None
 
 if __name__ == '__main__':
     run_clutch_scraper(
@@ -0,0 +1,69 @@
+"""
+Runs one Clutch actor per start URL, several at a time, into a single batch.
+
+A batch of N categories finishes in roughly the time of the slowest category
+instead of the sum of all of them. Each run keeps its own checkpoint
+(run_key = start URL), and all of them share one DomainIndex so a company
+listed in two categories is still written once.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from clutch_scraper import run_clutch_scraper
+from domain_index import DomainIndex
+
+# Actor runs started at the same time; Apify accounts also cap concurrent runs
+MAX_CONCURRENT_RUNS = 4
+
+
+def run_clutch_sourcing(startUrls, maxItems, excludePortfolio, includeReviews, maxReviewsPerCompany,
+                        batch_tag, batch_id, client=None, max_concurrent_runs=MAX_CONCURRENT_RUNS,
+                        on_progress=None):
+    """
+    Sources every URL in startUrls as its own actor run, merged into batch_id.
+
+    maxItems applies to each run. on_progress(url, items_done, status) is
+    called from worker threads with status "running", "done" or "failed".
+    Returns a {url: items_done or None} dict.
+    """
+    domain_index = DomainIndex()
+
+    def report(url, items_done, status):
+        if on_progress:
+            on_progress(url, items_done, status)
+
+    def source(url):
+        report(url, 0, "running")
+        items_done = run_clutch_scraper(
+            startUrls=[url],
+            maxItems=maxItems,
+            excludePortfolio=excludePortfolio,
+            includeReviews=includeReviews,
+            maxReviewsPerCompany=maxReviewsPerCompany,
+            batch_tag=batch_tag,
+            batch_id=batch_id,
+            client=client,
+            run_key=url,
+            domain_index=domain_index,
+            on_progress=lambda done: report(url, done, "running")
+        )
+        report(url, items_done or 0, "failed" if items_done is None else "done")
+        return items_done
+
+    results = {}
+    urls = list(dict.fromkeys(startUrls))  # same URL twice would share a checkpoint
+    print(f"Sourcing {len(urls)} URL(s) with up to {max_concurrent_runs} concurrent runs...")
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrent_runs)) as executor:
+        futures = {executor.submit(source, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                print(f"Error sourcing {url}: {e}")
+                report(url, 0, "failed")
+                results[url] = None
+
+    done = sum(1 for items in results.values() if items is not None)
+    print(f"Sourcing finished for batch_id {batch_id}: {done}/{len(urls)} runs completed")
+    return results
@@ -18,8 +18,10 @@ from PyQt5.QtGui import QFont, QIcon, QColor
 
 # Import local modules
 from db_initializer import check_for_database
-from preprocessor import preprocessor, clean_url
+from preprocessor import preprocessor, clean_url, create_preprocess_executor
 from csv_parser import get_db_columns, load_previous_mappings, save_mappings, create_new_column, create_new_table
+from csv_stream import CSV_CHUNK_SIZE, read_csv_columns, csv_has_rows, count_csv_rows, iter_csv_chunks
+from domain_index import DomainIndex
 
 # Initialize console encoding for Windows
 if platform.system() == 'Windows':
@@ -513,10 +515,10 @@ class StepByStepMappingDialog(QMainWindow):
                 column_name = dialog.result_column
                 column_type = dialog.result_type
                 
-                create_new_column(table_name, column_name_db=column_name, column_type=column_type)
+                create_new_column(table_name, column_name, column_type)
                 
                 # Update our database schema
-                self.db_tables = get_db_columns()
+                self.db_tables = get_db_columns(include_custom=True)
                 
                 # Refresh the UI to include the new column
                 central_widget = self.centralWidget()
@@ -551,7 +553,7 @@ class StepByStepMappingDialog(QMainWindow):
                 create_new_table(table_name, column_defs)
                 
                 # Update our database schema
-                self.db_tables = get_db_columns()
+                self.db_tables = get_db_columns(include_custom=True)
                 
                 # Refresh the UI to include the new table
                 central_widget = self.centralWidget()
@@ -601,7 +603,7 @@ class CSVImportWindow(QMainWindow):
         
         # Initialize instance variables
         self.csv_file_path = None
-        self.df = None
+        self.csv_columns = None
         self.db_tables = None
         self.mappings = {}
         self.previous_mappings = None
@@ -715,7 +717,7 @@ class CSVImportWindow(QMainWindow):
                 return
             
             # Get database tables and columns
-            self.db_tables = get_db_columns()
+            self.db_tables = get_db_columns(include_custom=True)
             
             # Set status message
             self.status_bar.showMessage("Database verified. Ready to import CSV data.")
@@ -738,10 +740,11 @@ class CSVImportWindow(QMainWindow):
             
             # Try to load the CSV file
             try:
-                self.df = pd.read_csv(file_path)
+                # Only the header is read here; rows are streamed during import
+                self.csv_columns = read_csv_columns(file_path)
                 
                 # Check if file has at least one row
-                if len(self.df) == 0:
+                if not csv_has_rows(file_path):
                     QMessageBox.warning(self, "Empty File", "The selected CSV file is empty.")
                     return
                 
@@ -779,13 +782,13 @@ class CSVImportWindow(QMainWindow):
     def start_mapping(self):
         """Start the step-by-step mapping process"""
         # First check that we have CSV data
-        if self.df is None or len(self.df.columns) == 0:
+        if not self.csv_columns:
             QMessageBox.warning(self, "No Data", "Please select a CSV file first.")
             return
         
         # Create the step-by-step mapping dialog
         dialog = StepByStepMappingDialog(
-            csv_columns=list(self.df.columns),
+            csv_columns=list(self.csv_columns),
             db_tables=self.db_tables,
             previous_mappings=self.previous_mappings,
             parent=self
@@ -822,7 +825,7 @@ class CSVImportWindow(QMainWindow):
             print("No mappings received. Creating basic default mappings.")
             default_mappings = {}
             
-            for col in self.df.columns:
+            for col in self.csv_columns:
                 col_lower = col.lower()
                 # Map some common columns by name
                 if col_lower in ['name', 'company', 'company_name']:
@@ -863,7 +866,7 @@ class CSVImportWindow(QMainWindow):
         pass
     
     def import_data(self):
-        """Process the CSV import with the current mappings using the csv_parser approach"""
+        """Process the CSV import with the current mappings, streaming the file in chunks"""
         # Validate batch tag
         batch_tag = self.batch_tag_input.text().strip()
         if not batch_tag:
@@ -874,24 +877,22 @@ class CSVImportWindow(QMainWindow):
         # Generate batch ID
         batch_id = str(uuid.uuid4())
         
+        # Count rows up front so progress reports real row counts
+        total_rows = count_csv_rows(self.csv_file_path)
+        
         # Prepare progress dialog
-        progress = QProgressDialog("Importing data...", "Cancel", 0, 100, self)
+        progress = QProgressDialog("Importing data...", "Cancel", 0, max(total_rows, 1), self)
         progress.setWindowTitle("Import Progress")
         progress.setWindowModality(Qt.WindowModal)
         progress.setMinimumDuration(0)
         progress.setValue(0)
         
         try:
-            progress.setValue(10)
             progress.setLabelText("Saving mappings...")
             
             # Save mappings for future use with the file path for persistent mapping
             save_mappings(self.mappings, self.csv_file_path)
             
-            # COMPLETELY NEW APPROACH: Use csv_parser's approach directly
-            progress.setValue(30)
-            progress.setLabelText("Preparing data for preprocessing...")
-            
             # Get the project root directory (works for both approaches)
             project_root = os.environ.get('PROJECT_ROOT')
             if not project_root:
@@ -904,136 +905,101 @@ class CSVImportWindow(QMainWindow):
             os.environ['PROJECT_ROOT'] = project_root
             print(f"Using project root: {project_root}")
             
-            # Get all dataframe records as dictionary
-            records = self.df.to_dict(orient="records")
-            print(f"Prepared {len(records)} records for import")
-            
-            # Process the data directly using the preprocessor
-            progress.setValue(50)
-            progress.setLabelText("Processing data through preprocessor...")
-            
-            # Directly using preprocessor
-            from preprocessor import preprocessor
-            print(f"Calling preprocessor with {len(records)} records, batch_id: {batch_id}, batch_tag: {batch_tag}")
-            
-            # Convert mappings to the exact format the csv_parser uses
-            # From csv_parser.py - we need table_mappings correctly formatted
-            fixed_mappings = {}
-            table_mappings = {}
-            
-            # Process the mappings the same way csv_parser.py does
-            for csv_col, mapping in self.mappings.items():
-                if not mapping:
-                    continue  # Skip empty mappings
-                    
-                if "." in mapping:
-                    # Handle fully qualified mappings (table.column)
-                    table, column = mapping.split(".", 1)
-                    if table not in table_mappings:
-                        table_mappings[table] = []
-                    table_mappings[table].append((csv_col, column))
-                    fixed_mappings[csv_col] = column
-                else:
-                    # Handle direct column mappings
-                    fixed_mappings[csv_col] = mapping
-                    
-                    # Try to find which table this column belongs to
-                    found_table = None
-                    for table_name, columns in self.db_tables.items():
-                        if mapping in columns:
-                            found_table = table_name
-                            break
-                            
-                    if found_table:
-                        if found_table not in table_mappings:
-                            table_mappings[found_table] = []
-                        table_mappings[found_table].append((csv_col, mapping))
+            fixed_mappings, table_mappings = self.build_table_mappings()
             
             print("DEBUG: Processed table mappings:")
             for table, table_map in table_mappings.items():
                 print(f"  {table}: {table_map}")
-            
-            # Create extra context similar to csv_parser
-            extra_context = {
-                "original_data": records,
-                "header_mapping": fixed_mappings,
-                "table_mappings": table_mappings
-            }
-            
-            # Print first few records for debugging
-            print("DEBUG: First record data:")
-            if len(records) > 0:
-                first_record = records[0]
-                for key, value in first_record.items():
-                    print(f"  {key}: {value}")
                 
             # Print mappings for debugging
             print("DEBUG: Mappings after processing:")
             for original, mapped in self.mappings.items():
                 print(f"  {original} -> {mapped}")
-                
-            # Create "fake" records in exactly the format expected by preprocessor
-            # We must have lowercase 'name' and 'website' fields as required by the code
-            new_records = []
+            
+            # One dedupe index for the whole file, shared by every chunk
+            domain_index = DomainIndex()
+            rows_done = 0
+            valid_count = 0
             skipped_count = 0
+            cancelled = False
             
-            for record in records:
-                new_record = {}
-                
-                # Extract name - try multiple variations
-                name = None
-                for key in ['Name', 'name', 'company', 'Company', 'company_name', 'Company Name']:
-                    if key in record and pd.notna(record[key]):
-                        name = str(record[key]).strip()
-                        break
-                        
-                # Extract website - try multiple variations
-                website = None
-                for key in ['Website', 'website', 'url', 'URL', 'web']:
-                    if key in record and pd.notna(record[key]):
-                        website = str(record[key]).strip()
-                        break
-                
-                # Skip if we don't have both name and website
-                if not name or not website:
-                    skipped_count += 1
-                    continue
+            print(f"Streaming {total_rows} rows in chunks of {CSV_CHUNK_SIZE}, batch_id: {batch_id}, batch_tag: {batch_tag}")
+            # Large files are mapped by a pool of worker processes (CRM_PREPROCESS_WORKERS)
+            executor = create_preprocess_executor(total_rows)
+            try:
+                for chunk in iter_csv_chunks(self.csv_file_path, CSV_CHUNK_SIZE):
+                    records = chunk.to_dict(orient="records")
                 
-                # Create the new record with lowercase field names
-                new_record["name"] = name
-                new_record["website"] = website
+                    # Create records in exactly the format expected by preprocessor,
+                    # keeping the original row at the same position for custom columns
+                    new_records = []
+                    original_records = []
+                    for record in records:
+                        new_record = prepare_record(record)
+                        if new_record is None:
+                            skipped_count += 1
+                            continue
+                        new_records.append(new_record)
+                        original_records.append(record)
                 
-                # Copy additional fields that might be useful - lowercase them all
-                for key, value in record.items():
-                    if pd.notna(value) and value:
-                        lkey = key.lower()
-                        if lkey not in ['name', 'website']:  # Skip fields we've already handled
-                            new_record[lkey] = value
+                    if new_records:
+                        valid_count += len(new_records)
+                        extra_context = {
+                            "original_data": original_records,
+                            "header_mapping": fixed_mappings,
+                            "table_mappings": table_mappings
+                        }
+                        preprocessor(new_records, batch_id, batch_tag, extra_context=extra_context,
+                                     domain_index=domain_index, executor=executor)
                 
-                new_records.append(new_record)
+                    rows_done += len(records)
+                    progress.setValue(min(rows_done, max(total_rows, 1)))
+                    progress.setLabelText(f"Imported {rows_done:,} of {total_rows:,} rows "
+                                          f"({skipped_count:,} skipped for missing name/website)")
+                    QApplication.processEvents()
+                    if progress.wasCanceled():
+                        cancelled = True
+                        break
+
+                # Fall back to the original records only if no valid record was found in the whole file
+                # (a chunk of blank trailing rows must not be sent as is)
+                if not cancelled and rows_done and not valid_count:
+                    print("WARNING: No valid records could be created. Trying with original records...")
+                    for chunk in iter_csv_chunks(self.csv_file_path, CSV_CHUNK_SIZE):
+                        records = chunk.to_dict(orient="records")
+                        extra_context = {
+                            "original_data": records,
+                            "header_mapping": fixed_mappings,
+                            "table_mappings": table_mappings
+                        }
+                        preprocessor(records, batch_id, batch_tag, extra_context=extra_context,
+                                     domain_index=domain_index, executor=executor)
+            finally:
+                if executor:
+                    executor.shutdown()
             
-            print(f"DEBUG: Created {len(new_records)} valid records, skipped {skipped_count} due to missing name/website")
-                    
-            # Now call the preprocessor with our properly formatted records
-            print("DEBUG: Calling preprocessor with properly formatted records...")
-            if new_records:
-                # Try with our cleaned records first
-                preprocessor(new_records, batch_id, batch_tag, extra_context=extra_context)
-            else:
-                # Fall back to original records if no valid records could be created
-                print("WARNING: No valid records could be created. Trying with original records...")
-                preprocessor(records, batch_id, batch_tag, extra_context=extra_context)
+            print(f"DEBUG: Processed {rows_done} rows, skipped {skipped_count} due to missing name/website")
             
             # Complete
-            progress.setValue(100)
+            progress.setValue(max(total_rows, 1))
             
-            # Show success message
-            QMessageBox.information(
-                self, "Import Complete", 
-                f"CSV data imported successfully!\n\n"
-                f"Batch Tag: {batch_tag}\n"
-                f"Batch ID: {batch_id}"
-            )
+            if cancelled:
+                QMessageBox.warning(
+                    self, "Import Cancelled",
+                    f"Import cancelled after {rows_done:,} of {total_rows:,} rows.\n\n"
+                    f"Rows already processed were kept.\n"
+                    f"Batch Tag: {batch_tag}\n"
+                    f"Batch ID: {batch_id}"
+                )
+            else:
+                # Show success message
+                QMessageBox.information(
+                    self, "Import Complete", 
+                    f"CSV data imported successfully!\n\n"
+                    f"Rows processed: {rows_done:,} ({skipped_count:,} skipped)\n"
+                    f"Batch Tag: {batch_tag}\n"
+                    f"Batch ID: {batch_id}"
+                )
             
             # Close the window
             self.close()
@@ -1042,6 +1008,77 @@ class CSVImportWindow(QMainWindow):
             progress.cancel()
             QMessageBox.critical(self, "Import Error", f"Failed to import data: {str(e)}")
             print(f"Error details: {str(e)}")
+    
+    def build_table_mappings(self):
+        """Converts the GUI mappings to the header/table mapping format csv_parser uses"""
+        fixed_mappings = {}
+        table_mappings = {}
+        
+        # Process the mappings the same way csv_parser.py does
+        for csv_col, mapping in self.mappings.items():
+            if not mapping:
+                continue  # Skip empty mappings
+                
+            if "." in mapping:
+                # Handle fully qualified mappings (table.column)
+                table, column = mapping.split(".", 1)
+                if table not in table_mappings:
+                    table_mappings[table] = []
+                table_mappings[table].append((csv_col, column))
+                fixed_mappings[csv_col] = column
+            else:
+                # Handle direct column mappings
+                fixed_mappings[csv_col] = mapping
+                
+                # Try to find which table this column belongs to
+                found_table = None
+                for table_name, columns in self.db_tables.items():
+                    if mapping in columns:
+                        found_table = table_name
+                        break
+                        
+                if found_table:
+                    if found_table not in table_mappings:
+                        table_mappings[found_table] = []
+                    table_mappings[found_table].append((csv_col, mapping))
+        
+        return fixed_mappings, table_mappings
+
+def prepare_record(record):
+    """
+    Builds the record the preprocessor expects from a raw CSV row.
+    We must have lowercase 'name' and 'website' fields as required by the code;
+    returns None when either is missing.
+    """
+    # Extract name - try multiple variations
+    name = None
+    for key in ['Name', 'name', 'company', 'Company', 'company_name', 'Company Name']:
+        if key in record and pd.notna(record[key]):
+            name = str(record[key]).strip()
+            break
+            
+    # Extract website - try multiple variations
+    website = None
+    for key in ['Website', 'website', 'url', 'URL', 'web']:
+        if key in record and pd.notna(record[key]):
+            website = str(record[key]).strip()
+            break
+    
+    # Skip if we don't have both name and website
+    if not name or not website:
+        return None
+    
+    # Create the new record with lowercase field names
+    new_record = {"name": name, "website": website}
+    
+    # Copy additional fields that might be useful - lowercase them all
+    for key, value in record.items():
+        if pd.notna(value) and value:
+            lkey = key.lower()
+            if lkey not in ['name', 'website']:  # Skip fields we've already handled
+                new_record[lkey] = value
+    
+    return new_record
 
 def run_csv_import_gui():
     """Launch the CSV import GUI"""
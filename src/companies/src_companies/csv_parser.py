@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import uuid
 import json
@@ -6,7 +7,17 @@ import sqlite3
 import platform
 from sqlite3 import Error
 from db_initializer import check_for_database
-from preprocessor import preprocessor, clean_url
+from preprocessor import preprocessor, clean_url, create_preprocess_executor, get_preprocess_workers
+
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import connect
+from crm.schema import catalog
+from csv_stream import CSV_CHUNK_SIZE, read_csv_columns, count_csv_rows, iter_csv_chunks
+from domain_index import DomainIndex
 
 # Initialize console encoding for Windows
 if platform.system() == 'Windows':
@@ -29,98 +40,35 @@ class Colors:
     END = '\033[0m' if platform.system() != 'Windows' else ''
 
 def get_db_connection():
-    """Gets a connection to the database with fallbacks"""
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    
-    # Try hardcoded path first
-    try:
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            
-        conn = sqlite3.connect(windows_path)
-        print(f"Connected to database at: {windows_path}")
-        return conn
-    except Exception as e:
-        print(f"Hardcoded path failed: {e}")
-    
-    # Try project root path
-    try:
-        # Connect to the database at project root
-        project_root = os.environ.get('PROJECT_ROOT')
-        if not project_root:
-            # Fallback to calculating the path - ensure we get to the parent of src
-            script_dir = os.path.dirname(os.path.abspath(__file__))  # src_companies dir
-            src_companies_dir = os.path.dirname(script_dir)          # companies dir
-            companies_dir = os.path.dirname(src_companies_dir)       # src dir
-            project_root = os.path.dirname(companies_dir)            # project root
-        
-        db_path = os.path.join(project_root, 'databases', 'database.db')
-        db_dir = os.path.dirname(db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            
-        conn = sqlite3.connect(db_path)
-        print(f"Connected to database at: {db_path}")
-        return conn
-    except Exception as e:
-        print(f"Project root path failed: {e}")
-        
-        # Try user's home directory
-        try:
-            user_home = os.path.expanduser("~")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            
-            # Ensure the directory exists
-            db_folder = os.path.join(user_home, 'databases')
-            if not os.path.exists(db_folder):
-                os.makedirs(db_folder, exist_ok=True)
-                
-            conn = sqlite3.connect(alt_db_path)
-            print(f"Connected to database at: {alt_db_path}")
-            return conn
-        except Exception as e2:
-            print(f"User home path failed: {e2}")
-            
-            # Try APPDATA for Windows
-            if platform.system() == 'Windows':
-                try:
-                    appdata = os.environ.get('APPDATA', '')
-                    if appdata:
-                        app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                        if not os.path.exists(app_db_dir):
-                            os.makedirs(app_db_dir, exist_ok=True)
-                        app_db_path = os.path.join(app_db_dir, 'database.db')
-                        conn = sqlite3.connect(app_db_path)
-                        print(f"Connected to database at: {app_db_path}")
-                        return conn
-                except Exception as e3:
-                    print(f"APPDATA path failed: {e3}")
-    
-    # If all attempts fail, raise an exception
-    raise Exception("Could not connect to database with any of the fallback paths")
+    """Gets a pooled connection to the database"""
+    return connect()
+
+# Tables that reference companies but are never targets of a CSV mapping
+NON_IMPORT_TABLES = ["company_batches", "companies_campaign", "contacts", "contacts_campaign"]
 
-def get_db_columns():
+def get_db_columns(include_custom=False):
     """
     Obtiene las columnas de las tablas relevantes de la base de datos.
     
+    Args:
+        include_custom (bool, optional): Also return tables created from the
+            import (any other table with a company_id column).
+    
     Returns:
         dict: Un diccionario donde las llaves son los nombres de las tablas y los valores son listas de columnas.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
     tables = [
         "companies", "company_locations", "company_phones", "company_technologies",
         "company_industries", "company_identifiers", "company_reviews", "company_projects",
         "company_focus_areas", "company_social_links", "company_verifications", "company_events",
         "company_ratings"
     ]
-    db_columns = {}
-    for table in tables:
-        cursor.execute(f"PRAGMA table_info({table});")
-        db_columns[table] = [column[1] for column in cursor.fetchall()]
-    conn.close()
+    db_columns = {table: catalog.columns(table) for table in tables}
+    if include_custom:
+        for table in catalog.tables():
+            if table not in db_columns and table not in NON_IMPORT_TABLES \
+                    and "company_id" in catalog.columns(table):
+                db_columns[table] = catalog.columns(table)
     return db_columns
 
 def load_previous_mappings(file_path=None):
@@ -210,66 +158,101 @@ def save_mappings(mappings, file_path=None):
         with open(mappings_path, 'w') as f:
             json.dump(mappings, f, indent=4)
 
-def create_new_column(table, column):
+def create_new_column(table, column, column_type="TEXT"):
     """
     Crea una nueva columna en la tabla especificada.
-    Se asume tipo TEXT para la nueva columna.
+    Se asume tipo TEXT para la nueva columna salvo que se indique otro.
     
     Args:
         table (str): Nombre de la tabla.
         column (str): Nombre de la nueva columna.
+        column_type (str, optional): Tipo SQLite de la columna.
     """
     try:
         # Connect to the database using our connection method
         conn = get_db_connection()
         cursor = conn.cursor()
-        alter_query = f"ALTER TABLE {table} ADD COLUMN {column} TEXT;"
+        alter_query = f"ALTER TABLE {table} ADD COLUMN {column} {column_type};"
         cursor.execute(alter_query)
         conn.commit()
         conn.close()
+        catalog.invalidate()
         print(f"✅ Se ha creado la nueva columna '{column}' en la tabla '{table}'.")
     except Error as e:
         print(f"🚨 Error al crear la columna nueva: {e}")
         
-def create_new_table(table_name):
+def create_new_table(table_name, columns=None):
     """
     Creates a new table with a company_id foreign key.
     
     Args:
         table_name (str): Name of the new table to create.
+        columns (dict, optional): Extra column name -> SQLite type to add.
     
     Returns:
         bool: True if successful, False otherwise.
     """
     try:
-        # Connect to the database using our connection method
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Check if table already exists
-        cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}';")
-        if cursor.fetchone():
+        if catalog.has_table(table_name):
             print(f"⚠️ Table '{table_name}' already exists.")
-            conn.close()
             return True
             
+        # Connect to the database using our connection method
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
         # Create new table with company_id as foreign key
+        extra_columns = ''.join(
+            f"            {column} {column_type},\n"
+            for column, column_type in (columns or {}).items()
+        )
         create_query = f"""
         CREATE TABLE {table_name} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             company_id TEXT NOT NULL,
-            FOREIGN KEY (company_id) REFERENCES companies(company_id)
+{extra_columns}            FOREIGN KEY (company_id) REFERENCES companies(company_id)
         );
         """
         cursor.execute(create_query)
         conn.commit()
         conn.close()
+        catalog.invalidate()
         print(f"✅ Successfully created new table '{table_name}' with company_id foreign key.")
         return True
     except Error as e:
         print(f"🚨 Error creating new table: {e}")
         return False
 
+def dedupe_column_names(cols):
+    """
+    Adds numeric suffixes to duplicate column names (second 'x' becomes 'x_2').
+    """
+    # Find all duplicate column names
+    seen = {}
+    for i, col in enumerate(cols):
+        if col in seen:
+            seen[col].append(i)
+        else:
+            seen[col] = [i]
+    
+    # Get only the duplicates
+    duplicates = {col: indices for col, indices in seen.items() if len(indices) > 1}
+    
+    renamed_columns = cols.copy()
+    if duplicates:
+        print("⚠️ Found duplicate columns after renaming. Fixing by adding suffixes:")
+        
+        # Rename duplicates
+        for col, indices in duplicates.items():
+            # Skip the first occurrence
+            for i, idx in enumerate(indices[1:], 1):
+                new_name = f"{col}_{i+1}"
+                print(f"  - Renaming duplicate column at position {idx} from '{col}' to '{new_name}'")
+                renamed_columns[idx] = new_name
+    
+    return renamed_columns
+
 def import_csv():
     """
     import_csv()
@@ -325,8 +308,8 @@ def import_csv():
                 print(f"  - {path}")
             return
 
-        # 2. Leer el archivo CSV con pandas
-        dataframe = pd.read_csv(file_path)
+        # 2. Leer solo los headers; las filas se procesan por bloques más adelante
+        csv_headers = read_csv_columns(file_path)
         print(f"{Colors.GREEN}✅ CSV file loaded successfully. Proceeding to database verification...{Colors.END}")
 
         # 3. Verificar la base de datos
@@ -354,7 +337,6 @@ def import_csv():
         previous_mappings = load_previous_mappings()
 
         # 7. Mapeo de headers del CSV a columnas de la base de datos
-        csv_headers = list(dataframe.columns)
         header_mapping = {}
 
         # Si hay mapeos previos y el CSV coincide completamente con ellos, ofrecer aplicar todos automáticamente.
@@ -562,8 +544,8 @@ def import_csv():
         # Eliminar columnas que se han decidido omitir
         columns_to_drop = [header for header, mapping in header_mapping.items() if mapping is None]
         if columns_to_drop:
-            dataframe.drop(columns=columns_to_drop, inplace=True)
             print(f"ℹ️ The following columns were skipped: {columns_to_drop}")
+        kept_headers = [header for header in csv_headers if header not in columns_to_drop]
             
         # Track which columns get mapped to which table
         table_mappings = {}
@@ -615,30 +597,18 @@ def import_csv():
         website_columns = []
         
         # Check for direct 'website' column
-        if 'website' in dataframe.columns:
+        if 'website' in kept_headers:
             website_columns.append('website')
             
         # Check if any column is mapped to 'website'
         for csv_header, db_column in header_mapping.items():
-            if db_column == 'website' and csv_header in dataframe.columns:
+            if db_column == 'website' and csv_header in kept_headers and csv_header not in website_columns:
                 website_columns.append(csv_header)
                 
-        # Process all website columns - keep track of which columns were processed
-        processed_columns = set()
         if website_columns:
             print(f"{Colors.CYAN}🌐 Standardizing website URLs to format: https://domain.com{Colors.END}")
             for col in website_columns:
-                # Skip if already processed (avoid processing the same column twice)
-                if col in processed_columns:
-                    continue
-                    
                 print(f"  {Colors.GREEN}➤ Processing '{col}' column{Colors.END}")
-                dataframe[col] = dataframe[col].apply(lambda url: clean_url(url) if pd.notna(url) and url else "")
-                processed_columns.add(col)
-        
-        # Prepare the dataframe first, before renaming columns
-        # This preserves the data before we rename columns
-        data_dict = dataframe.to_dict(orient="records")
                     
         # Rename columns, checking for duplicates
         valid_mapping = {header: mapping for header, mapping in header_mapping.items() if mapping is not None}
@@ -660,59 +630,58 @@ def import_csv():
                 if idx > 0:  # Skip the first occurrence
                     valid_mapping[header] = f"{valid_mapping[header]}_{idx + 1}"
                     print(f"  - Renamed mapping for '{header}' to '{valid_mapping[header]}'")
-                    
-        # Rename columns with the corrected mapping
-        dataframe.rename(columns=valid_mapping, inplace=True)
-        
-        # Double-check for duplicate columns
-        if len(dataframe.columns) != len(set(dataframe.columns)):
-            # Get list of column names
-            cols = list(dataframe.columns)
-            
-            # Find all duplicate column names
-            seen = {}
-            for i, col in enumerate(cols):
-                if col in seen:
-                    seen[col].append(i)
-                else:
-                    seen[col] = [i]
-            
-            # Get only the duplicates
-            duplicates = {col: indices for col, indices in seen.items() if len(indices) > 1}
-            
-            if duplicates:
-                print("⚠️ Found duplicate columns after renaming. Fixing by adding suffixes:")
-                renamed_columns = cols.copy()
-                
-                # Rename duplicates
-                for col, indices in duplicates.items():
-                    # Skip the first occurrence
-                    for i, idx in enumerate(indices[1:], 1):
-                        new_name = f"{col}_{i+1}"
-                        print(f"  - Renaming duplicate column at position {idx} from '{col}' to '{new_name}'")
-                        renamed_columns[idx] = new_name
-                
-                # Create new dataframe with renamed columns
-                dataframe.columns = renamed_columns
-        
-        # Convert to JSON
-        data_json = dataframe.to_json(orient="records")
-        print(f"{Colors.GREEN}✅ Data successfully mapped and converted to JSON format.{Colors.END}")
 
-        # 11. Llamar al preprocesador con los datos transformados
+        # 11. Llamar al preprocesador con los datos transformados, un bloque a la vez
         print(f"\n{Colors.BOLD}{Colors.BLUE}PROCESSING DATA{Colors.END}")
         print(f"{Colors.CYAN}{'=' * 50}{Colors.END}")
         
-        # Include both the renamed data and the original data with mapping information
-        # This ensures newly created columns receive their data
-        extra_context = {
-            "table_mappings": table_mappings,
-            "original_data": data_dict,
-            "header_mapping": header_mapping
-        }
+        total_rows = count_csv_rows(file_path)
+        print(f"{Colors.YELLOW}Starting data processing of {total_rows} rows in chunks of {CSV_CHUNK_SIZE}...{Colors.END}")
+        
+        # One dedupe index for the whole file, shared by every chunk
+        domain_index = DomainIndex()
+        rows_done = 0
+        # Large files are mapped by a pool of worker processes (CRM_PREPROCESS_WORKERS)
+        executor = create_preprocess_executor(total_rows)
+        if executor:
+            print(f"{Colors.YELLOW}Mapping records with {get_preprocess_workers()} worker processes{Colors.END}")
+        try:
+            for dataframe in iter_csv_chunks(file_path, CSV_CHUNK_SIZE):
+                if columns_to_drop:
+                    dataframe.drop(columns=columns_to_drop, inplace=True, errors='ignore')
+                for col in website_columns:
+                    dataframe[col] = dataframe[col].apply(lambda url: clean_url(url) if pd.notna(url) and url else "")
+            
+                # Prepare the dataframe first, before renaming columns
+                # This preserves the data before we rename columns
+                data_dict = dataframe.to_dict(orient="records")
+            
+                # Rename columns with the corrected mapping
+                dataframe.rename(columns=valid_mapping, inplace=True)
+            
+                # Double-check for duplicate columns
+                if len(dataframe.columns) != len(set(dataframe.columns)):
+                    dataframe.columns = dedupe_column_names(list(dataframe.columns))
+            
+                # Convert to JSON
+                data_json = dataframe.to_json(orient="records")
+            
+                # Include both the renamed data and the original data with mapping information
+                # This ensures newly created columns receive their data
+                extra_context = {
+                    "table_mappings": table_mappings,
+                    "original_data": data_dict,
+                    "header_mapping": header_mapping
+                }
+                preprocessor(data_json, batch_id, batch_tag, extra_context=extra_context,
+                             domain_index=domain_index, executor=executor)
+            
+                rows_done += len(data_dict)
+                print(f"{Colors.CYAN}📦 Processed {rows_done} of {total_rows} rows{Colors.END}")
+        finally:
+            if executor:
+                executor.shutdown()
         
-        print(f"{Colors.YELLOW}Starting data processing...{Colors.END}")
-        preprocessor(data_json, batch_id, batch_tag, extra_context=extra_context)
         print(f"{Colors.GREEN}🚀 Data preprocessing completed with batch ID: {batch_id}{Colors.END}")
 
     except Exception as e:
@@ -0,0 +1,27 @@
+import csv
+import pandas as pd
+
+# Rows read, mapped and written per chunk; memory stays flat regardless of file size
+CSV_CHUNK_SIZE = 5000
+
+def read_csv_columns(file_path):
+    """Returns the CSV headers without reading any data rows."""
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+def csv_has_rows(file_path):
+    """Returns True if the CSV has at least one data row."""
+    return len(pd.read_csv(file_path, nrows=1)) > 0
+
+def count_csv_rows(file_path):
+    """
+    Counts data rows by streaming the file once (quoted newlines are handled).
+    Used to size progress reporting before the import starts.
+    """
+    with open(file_path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        return sum(1 for row in reader if row)
+
+def iter_csv_chunks(file_path, chunksize=CSV_CHUNK_SIZE):
+    """Yields DataFrames of at most `chunksize` rows."""
+    yield from pd.read_csv(file_path, chunksize=chunksize)
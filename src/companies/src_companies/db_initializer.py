@@ -1,106 +1,58 @@
 import os
+import sys
 import sqlite3
 from sqlite3 import Error
 
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_db_path
+from crm.campaigns import ensure_state_counts
+from crm.indexes import apply_indexes
+from crm.domains import ensure_company_domains
+
 def check_for_database():
-    # DEBUG OUTPUT
-    print(f"[DEBUG] Check_for_database: Current working directory: {os.getcwd()}")
-    print(f"[DEBUG] __file__: {__file__}")
-    print(f"[DEBUG] abspath(__file__): {os.path.abspath(__file__)}")
-    print(f"[DEBUG] Environment vars: PROJECT_ROOT={os.environ.get('PROJECT_ROOT')}")
-    
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    windows_folder = os.path.dirname(windows_path)
-    print(f"🔍 Trying hardcoded Windows database path: {windows_path}")
-    
-    # Try hardcoded path first for Windows
+    """Ensures the database exists at the shared path and has every table."""
     try:
-        if not os.path.exists(windows_folder):
-            os.makedirs(windows_folder, exist_ok=True)
-            print(f"✅ Created hardcoded database directory: {windows_folder}")
-        
-        # Test connection with hardcoded path
-        conn = sqlite3.connect(windows_path)
-        cursor = conn.cursor()
-        conn.close()
-        print(f"✅ Successfully verified database at hardcoded path: {windows_path}")
-        # If we get here, we found a working database - use this folder 
-        db_folder = windows_folder
-        db_path = windows_path
-        # Save this for future use
-        os.environ['PROJECT_ROOT'] = os.path.dirname(windows_folder)
-        print(f"✅ Set PROJECT_ROOT to {os.environ['PROJECT_ROOT']}")
-        return create_tables(db_path)
+        db_path = get_db_path()
     except Exception as e:
-        print(f"⚠️ Hardcoded path failed: {e}, trying next option")
-    
-    # Get project root from environment variable if set, otherwise calculate
-    project_root = os.environ.get('PROJECT_ROOT')
-    print(f"[DEBUG] PROJECT_ROOT from env: {project_root}")
-    
-    if not project_root:
-        # Fallback to calculating the path
-        # Make sure to use the correct path - should be the parent of src
-        script_dir = os.path.dirname(os.path.abspath(__file__))  # src_companies dir
-        src_companies_dir = os.path.dirname(script_dir)          # companies dir
-        companies_dir = os.path.dirname(src_companies_dir)       # src dir
-        project_root = os.path.dirname(companies_dir)            # project root
-        print(f"[DEBUG] Calculated project_root: {project_root}")
-    
-    # EXPLICIT WINDOWS FIX
-    if os.name == 'nt' and '\\' in project_root:  # Windows path
-        project_root = project_root.replace("/", "\\")
-        print(f"[DEBUG] Windows path detected, fixed project_root: {project_root}")
-    
-    # Ensure we're using the database in the project root
-    db_folder = os.path.join(project_root, 'databases')
-    db_path = os.path.join(db_folder, 'database.db')
-    
-    print(f"🔍 Attempting to use database at: {db_path}")
-    print(f"[DEBUG] Database folder: {db_folder}")
-    print(f"[DEBUG] Folder exists: {os.path.exists(db_folder)}")
-
-    # Make sure the database folder exists
-    if not os.path.exists(db_folder):
-        try:
-            os.makedirs(db_folder, exist_ok=True)
-            print(f"✅ Created database directory: {db_folder}")
-        except Exception as e:
-            # If we can't create in the project root, use user's home directory as fallback
-            print(f"⚠️ Could not create database folder in project root: {e}")
-            print(f"[DEBUG] Exception type: {type(e)}")
-            user_home = os.path.expanduser("~")
-            print(f"[DEBUG] User home: {user_home}")
-            db_folder = os.path.join(user_home, 'databases')
-            db_path = os.path.join(db_folder, 'database.db')
-            print(f"🔍 Using alternate database path: {db_path}")
-            
-            if not os.path.exists(db_folder):
-                try:
-                    os.makedirs(db_folder, exist_ok=True)
-                    print(f"✅ Created alternate database directory: {db_folder}")
-                except Exception as e2:
-                    print(f"⚠️ Could not create alternate database folder: {e2}")
-                    
-                    # ONE FINAL ATTEMPT - TRY APPDATA FOLDER FOR WINDOWS
-                    if os.name == 'nt':  # Windows
-                        try:
-                            appdata = os.environ.get('APPDATA', '')
-                            print(f"[DEBUG] Trying APPDATA folder: {appdata}")
-                            if appdata:
-                                app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                                if not os.path.exists(app_db_dir):
-                                    os.makedirs(app_db_dir, exist_ok=True)
-                                    print(f"✅ Created APPDATA database directory: {app_db_dir}")
-                                db_folder = app_db_dir
-                                db_path = os.path.join(app_db_dir, 'database.db')
-                                print(f"🔍 Using APPDATA database path: {db_path}")
-                        except Exception as e3:
-                            print(f"⚠️ APPDATA database creation failed: {e3}")
-    
+        print(f"🚨 Could not resolve database path: {e}")
+        return False
     return create_tables(db_path)
 
+def migrate_clutch_checkpoints(conn, create_statement):
+    """
+    Rebuilds a clutch_checkpoints table created before run_key was added.
+
+    The old table was keyed by batch_id alone, which CREATE TABLE IF NOT EXISTS
+    leaves in place; upserts on (batch_id, run_key) need that key. Existing
+    checkpoints are kept with run_key ''.
+    """
+    columns = conn.execute("PRAGMA table_info(clutch_checkpoints)").fetchall()
+    key = [column[1] for column in sorted(columns, key=lambda column: column[5]) if column[5]]
+    if key == ["batch_id", "run_key"]:
+        return False
+    names = {column[1] for column in columns}
+    run_key = "COALESCE(run_key, '')" if "run_key" in names else "''"
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("ALTER TABLE clutch_checkpoints RENAME TO clutch_checkpoints_old")
+        conn.execute(create_statement)
+        conn.execute(f"""
+            INSERT INTO clutch_checkpoints (batch_id, run_key, run_id, dataset_id, last_offset, status, updated_at)
+            SELECT batch_id, {run_key}, run_id, dataset_id, last_offset, status, updated_at
+            FROM clutch_checkpoints_old
+        """)
+        conn.execute("DROP TABLE clutch_checkpoints_old")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print("✅ clutch_checkpoints migrated to the (batch_id, run_key) key")
+    return True
+
 def create_tables(db_path):
     """Create the required tables in the database"""
     print(f"[DEBUG] Creating tables in database: {db_path}")
@@ -305,6 +257,28 @@ def create_tables(db_path):
                     FOREIGN KEY (company_id) REFERENCES companies(company_id),
                     UNIQUE(company_id, event_data)
                 );
+            """,
+            "clutch_checkpoints": """
+                CREATE TABLE IF NOT EXISTS clutch_checkpoints (
+                    batch_id TEXT,
+                    run_key TEXT NOT NULL DEFAULT '',
+                    run_id TEXT,
+                    dataset_id TEXT,
+                    last_offset INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'running',
+                    updated_at TEXT,
+                    PRIMARY KEY (batch_id, run_key)
+                );
+            """,
+            "raw_payloads": """
+                CREATE TABLE IF NOT EXISTS raw_payloads (
+                    batch_id TEXT,
+                    content_hash TEXT,
+                    member_offset INTEGER,
+                    member_length INTEGER,
+                    stored_at TEXT,
+                    PRIMARY KEY (batch_id, content_hash)
+                );
             """
         }
 
@@ -321,6 +295,17 @@ def create_tables(db_path):
                 # Commented out to reduce console output
                 # print(f"✅ Table '{table_name}' created successfully.")
 
+        migrate_clutch_checkpoints(conn, tables["clutch_checkpoints"])
+
+        # Secondary indexes for the hot lookups and joins (see src/crm/indexes.py)
+        apply_indexes(conn)
+
+        # Website -> company lookup table and its sync triggers (see src/crm/domains.py)
+        ensure_company_domains(conn)
+
+        # Per-state campaign counters, maintained by triggers
+        ensure_state_counts(conn)
+
         return True
 
     except Error as e:
@@ -1,163 +1,187 @@
+import os
+import sys
 import sqlite3
 from sqlite3 import Error
 from datetime import datetime
 
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import connect
+from crm.domains import sync_company_domains
+from crm.schema import catalog
+
 def connect_db():
     """
-    Establece conexión con la base de datos 'databases/database.db'.
+    Devuelve una conexión del pool compartido a 'databases/database.db'.
     """
-    # Ensure we're connecting to the database at project root level
-    import os
-    
-    # DEBUG OUTPUT
-    print(f"[DEBUG] DB_WRITER Connect_db: Current working directory: {os.getcwd()}")
-    print(f"[DEBUG] __file__: {__file__}")
-    print(f"[DEBUG] abspath(__file__): {os.path.abspath(__file__)}")
-    print(f"[DEBUG] Environment vars: PROJECT_ROOT={os.environ.get('PROJECT_ROOT')}")
-    
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-    print(f"🔍 Trying hardcoded Windows database path: {windows_path}")
-    
-    # Try hardcoded path first
-    try:
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"✅ Created hardcoded database directory: {db_dir}")
-            
-        conn = sqlite3.connect(windows_path)
-        print(f"✅ Successfully connected to hardcoded database path")
-        # Set the project root for future use
-        os.environ['PROJECT_ROOT'] = os.path.dirname(db_dir)
-        return conn
-    except Exception as e:
-        print(f"⚠️ Hardcoded path failed: {e}, trying next option")
-    
-    # Get project root from environment variable if set, otherwise calculate
-    project_root = os.environ.get('PROJECT_ROOT')
-    print(f"[DEBUG] PROJECT_ROOT from env: {project_root}")
-    
-    if not project_root:
-        # Fallback to calculating the path
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        print(f"[DEBUG] Calculated project_root: {project_root}")
-    
-    # EXPLICIT WINDOWS FIX
-    if os.name == 'nt' and '\\' in project_root:  # Windows path
-        project_root = project_root.replace("/", "\\")
-        print(f"[DEBUG] Windows path detected, fixed project_root: {project_root}")
-    
-    # Create the database path using the project root
-    db_path = os.path.join(project_root, 'databases', 'database.db')
-    print(f"[DEBUG] Database path: {db_path}")
-    
-    try:
-        # Ensure the database directory exists
-        db_dir = os.path.dirname(db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"✅ Created database directory: {db_dir}")
-            
-        conn = sqlite3.connect(db_path)
-        print(f"✅ Successfully connected to database")
-        return conn
-    except Error as e:
-        print(f"⚠️ Error connecting to database: {e}")
-        print(f"[DEBUG] Exception type: {type(e)}")
-        
-        # Try alternate location in user's home directory
-        try:
-            user_home = os.path.expanduser("~")
-            print(f"[DEBUG] User home: {user_home}")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            
-            # Ensure the directory exists
-            db_folder = os.path.join(user_home, 'databases')
-            if not os.path.exists(db_folder):
-                os.makedirs(db_folder, exist_ok=True)
-                print(f"✅ Created user home database directory: {db_folder}")
-                
-            print(f"🔍 Trying alternate database path: {alt_db_path}")
-            conn = sqlite3.connect(alt_db_path)
-            print(f"✅ Successfully connected to alternate database path")
-            return conn
-        except Exception as e2:
-            print(f"⚠️ User home database failed: {e2}")
-            
-            # ONE FINAL ATTEMPT - TRY APPDATA FOLDER
-            try:
-                if os.name == 'nt':  # Windows
-                    appdata = os.environ.get('APPDATA', '')
-                    print(f"[DEBUG] Trying APPDATA folder: {appdata}")
-                    if appdata:
-                        app_db_dir = os.path.join(appdata, 'Elias_CRM', 'databases')
-                        if not os.path.exists(app_db_dir):
-                            os.makedirs(app_db_dir, exist_ok=True)
-                            print(f"✅ Created APPDATA database directory: {app_db_dir}")
-                        app_db_path = os.path.join(app_db_dir, 'database.db')
-                        print(f"🔍 Trying APPDATA database path: {app_db_path}")
-                        conn = sqlite3.connect(app_db_path)
-                        print(f"✅ Successfully connected to APPDATA database")
-                        return conn
-            except Exception as e3:
-                print(f"⚠️ APPDATA database failed: {e3}")
-                raise e  # Re-raise the original error
+    return connect()
+
+# Tablas relacionadas con companies y sus claves de conflicto, en orden de escritura
+RELATED_TABLES = [
+    ("company_locations", ["company_id", "street", "city", "state", "country", "postal_code", "office_type"]),
+    ("company_phones", ["company_id", "phone_number"]),
+    ("company_technologies", ["company_id", "technology_name"]),
+    ("company_industries", ["company_id", "industry_name"]),
+    ("company_identifiers", ["company_id", "sic_code", "isic_code", "naics_code"]),
+    ("company_reviews", ["review_id"]),
+    ("company_portfolio", ["company_id", "portfolio_name"]),
+    ("company_focus_areas", ["company_id", "focus_title", "focus_name"]),
+]
+
+STANDARD_TABLES = ["companies", "company_locations", "company_phones",
+                   "company_technologies", "company_industries",
+                   "company_identifiers", "company_reviews",
+                   "company_portfolio", "company_focus_areas",
+                   "company_social_links", "company_verifications",
+                   "company_events", "company_ratings"]
+
+NON_TABLE_KEYS = ["batch_tag", "batch_id", "source"]
+
+def build_upsert_sql(table, columns, unique_fields, mode="upsert"):
+    """
+    Builds the INSERT statement used for every write.
+
+    mode "upsert" only overwrites existing values with non-NULL/non-empty ones,
+    "ignore" keeps the existing row untouched and "replace" uses INSERT OR REPLACE.
+    """
+    placeholders = ', '.join(['?'] * len(columns))
+    column_list = ', '.join(columns)
+
+    if mode == "replace":
+        return f"""
+        INSERT OR REPLACE INTO {table} ({column_list})
+        VALUES ({placeholders});
+        """
 
-def insert_or_update(cursor, table, data, unique_key):
-    placeholders = ', '.join(['?'] * len(data))
-    columns = ', '.join(data.keys())
-    
     # Use CASE WHEN to only update with non-NULL/non-empty values
     # This preserves existing data when new data is NULL or empty
     update_fields = ', '.join(
         f"{k}=CASE WHEN excluded.{k} IS NOT NULL AND excluded.{k} != '' THEN excluded.{k} ELSE {k} END"
-        for k in data.keys() if k != unique_key
+        for k in columns if k not in unique_fields
     )
+    if mode == "ignore" or not update_fields:
+        action = "DO NOTHING"
+    else:
+        action = f"DO UPDATE SET {update_fields}"
 
-    sql = f"""
-    INSERT INTO {table} ({columns})
+    return f"""
+    INSERT INTO {table} ({column_list})
     VALUES ({placeholders})
-    ON CONFLICT({unique_key}) DO UPDATE SET {update_fields};
+    ON CONFLICT({', '.join(unique_fields)}) {action};
     """
+
+def insert_or_update(cursor, table, data, unique_key):
+    sql = build_upsert_sql(table, list(data.keys()), [unique_key])
     cursor.execute(sql, tuple(data.values()))
 
 def insert_related_table(cursor, table, company_id, data_list, unique_fields):
     for data in data_list:
         data['company_id'] = company_id
-        placeholders = ', '.join(['?'] * len(data))
-        columns = ', '.join(data.keys())
-        conflict_clause = ', '.join(unique_fields)
-        
-        # For phone numbers and other tables, we want to keep existing data
-        # but allow new values to be added if they're unique
-        if table == "company_phones":
-            # For phones, we just use DO NOTHING to avoid duplicating the same phone number
-            action = "DO NOTHING"
-        else:
-            # For other tables, we preserve existing non-empty values
-            update_fields = ', '.join(
-                f"{k}=CASE WHEN excluded.{k} IS NOT NULL AND excluded.{k} != '' THEN excluded.{k} ELSE {k} END"
-                for k in data.keys() if k not in unique_fields
-            )
-            action = f"DO UPDATE SET {update_fields}" if update_fields else "DO NOTHING"
-
-        sql = f"""
-        INSERT INTO {table} ({columns})
-        VALUES ({placeholders})
-        ON CONFLICT({conflict_clause}) {action};
-        """
+        # For phones, we just use DO NOTHING to avoid duplicating the same phone number
+        mode = "ignore" if table == "company_phones" else "upsert"
+        sql = build_upsert_sql(table, list(data.keys()), unique_fields, mode)
         cursor.execute(sql, tuple(data.values()))
 
+def company_rows(data):
+    """
+    Yields (table, row, unique_fields, mode) for every row a mapped company writes.
+
+    Both db_writer() and BulkCompanyWriter go through this so they keep the
+    same conflict semantics.
+    """
+    company_id = data['companies']['company_id']
+    yield "companies", data['companies'], ["company_id"], "upsert"
+
+    for table, unique_fields in RELATED_TABLES:
+        # For phones, we just use DO NOTHING to avoid duplicating the same phone number
+        mode = "ignore" if table == "company_phones" else "upsert"
+        for row in data.get(table, []):
+            yield table, {**row, "company_id": company_id}, unique_fields, mode
+
+    # Social links keep one row per company and preserve existing values
+    for row in data.get("company_social_links", []):
+        yield "company_social_links", {**row, "company_id": company_id}, ["company_id"], "upsert"
+
+    # Only insert verification records if they have actual data
+    for row in data.get("company_verifications", []):
+        if row.get("verification_status") or row.get("source"):
+            yield "company_verifications", {**row, "company_id": company_id}, ["verification_id"], "upsert"
+
+    # Only insert rating records if they have actual data
+    for row in data.get("company_ratings", []):
+        if row.get("overall_rating") is not None or row.get("review_count") is not None:
+            yield "company_ratings", {**row, "company_id": company_id}, ["rating_id"], "upsert"
+
+    for row in data.get("company_events", []):
+        yield "company_events", {**row, "company_id": company_id}, ["event_id"], "upsert"
+
+    # Handle any custom tables that were created
+    for table_name, table_data in data.items():
+        if table_name in STANDARD_TABLES or table_name in NON_TABLE_KEYS:
+            continue
+        if isinstance(table_data, list) and table_data:
+            if not catalog.has_table(table_name):
+                print(f"⚠️ Custom table {table_name} not found in database. Skipping.")
+                continue
+            for row in table_data:
+                yield table_name, {**row, "company_id": company_id}, [], "replace"
+
+    # Asociación de la empresa con el batch en company_batches
+    batch_info = {
+        "batch_tag": data["batch_tag"],
+        "batch_id": data["batch_id"],
+        "company_id": company_id
+    }
+    yield "company_batches", batch_info, ["company_id", "batch_tag", "batch_id"], "upsert"
+
+def write_custom_rows(cursor, table, sql, rows):
+    """
+    Writes rows of a custom table inside a savepoint.
+
+    A failing custom table only loses its own rows (the rest of the company is
+    still written); the rows are retried one by one so only the bad ones are
+    skipped.
+    """
+    cursor.execute("SAVEPOINT custom_table")
+    try:
+        cursor.executemany(sql, rows)
+    except Error:
+        cursor.execute("ROLLBACK TO custom_table")
+        for row in rows:
+            cursor.execute("SAVEPOINT custom_row")
+            try:
+                cursor.execute(sql, row)
+            except Error as e:
+                cursor.execute("ROLLBACK TO custom_row")
+                print(f"🚨 Error inserting into custom table {table}: {e}")
+            cursor.execute("RELEASE custom_row")
+    cursor.execute("RELEASE custom_table")
+
+def log_import(cursor, data):
+    """Inserta en import_logs si no existe un registro para este batch."""
+    cursor.execute("SELECT log_id FROM import_logs WHERE batch_id = ?", (data["batch_id"],))
+    if not cursor.fetchone():
+        import_log = {
+            "batch_tag": data["batch_tag"],
+            "batch_id": data["batch_id"],
+            "source": data.get("source", "unknown"),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
+        }
+        insert_or_update(cursor, "import_logs", import_log, "batch_id")
+
 def db_writer(data):
     """
     Inserta o actualiza la información de la empresa, registra la asociación en company_batches,
     e inserta un registro en import_logs (si es la primera vez para este batch).
     """
+    conn = None
     try:
         # Debug data structure for tables
         for table_name, table_data in data.items():
-            if table_name not in ["batch_tag", "batch_id", "source"] and table_data:
+            if table_name not in NON_TABLE_KEYS and table_data:
                 if isinstance(table_data, list) and table_data:
                     print(f"📋 Writing to {table_name} with data: {table_data}")
                 elif isinstance(table_data, dict):
@@ -166,132 +190,169 @@ def db_writer(data):
         cursor = conn.cursor()
         conn.execute('BEGIN TRANSACTION;')
 
-        # Insertar o actualizar en la tabla companies
-        insert_or_update(cursor, "companies", data['companies'], "company_id")
         company_id = data['companies']['company_id']
+        for table, row, unique_fields, mode in company_rows(data):
+            sql = build_upsert_sql(table, list(row.keys()), unique_fields, mode)
+            if mode == "replace":  # custom tables
+                write_custom_rows(cursor, table, sql, [tuple(row.values())])
+            else:
+                cursor.execute(sql, tuple(row.values()))
 
-        # Insertar datos en la tabla company_locations (usa los nuevos campos)
-        insert_related_table(cursor, "company_locations", company_id, data.get("company_locations", []), 
-                             ["company_id", "street", "city", "state", "country", "postal_code", "office_type"])
-        insert_related_table(cursor, "company_phones", company_id, data.get("company_phones", []), 
-                             ["company_id", "phone_number"])
-        insert_related_table(cursor, "company_technologies", company_id, data.get("company_technologies", []), 
-                             ["company_id", "technology_name"])
-        insert_related_table(cursor, "company_industries", company_id, data.get("company_industries", []), 
-                             ["company_id", "industry_name"])
-        insert_related_table(cursor, "company_identifiers", company_id, data.get("company_identifiers", []), 
-                             ["company_id", "sic_code", "isic_code", "naics_code"])
-        insert_related_table(cursor, "company_reviews", company_id, data.get("company_reviews", []), 
-                             ["review_id"])
-        insert_related_table(cursor, "company_portfolio", company_id, data.get("company_portfolio", []), 
-                             ["company_id", "portfolio_name"])
-        insert_related_table(cursor, "company_focus_areas", company_id, data.get("company_focus_areas", []), 
-                             ["company_id", "focus_title", "focus_name"])
-        # Handle social links in the new format - preserve existing values
-        social_links = data.get("company_social_links", [])
-        if social_links:
-            for link_data in social_links:
-                link_data['company_id'] = company_id
-                placeholders = ', '.join(['?'] * len(link_data))
-                columns = ', '.join(link_data.keys())
-                
-                # Use COALESCE to only update if new value is not NULL/empty
-                update_fields = ', '.join(
-                    f"{k}=CASE WHEN excluded.{k} IS NOT NULL AND excluded.{k} != '' THEN excluded.{k} ELSE {k} END"
-                    for k in link_data.keys() if k != "company_id"
-                )
-                
-                sql = f"""
-                INSERT INTO company_social_links ({columns})
-                VALUES ({placeholders})
-                ON CONFLICT(company_id) DO UPDATE SET {update_fields};
-                """
-                cursor.execute(sql, tuple(link_data.values()))
-        # Only insert verification records if they have actual data
-        verification_records = []
-        for verification in data.get("company_verifications", []):
-            if verification.get("verification_status") or verification.get("source"):
-                verification_records.append(verification)
-        
-        if verification_records:
-            insert_related_table(cursor, "company_verifications", company_id, verification_records, ["verification_id"])
-        
-        # Only insert rating records if they have actual data
-        rating_records = []
-        for rating in data.get("company_ratings", []):
-            if rating.get("overall_rating") is not None or rating.get("review_count") is not None:
-                rating_records.append(rating)
-        
-        if rating_records:
-            insert_related_table(cursor, "company_ratings", company_id, rating_records, ["rating_id"])
-        insert_related_table(cursor, "company_events", company_id, data.get("company_events", []), 
-                             ["event_id"])
-                             
-        # Handle any custom tables that were created
-        for table_name, table_data in data.items():
-            # Skip standard tables and non-data fields
-            if table_name in ["companies", "company_locations", "company_phones", 
-                             "company_technologies", "company_industries", 
-                             "company_identifiers", "company_reviews", 
-                             "company_portfolio", "company_focus_areas", 
-                             "company_social_links", "company_verifications", 
-                             "company_events", "company_ratings", 
-                             "batch_tag", "batch_id", "source"]:
-                continue
-                
-            # Check if this is a custom table with data
-            if isinstance(table_data, list) and table_data:
-                print(f"📊 Writing to custom table {table_name}")
-                try:
-                    # Verify table exists
-                    cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-                    if cursor.fetchone():
-                        # Use a simple conflict resolution for custom tables
-                        for record in table_data:
-                            # Ensure company_id is set
-                            record['company_id'] = company_id
-                            
-                            # Build dynamic insert query
-                            placeholders = ', '.join(['?'] * len(record))
-                            columns = ', '.join(record.keys())
-                            
-                            sql = f"""
-                            INSERT OR REPLACE INTO {table_name} ({columns})
-                            VALUES ({placeholders});
-                            """
-                            cursor.execute(sql, tuple(record.values()))
-                            print(f"✅ Inserted record into custom table {table_name}")
-                    else:
-                        print(f"⚠️ Custom table {table_name} not found in database. Skipping.")
-                except Exception as e:
-                    print(f"🚨 Error inserting into custom table {table_name}: {e}")
-
-        # Insertar la asociación de la empresa con el batch en company_batches
-        batch_info = {
-            "batch_tag": data["batch_tag"],
-            "batch_id": data["batch_id"]
-        }
-        insert_related_table(cursor, "company_batches", company_id, [batch_info], 
-                             ["company_id", "batch_tag", "batch_id"])
-
-        # Insertar en import_logs si no existe un registro para este batch
-        cursor.execute("SELECT log_id FROM import_logs WHERE batch_id = ?", (data["batch_id"],))
-        if not cursor.fetchone():
-            import_log = {
-                "batch_tag": data["batch_tag"],
-                "batch_id": data["batch_id"],
-                "source": data.get("source", "unknown"),
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            insert_or_update(cursor, "import_logs", import_log, "batch_id")
+        log_import(cursor, data)
+
+        # Make the company's website resolvable (crm.domains lookups only read)
+        sync_company_domains(conn)
 
         conn.commit()
         print(f"✅ Data successfully written for company_id: {company_id}")
     except Error as e:
-        conn.rollback()
+        if conn:
+            conn.rollback()
         print(f"🚨 Transaction failed: {e}")
     finally:
-        conn.close()
+        if conn:
+            conn.close()
+
+class BulkCompanyWriter:
+    """
+    Writes many mapped companies per transaction.
+
+    Rows are grouped by target table and column set and written with
+    executemany, committing every `batch_size` companies. If a batch fails it
+    is rolled back and retried company by company, so one bad record only
+    loses itself; rows of custom tables that fail are skipped without losing
+    the company. Companies that could not be written are removed from
+    domain_index, so later records of the same domain don't link to them.
+
+    Usage:
+        with BulkCompanyWriter(batch_size=500) as writer:
+            writer.write_all(mapped_companies)
+    """
+
+    def __init__(self, batch_size=500, domain_index=None):
+        self.batch_size = batch_size
+        self.domain_index = domain_index
+        self.conn = None
+        self.buffer = []
+        self.logged_batches = set()
+        self.written = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = connect_db()
+        return self.conn
+
+    def add(self, data):
+        """Buffers one mapped company, flushing when the batch is full."""
+        self.buffer.append(data)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, companies):
+        """Writes an iterable of mapped companies and flushes the remainder."""
+        for data in companies:
+            self.add(data)
+        self.flush()
+        return self.written
+
+    def _write_batch(self, batch):
+        conn = self._connection()
+        cursor = conn.cursor()
+
+        # Group rows by statement so each one is prepared once
+        groups = {}
+        for data in batch:
+            for table, row, unique_fields, mode in company_rows(data):
+                key = (table, tuple(row.keys()), tuple(unique_fields), mode)
+                groups.setdefault(key, []).append(tuple(row.values()))
+
+        conn.execute('BEGIN TRANSACTION;')
+        for (table, columns, unique_fields, mode), rows in groups.items():
+            sql = build_upsert_sql(table, columns, unique_fields, mode)
+            if mode == "replace":  # custom tables
+                write_custom_rows(cursor, table, sql, rows)
+            else:
+                cursor.executemany(sql, rows)
+
+        new_batches = {}
+        for data in batch:
+            if data["batch_id"] not in self.logged_batches:
+                new_batches.setdefault(data["batch_id"], data)
+        for data in new_batches.values():
+            log_import(cursor, data)
+
+        conn.commit()
+        self.logged_batches.update(new_batches)
+
+    def _rollback(self):
+        if self.conn is not None and self.conn.in_transaction:
+            self.conn.rollback()
+
+    def flush(self):
+        """Writes the buffered companies in one transaction."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            self._write_batch(batch)
+            self.written += len(batch)
+            print(f"✅ Bulk wrote {len(batch)} companies ({self.written} total)")
+        except Exception as e:
+            self._rollback()
+            print(f"⚠️ Batch of {len(batch)} companies failed ({e}), retrying one by one")
+            failed_ids = set()
+            for data in batch:
+                try:
+                    self._write_batch([data])
+                    self.written += 1
+                except Exception as e2:
+                    self._rollback()
+                    self.failed += 1
+                    failed_ids.add(data["companies"]["company_id"])
+                    name = data.get("companies", {}).get("name", "")
+                    print(f"🚨 Transaction failed for {name}: {e2}")
+            self._forget_unwritten(failed_ids)
+
+    def _forget_unwritten(self, company_ids):
+        """Drops failed companies that are not in the database from domain_index."""
+        if self.domain_index is None or not company_ids:
+            return
+        # A failed update of an existing company keeps its domain
+        placeholders = ", ".join("?" * len(company_ids))
+        existing = {row[0] for row in self.conn.execute(
+            f"SELECT company_id FROM companies WHERE company_id IN ({placeholders})", tuple(company_ids)
+        )}
+        for company_id in company_ids - existing:
+            self.domain_index.remove_company(company_id)
+
+    def sync_domains(self):
+        """Adds the written companies to the website -> company lookup (crm.domains)."""
+        if self.conn is None:
+            return
+        try:
+            sync_company_domains(self.conn)
+            self.conn.commit()
+        except Exception as e:
+            self._rollback()
+            print(f"⚠️ Could not update the company domain lookup: {e}")
+
+    def close(self):
+        """Flushes anything pending and returns the connection to the pool."""
+        try:
+            self.flush()
+            self.sync_domains()
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
 
 if __name__ == "__main__":
     sample_data = {
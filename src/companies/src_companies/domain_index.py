@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_connection
+
+class DomainIndex:
+    """
+    In-memory domain -> company_id map used to deduplicate one import run.
+
+    All known domains are loaded with a single query the first time the index
+    is used; companies queued during the run are added with add() so later
+    records match them before they reach the database.
+
+    The index is thread-safe, so concurrent imports into the same batch can
+    share one instance.
+    """
+
+    def __init__(self):
+        self.domains = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self.domains is None:
+            with self._lock:
+                if self.domains is None:
+                    self.domains = self._fetch()
+
+    def load(self):
+        """Loads every company domain from the database."""
+        domains = self._fetch()
+        with self._lock:
+            self.domains = domains
+        return self
+
+    def _fetch(self):
+        domains = {}
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT domain, company_id FROM companies
+                WHERE domain IS NOT NULL AND domain != ''
+                ORDER BY rowid
+            """)
+            for domain, company_id in cursor:
+                # Keep the first match, like SELECT ... WHERE domain = ? did
+                domains.setdefault(domain, company_id)
+        return domains
+
+    def get(self, domain):
+        """Returns the company_id registered for domain, or None."""
+        if not domain:
+            return None
+        self._ensure_loaded()
+        return self.domains.get(domain)
+
+    def add(self, domain, company_id):
+        """
+        Registers a company that is about to be written.
+
+        Returns the company_id that owns domain: company_id itself, or the id
+        of a company registered earlier (possibly by another thread).
+        """
+        if not domain:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            return self.domains.setdefault(domain, company_id)
+
+    def remove_company(self, company_id):
+        """Forgets the domains registered for a company that could not be written."""
+        if self.domains is None:
+            return
+        with self._lock:
+            for domain in [d for d, cid in self.domains.items() if cid == company_id]:
+                del self.domains[domain]
+
+    def __contains__(self, domain):
+        return self.get(domain) is not None
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self.domains)
@@ -0,0 +1,178 @@
+"""
+Local store of the raw items returned by the Clutch actor.
+
+Every dataset page is appended to a gzip segment per batch_id
+(databases/payloads/<batch_id>.jsonl.gz), one gzip member per page. The
+raw_payloads table indexes each item by its content hash together with the
+offset and length of the member holding it, so a repeated page (e.g. after a
+resumed run) is not stored twice and a member can be read without
+decompressing the whole segment.
+
+remap_batch() replays a stored batch through the current clutch_mapper /
+preprocessor and the bulk writer, so changes to the mapping can be applied to
+old batches without paying for another Apify run.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from preprocessor import preprocessor, create_preprocess_executor
+from domain_index import DomainIndex
+
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_db_path, get_connection
+
+# Items handed to the preprocessor per call when replaying a batch
+REMAP_CHUNK_SIZE = 1000
+
+# Concurrent runs of one batch append to the same segment
+_append_lock = threading.Lock()
+
+
+def get_payload_dir():
+    """Folder holding the payload segments, next to the database."""
+    return os.path.join(os.path.dirname(get_db_path()), "payloads")
+
+
+def get_segment_path(batch_id):
+    return os.path.join(get_payload_dir(), f"{batch_id}.jsonl.gz")
+
+
+def content_hash(item):
+    """sha256 of the item's canonical JSON."""
+    canonical = json.dumps(item, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def store_payloads(batch_id, items):
+    """
+    Appends the items not yet stored for batch_id to its segment.
+
+    Returns the number of new items written.
+    """
+    hashed = {}
+    for item in items:
+        hashed.setdefault(content_hash(item), item)
+    if not hashed:
+        return 0
+
+    with _append_lock, get_connection() as conn:
+        cursor = conn.cursor()
+        placeholders = ",".join("?" * len(hashed))
+        cursor.execute(
+            f"SELECT content_hash FROM raw_payloads WHERE batch_id = ? AND content_hash IN ({placeholders})",
+            (batch_id, *hashed)
+        )
+        for (known_hash,) in cursor.fetchall():
+            hashed.pop(known_hash, None)
+        if not hashed:
+            return 0
+
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in hashed.values())
+        member = gzip.compress(lines.encode("utf-8"))
+
+        os.makedirs(get_payload_dir(), exist_ok=True)
+        with open(get_segment_path(batch_id), "ab") as segment:
+            segment.seek(0, os.SEEK_END)
+            member_offset = segment.tell()
+            segment.write(member)
+
+        stored_at = datetime.now().isoformat()
+        cursor.executemany(
+            "INSERT OR IGNORE INTO raw_payloads (batch_id, content_hash, member_offset, member_length, stored_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(batch_id, item_hash, member_offset, len(member), stored_at) for item_hash in hashed]
+        )
+    return len(hashed)
+
+
+def iter_payloads(batch_id):
+    """Yields the stored items of batch_id in the order they were fetched."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT member_offset, member_length FROM raw_payloads
+            WHERE batch_id = ?
+            ORDER BY member_offset
+        """, (batch_id,))
+        members = cursor.fetchall()
+
+    if not members:
+        return
+    with open(get_segment_path(batch_id), "rb") as segment:
+        for member_offset, member_length in members:
+            segment.seek(member_offset)
+            lines = gzip.decompress(segment.read(member_length)).decode("utf-8")
+            for line in lines.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+def list_stored_batches():
+    """Returns (batch_id, batch_tag, item_count) for every batch with stored payloads."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT p.batch_id, l.batch_tag, COUNT(*)
+            FROM raw_payloads p
+            LEFT JOIN import_logs l ON l.batch_id = p.batch_id
+            GROUP BY p.batch_id
+            ORDER BY MIN(p.stored_at)
+        """)
+        return cursor.fetchall()
+
+
+def get_batch_tag(batch_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT batch_tag FROM import_logs WHERE batch_id = ?", (batch_id,))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def remap_batch(batch_id, batch_tag=None, chunk_size=REMAP_CHUNK_SIZE):
+    """
+    Re-imports a stored batch through the current mapper and the bulk writer.
+
+    Only reads local files; returns the number of items replayed.
+    """
+    if batch_tag is None:
+        batch_tag = get_batch_tag(batch_id) or "remap"
+
+    with get_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM raw_payloads WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+    if not total:
+        print(f"⚠️ No stored payloads for batch_id {batch_id}")
+        return 0
+
+    print(f"🔁 Remapping {total} stored items of batch {batch_id} ({batch_tag})")
+    domain_index = DomainIndex()
+    executor = create_preprocess_executor(total)
+    replayed = 0
+    chunk = []
+    try:
+        for item in iter_payloads(batch_id):
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                preprocessor(chunk, batch_id, batch_tag, domain_index=domain_index, executor=executor)
+                replayed += len(chunk)
+                chunk = []
+                print(f"📦 Remapped {replayed} of {total} items")
+        if chunk:
+            preprocessor(chunk, batch_id, batch_tag, domain_index=domain_index, executor=executor)
+            replayed += len(chunk)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    print(f"✅ Remapped {replayed} items of batch {batch_id}")
+    return replayed
@@ -3,10 +3,22 @@ import uuid
 import sqlite3
 import json
 import os
+import sys
 import platform
 from datetime import datetime
 from urllib.parse import urlparse
-from db_writer import db_writer
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from db_writer import BulkCompanyWriter
+from domain_index import DomainIndex
+
+# Make the shared crm package (src/crm) importable
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_connection
+from crm.schema import catalog
 
 def clean_url(url):
     """
@@ -97,71 +109,11 @@ def extract_domain(url):
 
 def company_exists(domain):
     try:
-        # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-        windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-        print(f"🔍 Trying hardcoded Windows database path: {windows_path}")
-        
-        # Try hardcoded path first
-        try:
-            conn = sqlite3.connect(windows_path)
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (domain,))
             result = cursor.fetchone()
-            conn.close()
             return result[0] if result else None
-        except Exception as e:
-            print(f"⚠️ Hardcoded path failed: {e}, trying next option")
-        
-        # Connect to the database at project root
-        import os
-        project_root = os.environ.get('PROJECT_ROOT')
-        if not project_root:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(script_dir))))
-        db_path = os.path.join(project_root, 'databases', 'database.db')
-        print(f"🔍 Trying project root database path: {db_path}")
-        
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (domain,))
-            result = cursor.fetchone()
-            conn.close()
-            return result[0] if result else None
-        except Exception as e:
-            print(f"⚠️ Project root path failed: {e}, trying home directory")
-            
-            # Try user's home directory
-            user_home = os.path.expanduser("~")
-            alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-            print(f"🔍 Trying user home database path: {alt_db_path}")
-            
-            try:
-                conn = sqlite3.connect(alt_db_path)
-                cursor = conn.cursor()
-                cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (domain,))
-                result = cursor.fetchone()
-                conn.close()
-                return result[0] if result else None
-            except Exception as e2:
-                print(f"⚠️ User home path failed: {e2}")
-                
-                # Final attempt - try APPDATA on Windows
-                if os.name == 'nt':  # Windows
-                    try:
-                        appdata = os.environ.get('APPDATA', '')
-                        if appdata:
-                            app_db_path = os.path.join(appdata, 'Elias_CRM', 'databases', 'database.db')
-                            print(f"🔍 Trying APPDATA database path: {app_db_path}")
-                            conn = sqlite3.connect(app_db_path)
-                            cursor = conn.cursor()
-                            cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (domain,))
-                            result = cursor.fetchone()
-                            conn.close()
-                            return result[0] if result else None
-                    except Exception as e3:
-                        print(f"⚠️ APPDATA path failed: {e3}")
-        
     except Exception as e:
         print(f"Error checking company existence: {e}")
     
@@ -289,7 +241,290 @@ try:
 except ImportError:
     clutch_map_all = None
 
-def preprocessor(data, batch_id, batch_tag, extra_context=None):
+# Tablas estándar; cualquier otra tabla en table_mappings es una tabla creada por el usuario
+STANDARD_TABLES = ["companies", "company_locations", "company_phones",
+                   "company_technologies", "company_industries",
+                   "company_identifiers", "company_reviews",
+                   "company_portfolio", "company_focus_areas",
+                   "company_social_links", "company_verifications",
+                   "company_events", "company_ratings"]
+
+# Parallel mapping only pays off for big inputs; smaller ones are mapped in-process
+PARALLEL_MIN_RECORDS = 2000
+
+# Records sent to a worker process per task
+PARALLEL_SHARD_SIZE = 250
+
+def is_clutch_record(record):
+    return isinstance(record, dict) and "summary" in record and clutch_map_all is not None
+
+def get_preprocess_workers():
+    """
+    Number of worker processes used to map records.
+
+    Set CRM_PREPROCESS_WORKERS=1 to force the serial path.
+    """
+    value = os.environ.get("CRM_PREPROCESS_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"⚠️ Ignoring invalid CRM_PREPROCESS_WORKERS value: {value}")
+    return os.cpu_count() or 1
+
+def create_preprocess_executor(total_records):
+    """
+    Returns a ProcessPoolExecutor for preprocessor(executor=...) or None when
+    the import is too small (or the machine too small) to be worth it.
+    The caller owns the executor and must shut it down.
+    """
+    workers = get_preprocess_workers()
+    if workers <= 1 or total_records < PARALLEL_MIN_RECORDS:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+def map_custom_columns(mapped, original_data, table_mappings, table_columns):
+    """Copies the user-mapped CSV columns of original_data into mapped."""
+    company_name = mapped["companies"]["name"]
+    print(f"📊 Processing new columns for {company_name}...")
+
+    # Process custom columns for each table
+    for table, mappings in table_mappings.items():
+        if not mappings:
+            continue  # Skip tables with no mappings
+
+        # Check if this table is one of the default ones
+        if table not in mapped and table != "companies":
+            mapped[table] = []
+
+        # For standard tables that expect a list of dictionaries
+        if table not in ["companies", "batch_tag", "batch_id", "source"]:
+            # Initialize if needed
+            if not mapped[table]:
+                mapped[table] = []
+
+            # Special handling for dynamically created tables - create a new row for each field
+            if table not in STANDARD_TABLES:
+                company_id = mapped["companies"]["company_id"]
+                print(f"  ➕ Processing custom table {table} with {len(mappings)} fields")
+
+                # Find out how many fields this table has (excluding id and company_id)
+                columns = table_columns.get(table) or ["id", "company_id", "value"]
+                data_fields = [col for col in columns if col not in ["id", "company_id"]]
+
+                # If there's only one data field, put all values in separate rows
+                if len(data_fields) == 1:
+                    field_name = data_fields[0]
+                    # Create a new row for each CSV column mapped to this table
+                    for csv_header, db_column in mappings:
+                        if csv_header in original_data and original_data[csv_header]:
+                            value = original_data[csv_header]
+                            # Create a new row for this value
+                            new_row = {
+                                "company_id": company_id,
+                                field_name: value
+                            }
+                            mapped[table].append(new_row)
+                            print(f"  ➕ Added new row in {table} with {field_name}='{value}' from CSV column '{csv_header}'")
+                else:
+                    # If table has multiple fields, use first record approach
+                    if not mapped[table]:
+                        mapped[table].append({"company_id": company_id})
+
+                    # Populate the fields in the first record
+                    for csv_header, db_column in mappings:
+                        if csv_header in original_data:
+                            value = original_data[csv_header]
+                            mapped[table][0][db_column] = value
+                            print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'")
+            else:
+                # Standard tables (not custom) - use original behavior
+                if not mapped[table]:
+                    mapped[table] = [{}]
+
+                # For standard tables, ensure we add any required fields
+                if "company_id" not in mapped[table][0]:
+                    mapped[table][0]["company_id"] = mapped["companies"]["company_id"]
+
+                # Populate the new columns with their values
+                for csv_header, db_column in mappings:
+                    if csv_header in original_data:
+                        value = original_data[csv_header]
+                        mapped[table][0][db_column] = value
+                        print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'.")
+
+        # For the companies table (which is a dict, not a list)
+        elif table == "companies" and mappings:
+            for csv_header, db_column in mappings:
+                if csv_header in original_data:
+                    value = original_data[csv_header]
+                    mapped["companies"][db_column] = value
+                    print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'.")
+
+def map_record(record, batch_id, batch_tag, original_data=None, table_mappings=None, table_columns=None):
+    """
+    Convierte un registro (Clutch o CSV) al formato por tablas que espera db_writer.
+
+    No toca la base de datos, así que puede ejecutarse en un proceso worker.
+    Devuelve None si faltan los campos obligatorios (name, website).
+    """
+    # Si el registro proviene de Clutch se ignora la sección de dirección
+    if is_clutch_record(record):
+        mapped = clutch_map_all(record, batch_id, batch_tag)
+        mapped["company_locations"] = []  # Ignoramos direcciones de Clutch
+        company_name = mapped.get("companies", {}).get("name", "").strip()  # conserva mayúsculas
+        website = mapped.get("companies", {}).get("website", "")
+    else:
+        company_name = record.get("name", "").strip()  # conserva mayúsculas
+        website = record.get("website", "")
+        website = clean_url(website) if website else ""
+        domain = extract_domain(website) if website else ""
+        mapped = {
+            "companies": {
+                "company_id": str(uuid.uuid4()),
+                "name": company_name,
+                "website": website,
+                "domain": domain,
+                "headcount": standardize_number(record.get("headcount", None)),
+                "headcount_range": None,
+                "revenue": standardize_number(record.get("revenue", None)),
+                "founded": standardize_date(record.get("founding_date", None)),
+                "company_type": record.get("company_type", ""),
+                "description": record.get("company description", "")
+            },
+            "company_locations": [],  
+            "company_phones": [],
+            "company_technologies": [{"technology_name": tech} for tech in parse_list_field(record.get("technology_name", []))],
+            "company_industries": [{"industry_name": ind} for ind in parse_list_field(record.get("industry_name", []))],
+            "company_identifiers": [],
+            "company_reviews": [],
+            "company_portfolio": [],
+            "company_focus_areas": [],
+            "company_social_links": extract_social_media_links(record),
+            "company_verifications": [],
+            "company_ratings": []
+        }
+        
+        identifiers = {}
+        if record.get("sic_code"):
+            identifiers["sic_code"] = record.get("sic_code")
+        if record.get("isic_code"):
+            identifiers["isic_code"] = record.get("isic_code")
+        if record.get("naics_code"):
+            identifiers["naics_code"] = record.get("naics_code")
+        if identifiers:
+            mapped["company_identifiers"] = [identifiers]
+        
+        if record.get("portfolio"):
+            portfolio_items = []
+            for item in record["portfolio"]:
+                portfolio_items.append({
+                    "portfolio_id": item.get("id") or str(uuid.uuid4()),
+                    "portfolio_name": item.get("title", ""),
+                    "portfolio_category": ", ".join(item.get("services", [])),
+                    "portfolio_size": item.get("projectSize", ""),
+                    "portfolio_description": item.get("description", "")
+                })
+            mapped["company_portfolio"] = portfolio_items
+
+        # Process phone numbers - split multiple phone numbers
+        if record.get("phone_number"):
+            phone_number = record.get("phone_number")
+            # Check if the phone number contains multiple numbers
+            if ',' in phone_number:
+                # Split by comma and strip whitespace
+                phone_numbers = [p.strip() for p in phone_number.split(',') if p.strip()]
+                for phone in phone_numbers:
+                    mapped["company_phones"].append({"phone_number": phone})
+            else:
+                mapped["company_phones"].append({"phone_number": phone_number.strip()})
+        
+        # Process verifications - only add if there's actual data
+        if record.get("verification_status") or record.get("verification_source"):
+            verification = {
+                "verification_id": str(uuid.uuid4()),
+                "verification_status": record.get("verification_status", ""),
+                "source": record.get("verification_source", ""),
+                "last_updated": standardize_date(record.get("verification_date", None))
+            }
+            mapped["company_verifications"] = [verification]
+        
+        # Process ratings - only add if there's actual data
+        overall_rating = standardize_number(record.get("overall_rating", None))
+        review_count = standardize_number(record.get("review_count", None))
+        if overall_rating is not None or review_count is not None:
+            rating = {
+                "rating_id": str(uuid.uuid4()),
+                "overall_rating": overall_rating,
+                "review_count": review_count
+            }
+            mapped["company_ratings"] = [rating]
+        
+        # Procesar la dirección usando la función parse_addresses:
+        mapped["company_locations"] = parse_addresses(record.get("locations", ""), record.get("hq_location", ""))
+        
+        # Procesar eventos a partir de columnas con nombres que empiecen con "company_events_raw_"
+        company_events = []
+        for key, value in record.items():
+            if key.startswith("company_events_raw_") and value:
+                company_events.append({
+                    "event_id": str(uuid.uuid4()),
+                    "event_data": value
+                })
+        mapped["company_events"] = company_events
+
+    if not company_name or not website:
+        print(f"⚠️ Skipped company due to missing mandatory fields: {company_name}")
+        return None
+
+    # Process new columns from the CSV if they exist
+    if original_data is not None and table_mappings and not is_clutch_record(record):
+        map_custom_columns(mapped, original_data, table_mappings, table_columns or {})
+
+    # Agregar la información del batch a nivel superior (no en companies)
+    mapped["batch_tag"] = batch_tag
+    mapped["batch_id"] = batch_id
+
+    # Asignar el source según el origen de los datos
+    mapped["source"] = "clutch" if is_clutch_record(record) else "csv import"
+    return mapped
+
+def _map_shard(shard, batch_id, batch_tag, table_mappings, table_columns):
+    """Worker entry point: maps a list of (record, original_data) pairs."""
+    return [
+        map_record(record, batch_id, batch_tag, original_data, table_mappings, table_columns)
+        for record, original_data in shard
+    ]
+
+def map_records(data, batch_id, batch_tag, originals=None, table_mappings=None, table_columns=None, executor=None):
+    """
+    Yields map_record() for every record, in input order.
+
+    With an executor the records are sharded across its worker processes;
+    the results are identical to the serial path.
+    """
+    if originals is None:
+        originals = [None] * len(data)
+    pairs = list(zip(data, originals))
+
+    if executor is None or len(pairs) < PARALLEL_MIN_RECORDS:
+        for record, original_data in pairs:
+            yield map_record(record, batch_id, batch_tag, original_data, table_mappings, table_columns)
+        return
+
+    shards = [pairs[i:i + PARALLEL_SHARD_SIZE] for i in range(0, len(pairs), PARALLEL_SHARD_SIZE)]
+    worker = partial(_map_shard, batch_id=batch_id, batch_tag=batch_tag,
+                     table_mappings=table_mappings, table_columns=table_columns)
+    # executor.map keeps shard order, so dedupe below sees records in file order
+    for results in executor.map(worker, shards):
+        yield from results
+
+def preprocessor(data, batch_id, batch_tag, extra_context=None, batch_size=500, domain_index=None, executor=None):
+    # Companies are written in bulk, committing every `batch_size` companies
+    # Known domains are loaded once per run; pass domain_index to share it across calls
+    if domain_index is None:
+        domain_index = DomainIndex()
+    writer = BulkCompanyWriter(batch_size=batch_size, domain_index=domain_index)
     try:
         if isinstance(data, str):
             data = json.loads(data)
@@ -300,291 +535,44 @@ def preprocessor(data, batch_id, batch_tag, extra_context=None):
             return
             
         # Process original data with mapping information if provided
-        has_new_columns = False
+        originals = table_mappings = None
+        table_columns = {}
         if extra_context and 'original_data' in extra_context and 'header_mapping' in extra_context:
-            has_new_columns = True
-
-        for record in data:
-            # Si el registro proviene de Clutch se ignora la sección de dirección
-            if isinstance(record, dict) and "summary" in record and clutch_map_all:
-                mapped = clutch_map_all(record, batch_id, batch_tag)
-                mapped["company_locations"] = []  # Ignoramos direcciones de Clutch
-                company_name = mapped.get("companies", {}).get("name", "").strip()  # conserva mayúsculas
-                website = mapped.get("companies", {}).get("website", "")
-            else:
-                company_name = record.get("name", "").strip()  # conserva mayúsculas
-                website = record.get("website", "")
-                website = clean_url(website) if website else ""
-                domain = extract_domain(website) if website else ""
-                mapped = {
-                    "companies": {
-                        "company_id": str(uuid.uuid4()),
-                        "name": company_name,
-                        "website": website,
-                        "domain": domain,
-                        "headcount": standardize_number(record.get("headcount", None)),
-                        "headcount_range": None,
-                        "revenue": standardize_number(record.get("revenue", None)),
-                        "founded": standardize_date(record.get("founding_date", None)),
-                        "company_type": record.get("company_type", ""),
-                        "description": record.get("company description", "")
-                    },
-                    "company_locations": [],  
-                    "company_phones": [],
-                    "company_technologies": [{"technology_name": tech} for tech in parse_list_field(record.get("technology_name", []))],
-                    "company_industries": [{"industry_name": ind} for ind in parse_list_field(record.get("industry_name", []))],
-                    "company_identifiers": [],
-                    "company_reviews": [],
-                    "company_portfolio": [],
-                    "company_focus_areas": [],
-                    "company_social_links": extract_social_media_links(record),
-                    "company_verifications": [],
-                    "company_ratings": []
-                }
-                
-                identifiers = {}
-                if record.get("sic_code"):
-                    identifiers["sic_code"] = record.get("sic_code")
-                if record.get("isic_code"):
-                    identifiers["isic_code"] = record.get("isic_code")
-                if record.get("naics_code"):
-                    identifiers["naics_code"] = record.get("naics_code")
-                if identifiers:
-                    mapped["company_identifiers"] = [identifiers]
-                
-                if record.get("portfolio"):
-                    portfolio_items = []
-                    for item in record["portfolio"]:
-                        portfolio_items.append({
-                            "portfolio_id": item.get("id") or str(uuid.uuid4()),
-                            "portfolio_name": item.get("title", ""),
-                            "portfolio_category": ", ".join(item.get("services", [])),
-                            "portfolio_size": item.get("projectSize", ""),
-                            "portfolio_description": item.get("description", "")
-                        })
-                    mapped["company_portfolio"] = portfolio_items
-
-                # Process phone numbers - split multiple phone numbers
-                if record.get("phone_number"):
-                    phone_number = record.get("phone_number")
-                    # Check if the phone number contains multiple numbers
-                    if ',' in phone_number:
-                        # Split by comma and strip whitespace
-                        phone_numbers = [p.strip() for p in phone_number.split(',') if p.strip()]
-                        for phone in phone_numbers:
-                            mapped["company_phones"].append({"phone_number": phone})
-                    else:
-                        mapped["company_phones"].append({"phone_number": phone_number.strip()})
-                
-                # Process verifications - only add if there's actual data
-                if record.get("verification_status") or record.get("verification_source"):
-                    verification = {
-                        "verification_id": str(uuid.uuid4()),
-                        "verification_status": record.get("verification_status", ""),
-                        "source": record.get("verification_source", ""),
-                        "last_updated": standardize_date(record.get("verification_date", None))
-                    }
-                    mapped["company_verifications"] = [verification]
-                
-                # Process ratings - only add if there's actual data
-                overall_rating = standardize_number(record.get("overall_rating", None))
-                review_count = standardize_number(record.get("review_count", None))
-                if overall_rating is not None or review_count is not None:
-                    rating = {
-                        "rating_id": str(uuid.uuid4()),
-                        "overall_rating": overall_rating,
-                        "review_count": review_count
-                    }
-                    mapped["company_ratings"] = [rating]
-                
-                # Procesar la dirección usando la función parse_addresses:
-                mapped["company_locations"] = parse_addresses(record.get("locations", ""), record.get("hq_location", ""))
-                
-                # Procesar eventos a partir de columnas con nombres que empiecen con "company_events_raw_"
-                company_events = []
-                for key, value in record.items():
-                    if key.startswith("company_events_raw_") and value:
-                        company_events.append({
-                            "event_id": str(uuid.uuid4()),
-                            "event_data": value
-                        })
-                mapped["company_events"] = company_events
-
-            if not company_name or not website:
-                print(f"⚠️ Skipped company due to missing mandatory fields: {company_name}")
+            # original_data is aligned with data by position
+            originals = extra_context["original_data"]
+            table_mappings = extra_context["table_mappings"]
+            # Workers can't use the schema catalog, so custom table columns are resolved here once
+            for table, mappings in table_mappings.items():
+                if mappings and table not in STANDARD_TABLES:
+                    try:
+                        table_columns[table] = catalog.columns(table)
+                    except Exception as e:
+                        print(f"⚠️ Schema lookup failed for {table}: {e}")
+                        print("⚠️ Using default columns: ['id', 'company_id', 'value']")
+
+        # Mapping may run in worker processes; dedupe and writes stay in this process
+        for mapped in map_records(data, batch_id, batch_tag, originals, table_mappings, table_columns, executor):
+            if mapped is None:
                 continue
 
-            domain = extract_domain(website)
-            existing_company_id = company_exists(domain)
-            if existing_company_id:
-                mapped["companies"]["company_id"] = existing_company_id
+            company_name = mapped["companies"]["name"]
+            domain = extract_domain(mapped["companies"]["website"])
+            # add() checks and registers the domain in one step, so concurrent runs can't both insert it
+            new_company_id = mapped["companies"]["company_id"]
+            company_id = domain_index.add(domain, new_company_id) or new_company_id
+            if company_id != new_company_id:
+                mapped["companies"]["company_id"] = company_id
                 print(f"🔄 Existing company found. Updating fields for: {company_name}")
             else:
                 print(f"✨ New company detected. Preparing data for insertion: {company_name}")
 
-            # Process new columns from the CSV if they exist
-            if has_new_columns and not (isinstance(record, dict) and "summary" in record):
-                original_idx = data.index(record)
-                original_data = extra_context["original_data"][original_idx]
-                table_mappings = extra_context["table_mappings"]
-                header_mapping = extra_context["header_mapping"]
-                
-                print(f"📊 Processing new columns for {company_name}...")
-                
-                # Process custom columns for each table
-                for table, mappings in table_mappings.items():
-                    if not mappings:
-                        continue  # Skip tables with no mappings
-                        
-                    # Check if this table is one of the default ones
-                    if table not in mapped and table != "companies":
-                        mapped[table] = []
-                    
-                    # For standard tables that expect a list of dictionaries
-                    if table not in ["companies", "batch_tag", "batch_id", "source"]:
-                        # Initialize if needed
-                        if not mapped[table]:
-                            mapped[table] = []
-                            
-                        # Determine if this is a dynamically created table
-                        is_new_table = table not in ["companies", "company_locations", "company_phones", 
-                                                   "company_technologies", "company_industries", 
-                                                   "company_identifiers", "company_reviews", 
-                                                   "company_portfolio", "company_focus_areas", 
-                                                   "company_social_links", "company_verifications", 
-                                                   "company_events", "company_ratings"]
-                        
-                        # Special handling for dynamically created tables - create a new row for each field
-                        if is_new_table:
-                            company_id = mapped["companies"]["company_id"]
-                            print(f"  ➕ Processing custom table {table} with {len(mappings)} fields")
-                            
-                            # Get column names for this table (excluding id and company_id)
-                            import os
-                            
-                            # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-                            windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-                            print(f"🔍 Trying hardcoded Windows database path for schema lookup: {windows_path}")
-                            
-                            try:
-                                # Try hardcoded path first
-                                conn = sqlite3.connect(windows_path)
-                                cursor = conn.cursor()
-                                cursor.execute(f"PRAGMA table_info({table});")
-                                table_columns = [column[1] for column in cursor.fetchall()]
-                                cursor.close()
-                                conn.close()
-                                print(f"✅ Successfully retrieved schema from hardcoded path")
-                            except Exception as e:
-                                print(f"⚠️ Hardcoded path failed for schema lookup: {e}, trying alternatives")
-                                
-                                # Get project root from environment variable if set, otherwise calculate
-                                project_root = os.environ.get('PROJECT_ROOT')
-                                if not project_root:
-                                    # Fallback to calculating the path - ensure we get to the parent of src
-                                    script_dir = os.path.dirname(os.path.abspath(__file__))  # src_companies dir
-                                    src_companies_dir = os.path.dirname(script_dir)          # companies dir
-                                    companies_dir = os.path.dirname(src_companies_dir)       # src dir
-                                    project_root = os.path.dirname(companies_dir)            # project root
-                                
-                                try:
-                                    db_path = os.path.join(project_root, 'databases', 'database.db')
-                                    print(f"🔍 Trying project root path for schema lookup: {db_path}")
-                                    conn = sqlite3.connect(db_path)
-                                    cursor = conn.cursor()
-                                    cursor.execute(f"PRAGMA table_info({table});")
-                                    table_columns = [column[1] for column in cursor.fetchall()]
-                                    cursor.close()
-                                    conn.close()
-                                    print(f"✅ Successfully retrieved schema from project root path")
-                                except Exception as e2:
-                                    print(f"⚠️ Project root path failed for schema lookup: {e2}, trying home directory")
-                                    
-                                    # Try user's home directory
-                                    try:
-                                        user_home = os.path.expanduser("~")
-                                        alt_db_path = os.path.join(user_home, 'databases', 'database.db')
-                                        print(f"🔍 Trying home directory for schema lookup: {alt_db_path}")
-                                        conn = sqlite3.connect(alt_db_path)
-                                        cursor = conn.cursor()
-                                        cursor.execute(f"PRAGMA table_info({table});")
-                                        table_columns = [column[1] for column in cursor.fetchall()]
-                                        cursor.close()
-                                        conn.close()
-                                        print(f"✅ Successfully retrieved schema from home directory path")
-                                    except Exception as e3:
-                                        print(f"⚠️ Home directory path failed for schema lookup: {e3}")
-                                        # If all attempts fail, provide a default set of columns
-                                        table_columns = ["id", "company_id", "value"]
-                                        print(f"⚠️ Using default columns: {table_columns}")
-                            
-                            # Find out how many fields this table has (excluding id and company_id)
-                            data_fields = [col for col in table_columns if col not in ["id", "company_id"]]
-                            
-                            # If there's only one data field, put all values in separate rows
-                            if len(data_fields) == 1:
-                                field_name = data_fields[0]
-                                # Create a new row for each CSV column mapped to this table
-                                for csv_header, db_column in mappings:
-                                    if csv_header in original_data and original_data[csv_header]:
-                                        value = original_data[csv_header]
-                                        # Create a new row for this value
-                                        new_row = {
-                                            "company_id": company_id,
-                                            field_name: value
-                                        }
-                                        mapped[table].append(new_row)
-                                        print(f"  ➕ Added new row in {table} with {field_name}='{value}' from CSV column '{csv_header}'")
-                            else:
-                                # If table has multiple fields, use first record approach
-                                if not mapped[table]:
-                                    mapped[table].append({"company_id": company_id})
-                                
-                                # Populate the fields in the first record
-                                for csv_header, db_column in mappings:
-                                    if csv_header in original_data:
-                                        value = original_data[csv_header]
-                                        mapped[table][0][db_column] = value
-                                        print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'")
-                        else:
-                            # Standard tables (not custom) - use original behavior
-                            if not mapped[table]:
-                                mapped[table] = [{}]
-                                
-                            # For standard tables, ensure we add any required fields
-                            if "company_id" not in mapped[table][0]:
-                                mapped[table][0]["company_id"] = mapped["companies"]["company_id"]
-                                
-                            # Populate the new columns with their values
-                            for csv_header, db_column in mappings:
-                                if csv_header in original_data:
-                                    value = original_data[csv_header]
-                                    mapped[table][0][db_column] = value
-                                    print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'.")
-                    
-                    # For the companies table (which is a dict, not a list)
-                    elif table == "companies" and mappings:
-                        for csv_header, db_column in mappings:
-                            if csv_header in original_data:
-                                value = original_data[csv_header]
-                                mapped["companies"][db_column] = value
-                                print(f"  ➕ Added value '{value}' to {table}.{db_column} from CSV column '{csv_header}'.")
-
-            # Agregar la información del batch a nivel superior (no en companies)
-            mapped["batch_tag"] = batch_tag
-            mapped["batch_id"] = batch_id
-
-            # Asignar el source según el origen de los datos
-            if isinstance(record, dict) and "summary" in record and clutch_map_all:
-                mapped["source"] = "clutch"
-            else:
-                mapped["source"] = "csv import"
-
-            db_writer(mapped)
-            print(f"🚀 Data written to the database for company: {company_name}")
+            writer.add(mapped)
+            print(f"🚀 Data queued for the database for company: {company_name}")
 
     except Exception as e:
         print(f"🚨 An error occurred during preprocessing: {e}")
+    finally:
+        writer.close()
 
 if __name__ == "__main__":
     sample_csv_data = [
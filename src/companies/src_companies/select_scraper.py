@@ -1,6 +1,6 @@
 import uuid
 import re
-from clutch_scraper import run_clutch_scraper
+from clutch_sourcing import run_clutch_sourcing
 from db_initializer import check_for_database
 
 def input_data_for_clutch_scraper():
@@ -102,7 +102,7 @@ def select_scraper():
         return
 
     try:
-        run_clutch_scraper(
+        run_clutch_sourcing(
             startUrls=params['urls'],
             maxItems=params['num_companies'],
             excludePortfolio=not params['extract_portfolio'],
@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton,
                            QVBoxLayout, QWidget, QLabel, QHBoxLayout, 
                            QGroupBox, QLineEdit, QSpinBox, QCheckBox,
                            QMessageBox, QListWidget, QDialog, QFormLayout)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
 # Set up path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,9 +14,57 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 # Import the necessary scraper functions
-from clutch_scraper import run_clutch_scraper
+from clutch_sourcing import run_clutch_sourcing
 from db_initializer import check_for_database
 
+class ClutchSourcingThread(QThread):
+    """Runs the Clutch actor runs of one batch off the UI thread"""
+    run_progress = pyqtSignal(str, int, str)  # url, items imported, status
+    sourcing_finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    
+    def __init__(self, params):
+        super().__init__()
+        self.params = params
+    
+    def run(self):
+        try:
+            results = run_clutch_sourcing(
+                startUrls=self.params['urls'],
+                maxItems=self.params['num_companies'],
+                excludePortfolio=not self.params['extract_portfolio'],
+                includeReviews=self.params['extract_reviews'],
+                maxReviewsPerCompany=self.params['num_reviews'],
+                batch_tag=self.params['batch_tag'],
+                batch_id=self.params['batch_id'],
+                on_progress=self.run_progress.emit
+            )
+            self.sourcing_finished.emit(results)
+        except Exception as e:
+            self.error.emit(str(e))
+
+class SourcingProgressDialog(QDialog):
+    """Shows one line per actor run while a batch is being sourced"""
+    def __init__(self, urls, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Scraper Running")
+        self.setMinimumWidth(600)
+        
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("The scraper is running. Runs for each URL are imported as they progress."))
+        
+        self.run_list = QListWidget()
+        self.run_rows = {}
+        for url in urls:
+            self.run_rows[url] = self.run_list.count()
+            self.run_list.addItem(f"{url} - queued")
+        layout.addWidget(self.run_list)
+    
+    def update_run(self, url, items_done, status):
+        if url in self.run_rows:
+            self.run_list.item(self.run_rows[url]).setText(f"{url} - {status} ({items_done} companies)")
+
+
 class ClutchScraperDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -233,37 +281,31 @@ class ScraperSelectorWindow(QMainWindow):
                                         QMessageBox.Yes | QMessageBox.No)
             
             if confirm == QMessageBox.Yes:
-                try:
-                    # Show a progress message
-                    progress_msg = QMessageBox(self)
-                    progress_msg.setWindowTitle("Scraper Running")
-                    progress_msg.setText("The scraper is running. This may take a while.\n\nPlease check the terminal for progress updates.")
-                    progress_msg.setStandardButtons(QMessageBox.NoButton)
-                    progress_msg.show()
-                    
-                    # Update the UI
-                    QApplication.processEvents()
-                    
-                    # Run the scraper
-                    run_clutch_scraper(
-                        startUrls=params['urls'],
-                        maxItems=params['num_companies'],
-                        excludePortfolio=not params['extract_portfolio'],
-                        includeReviews=params['extract_reviews'],
-                        maxReviewsPerCompany=params['num_reviews'],
-                        batch_tag=params['batch_tag'],
-                        batch_id=params['batch_id']
-                    )
-                    
-                    # Close the progress message
-                    progress_msg.close()
-                    
-                    # Show success message
-                    QMessageBox.information(self, "Scraper Completed", 
-                                         f"Scraper completed successfully!\n\nBatch ID: {params['batch_id']}")
-                    
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Error during scraping: {str(e)}")
+                # Sourcing runs in a background thread so the window stays responsive
+                self.progress_dialog = SourcingProgressDialog(list(dict.fromkeys(params['urls'])), self)
+                self.progress_dialog.show()
+                
+                self.sourcing_thread = ClutchSourcingThread(params)
+                self.sourcing_thread.run_progress.connect(self.progress_dialog.update_run)
+                self.sourcing_thread.sourcing_finished.connect(
+                    lambda results: self.on_sourcing_finished(results, params['batch_id']))
+                self.sourcing_thread.error.connect(self.on_sourcing_error)
+                self.sourcing_thread.start()
+    
+    def on_sourcing_finished(self, results, batch_id):
+        self.progress_dialog.close()
+        failed = [url for url, items in results.items() if items is None]
+        if failed:
+            QMessageBox.warning(self, "Scraper Completed", 
+                                f"Scraper finished with {len(failed)} failed run(s):\n" + "\n".join(failed) +
+                                f"\n\nBatch ID: {batch_id}")
+        else:
+            QMessageBox.information(self, "Scraper Completed", 
+                                 f"Scraper completed successfully!\n\nBatch ID: {batch_id}")
+    
+    def on_sourcing_error(self, message):
+        self.progress_dialog.close()
+        QMessageBox.critical(self, "Error", f"Error during scraping: {message}")
 
 def run_scraper_selector():
     app = QApplication(sys.argv)
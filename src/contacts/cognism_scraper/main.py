@@ -7,12 +7,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
 from src.main_urls import run_urls_scraper
 from src.main_contacts import run_contacts_scraper
 from src.main_csv import export_contacts_to_csv  # ✅ Import the new function
+from src.utils_contacts.snapshots import reparse_snapshots
 
 def main():
     print("Welcome to the Cognism Scraper.")
     print("Press 1 to start scraping URLs from your database.")
     print("Press 2 to start scraping the contacts from your database.")
     print("Press 3 to export contacts to CSV.")
+    print("Press 4 to re-parse saved profile snapshots (no browser).")
 
     user_input = input("Enter your choice: ")
 
@@ -22,6 +24,8 @@ def main():
         run_contacts_scraper()
     elif user_input == "3":
         export_contacts_to_csv()  # ✅ Calls the new function to export CSV
+    elif user_input == "4":
+        reparse_snapshots()
     else:
         print("❌ Invalid option. Exiting...")
 
@@ -12,10 +12,6 @@ COGNISM_PASSWORD = os.getenv("COGNISM_PASSWORD")
 # Retrieve configuration settings
 OVERWRITE_SEGMENT = os.getenv("OVERWRITE_SEGMENT", "False").lower() == "true"
 
-# Function to introduce variability in waiting times
-def randomize_wait_time(base_time):
-    return round(base_time * random.uniform(0.5, 1.5), 2)  # Adds variability
-
 # Function to randomize batch size per batch (changes each time)
 def get_random_batch_size():
     base_size = int(os.getenv("TABS_PER_BATCH", 2))  # Default batch size
@@ -23,13 +19,37 @@ def get_random_batch_size():
     max_val = base_size + 0  # Slight variation
     return random.randint(min_val, max_val)  # ✅ Generates a new value every time
 
-# Time settings with randomization
 SCROLL_ITERATIONS = int(os.getenv("SCROLL_ITERATIONS", 3))  # Fixed integer
 
-PAGE_LOAD_TIMEOUT = randomize_wait_time(float(os.getenv("PAGE_LOAD_TIMEOUT", 10)))  
-EXTRA_RENDER_TIME = randomize_wait_time(float(os.getenv("EXTRA_RENDER_TIME", 3)))  
-SCROLL_WAIT_TIME = randomize_wait_time(float(os.getenv("SCROLL_WAIT_TIME", 1)))  
-TAB_LOAD_TIME = randomize_wait_time(float(os.getenv("TAB_LOAD_TIME", 3)))  
-
-# Randomized wait time between scraping pages
-SCRAPING_DELAY = randomize_wait_time(float(os.getenv("SCRAPING_DELAY", 2)))  
+# Readiness waits (utils/waits.py) return as soon as the page is ready; these are upper bounds
+PAGE_LOAD_TIMEOUT = float(os.getenv("PAGE_LOAD_TIMEOUT", 10))
+SCROLL_LOAD_TIMEOUT = float(os.getenv("SCROLL_LOAD_TIMEOUT", 1.5))  # New rows after a scroll step
+SCROLL_SETTLE_TIME = float(os.getenv("SCROLL_SETTLE_TIME", 0.15))  # Quiet time that ends a scroll step early
+WAIT_POLL_INTERVAL = float(os.getenv("WAIT_POLL_INTERVAL", 0.2))
+
+# Pacing (utils/waits.py RateLimiter): base seconds between actions, varied by ±PACING_JITTER every time
+PACING_JITTER = float(os.getenv("PACING_JITTER", 0.5))
+SCROLL_WAIT_TIME = float(os.getenv("SCROLL_WAIT_TIME", 1))  # Between scroll moves on a profile
+TAB_LOAD_TIME = float(os.getenv("TAB_LOAD_TIME", 3))  # Between opened tabs
+SCRAPING_DELAY = float(os.getenv("SCRAPING_DELAY", 2))  # Between scraped profiles
+
+# Browsers scraping profiles in parallel (they share the first browser's login)
+SCRAPER_WORKERS = max(1, int(os.getenv("SCRAPER_WORKERS", 2)))
+
+# A claimed scrape job is handed to another worker if not finished within this many seconds
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 180))
+# Attempts before a profile URL is marked as failed
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", 3))
+
+# Collect every profile field with one execute_script call (falls back to the per-field extractors)
+SCRIPT_EXTRACTION = os.getenv("SCRIPT_EXTRACTION", "True").lower() == "true"
+
+# Save driver.page_source of every profile so it can be re-parsed offline
+SAVE_SNAPSHOTS = os.getenv("SAVE_SNAPSHOTS", "True").lower() == "true"
+# Processes used to re-parse saved snapshots
+SNAPSHOT_PARSE_WORKERS = int(os.getenv("SNAPSHOT_PARSE_WORKERS", os.cpu_count() or 1))
+
+# Contacts are written by a background thread in batches of this size...
+CONTACT_WRITE_BATCH_SIZE = int(os.getenv("CONTACT_WRITE_BATCH_SIZE", 25))
+# ...or this many seconds after the first queued contact, whichever comes first
+CONTACT_WRITE_FLUSH_INTERVAL = float(os.getenv("CONTACT_WRITE_FLUSH_INTERVAL", 2))
@@ -0,0 +1,92 @@
+from contact_extractors.extract_name import split_full_name
+from contact_extractors.extract_location import parse_location
+from contact_extractors.extract_company import clean_company_field, clean_website
+
+# Collects the raw text/href of every field in the browser, with the same XPaths
+# as the individual extractors, so a profile costs one WebDriver round trip.
+# Missing elements come back as null.
+EXTRACT_ALL_SCRIPT = """
+function first(xpath) {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function all(xpath) {
+    var result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+    return nodes;
+}
+function text(xpath) {
+    var node = first(xpath);
+    return node ? node.innerText : null;
+}
+function href(xpath) {
+    var node = first(xpath);
+    return node ? (node.href || node.getAttribute('href')) : null;
+}
+
+var mobile = null;
+var phones = all("//a[contains(@href, 'tel:')]");
+for (var i = 0; i < phones.length; i++) {
+    var sibling = document.evaluate("./following-sibling::span", phones[i], null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (sibling && sibling.innerText.indexOf('Mobile') !== -1) {
+        mobile = phones[i].href || phones[i].getAttribute('href');
+        break;
+    }
+}
+
+return {
+    name: text("//div[contains(@class, 't-font-semibold t-text-primary-850')]"),
+    email: href("//a[contains(@class, 't-text-primary-600') and starts-with(@href, 'mailto:')]"),
+    mobile: mobile,
+    role: text("//div[contains(@class, 't-text-sm t-text-dark-400')]/div[1]"),
+    location: text("//div[contains(@class, 't-text-sm t-text-dark-400')]/div[2]"),
+    linkedin: href("//a[contains(@href, 'linkedin.com/in/')]"),
+    company_name: text("//span[contains(text(), 'Name:')]/parent::span"),
+    website: href("//span[contains(text(), 'Website:')]/following-sibling::a"),
+    employees: text("//span[contains(text(), 'Employee Headcount')]/parent::span"),
+    founded: text("//span[contains(text(), 'Founded:')]/parent::span")
+};
+"""
+
+def extract_all(driver):
+    """
+    Extracts every contact field with a single execute_script call.
+
+    Returns the same dictionary as scrape_page, or None if the script could
+    not run (the caller then falls back to the individual extractors).
+    """
+    try:
+        raw = driver.execute_script(EXTRACT_ALL_SCRIPT)
+    except Exception as e:
+        print(f"⚠️ Error running extraction script: {e}")
+        return None
+    if not isinstance(raw, dict):
+        return None
+
+    def value(key, clean=lambda v: v.strip()):
+        found = raw.get(key)
+        return "Not found" if found is None else clean(found)
+
+    first_name, last_name = split_full_name(raw["name"]) if raw.get("name") is not None else ("Not found", "Not found")
+    if raw.get("location") is not None:
+        city, state, country, timezone = parse_location(raw["location"])
+    else:
+        city, state, country, timezone = "Not found", "Not found", "Not found", "Not applicable"
+
+    return {
+        "Name": first_name,
+        "Last Name": last_name,
+        "Mobile Phone": value("mobile", lambda v: v.replace("tel:", "").strip()),
+        "Email": value("email", lambda v: v.replace("mailto:", "").strip()),
+        "Role": value("role"),
+        "City": city,
+        "State": state,
+        "Country": country,
+        "Timezone": timezone,
+        "LinkedIn URL": value("linkedin"),
+        "Company Name": value("company_name", lambda v: clean_company_field(v, "Name:")),
+        "Website": value("website", clean_website),
+        "Employees": value("employees", lambda v: clean_company_field(v, "Employee Headcount")),
+        "Founded": value("founded", lambda v: clean_company_field(v, "Founded:"))
+    }
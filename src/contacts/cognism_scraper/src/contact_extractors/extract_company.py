@@ -1,36 +1,42 @@
 from selenium.webdriver.common.by import By
 
+def clean_company_field(text, label):
+    """Removes the label prefix (e.g. 'Name:') from a company detail."""
+    return text.strip().replace(label, "").strip()
+
+def clean_website(href):
+    """Removes 'www.' from the company website."""
+    return href.replace("www.", "").strip()
+
 def extract_company(driver):
     """Extracts company details (Name, Website, Employees, Founded Year) from the webpage."""
     try:
         # Extract company name
         try:
             company_element = driver.find_element(By.XPATH, "//span[contains(text(), 'Name:')]/parent::span")
-            company_name = company_element.text.replace("Name:", "").strip()  # Remove 'Name:' prefix
+            company_name = clean_company_field(company_element.text, "Name:")  # Remove 'Name:' prefix
         except:
             company_name = "Not found"
 
         # Extract website and remove 'www.'
         try:
             website_element = driver.find_element(By.XPATH, "//span[contains(text(), 'Website:')]/following-sibling::a")
-            website = website_element.get_attribute("href").replace("www.", "").strip()
+            website = clean_website(website_element.get_attribute("href"))
         except:
             website = "Not found"
 
         # Extract employee headcount
         try:
             employees_element = driver.find_element(By.XPATH, "//span[contains(text(), 'Employee Headcount')]/parent::span")
-            employees = employees_element.text.replace("Employee Headcount", "").strip()
+            employees = clean_company_field(employees_element.text, "Employee Headcount")
         except:
             employees = "Not found"
 
         # Extract founded year
         try:
             founded_element = driver.find_element(By.XPATH, "//span[contains(text(), 'Founded:')]/parent::span")
-            founded_text = founded_element.text.strip()
-
             # Remove "Founded:" prefix
-            founded = founded_text.replace("Founded:", "").strip()
+            founded = clean_company_field(founded_element.text, "Founded:")
         except:
             founded = "Not found"
 
@@ -6,7 +6,15 @@ def extract_location(driver):
     try:
         # Find the second div inside the role/location container
         location_element = driver.find_element(By.XPATH, "//div[contains(@class, 't-text-sm t-text-dark-400')]/div[2]")
-        full_location = location_element.text.strip()
+        return parse_location(location_element.text)
+    except Exception as e:
+        print(f"⚠️ Error extracting location: {e}")
+        return "Not found", "Not found", "Not found", "Not applicable"
+
+def parse_location(full_location):
+    """Splits the location text into City, State, Country and assigns a timezone."""
+    try:
+        full_location = full_location.strip()
 
         # Remove unnecessary new lines
         full_location = full_location.replace("\n", ", ").replace("  ", " ")
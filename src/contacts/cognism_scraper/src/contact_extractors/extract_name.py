@@ -5,14 +5,15 @@ def extract_name(driver):
     try:
         # Find the full name element
         name_element = driver.find_element(By.XPATH, "//div[contains(@class, 't-font-semibold t-text-primary-850')]")
-        full_name = name_element.text.strip()
+        return split_full_name(name_element.text)
+    except:
+        return "Not found", "Not found"
 
-        # Split into first and last name
-        name_parts = full_name.split(" ", 1)  # Splits at the first space
+def split_full_name(full_name):
+    """Splits a full name into Name and Last Name at the first space."""
+    name_parts = full_name.strip().split(" ", 1)  # Splits at the first space
 
-        first_name = name_parts[0] if name_parts else "Not found"
-        last_name = name_parts[1] if len(name_parts) > 1 else "Not found"
+    first_name = name_parts[0] if name_parts and name_parts[0] else "Not found"
+    last_name = name_parts[1] if len(name_parts) > 1 else "Not found"
 
-        return first_name, last_name
-    except:
-        return "Not found", "Not found"
+    return first_name, last_name
@@ -0,0 +1,117 @@
+from bs4 import BeautifulSoup, NavigableString, Tag
+from contact_extractors.extract_name import split_full_name
+from contact_extractors.extract_location import parse_location
+from contact_extractors.extract_company import clean_company_field, clean_website
+
+# Elements that start a new line in the rendered text (like WebElement.text)
+BLOCK_TAGS = {"div", "p", "br", "li", "ul", "ol", "tr", "section", "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+def get_parser():
+    """lxml is faster; html.parser ships with Python."""
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+PARSER = get_parser()
+
+def element_text(element):
+    """Approximates the rendered text of an element: block elements on their own lines, spaces collapsed."""
+    parts = []
+    for node in element.descendants:
+        if isinstance(node, NavigableString):
+            parts.append(str(node))
+        elif isinstance(node, Tag) and node.name in BLOCK_TAGS:
+            parts.append("\n")
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+def with_class(name, class_string, href=None):
+    """Matches <name> tags whose class attribute contains class_string, like XPath contains(@class, ...)."""
+    def match(tag):
+        return (tag.name == name
+                and class_string in " ".join(tag.get("class") or [])
+                and (href is None or href(tag.get("href"))))
+    return match
+
+def span_with_text(soup, label):
+    """The span whose own text contains label, like //span[contains(text(), label)]."""
+    return soup.find(lambda tag: tag.name == "span"
+                     and any(label in text for text in tag.find_all(string=True, recursive=False)))
+
+def parse_profile_html(html):
+    """
+    Parses a saved Cognism profile page (driver.page_source) without a browser.
+
+    Mirrors the contact_extractors modules and returns the same dictionary as
+    scrape_page, "Not found" for missing fields.
+    """
+    soup = BeautifulSoup(html, PARSER)
+
+    def text_of(element, clean=lambda v: v.strip()):
+        return clean(element_text(element)) if element is not None else "Not found"
+
+    def href_of(element, clean=lambda v: v.strip()):
+        return clean(element.get("href", "")) if element is not None else "Not found"
+
+    name_element = soup.find(with_class("div", "t-font-semibold t-text-primary-850"))
+    first_name, last_name = split_full_name(element_text(name_element)) if name_element is not None else ("Not found", "Not found")
+
+    email_element = soup.find(with_class("a", "t-text-primary-600",
+                                         href=lambda href: bool(href) and href.startswith("mailto:")))
+    email = href_of(email_element, lambda v: v.replace("mailto:", "").strip())
+
+    mobile_phone = "Not found"
+    for phone_element in soup.find_all("a", href=lambda href: href and "tel:" in href):
+        label = phone_element.find_next_sibling("span")
+        if label is not None and "Mobile" in label.get_text():
+            mobile_phone = href_of(phone_element, lambda v: v.replace("tel:", "").strip())
+            break
+
+    # Role and location are the first two divs of the same container
+    role, location = None, None
+    container = soup.find(with_class("div", "t-text-sm t-text-dark-400"))
+    if container is not None:
+        rows = container.find_all("div", recursive=False)
+        role = rows[0] if len(rows) > 0 else None
+        location = rows[1] if len(rows) > 1 else None
+    role = text_of(role)
+    if location is not None:
+        city, state, country, timezone = parse_location(element_text(location))
+    else:
+        city, state, country, timezone = "Not found", "Not found", "Not found", "Not applicable"
+
+    linkedin_url = href_of(soup.find("a", href=lambda href: href and "linkedin.com/in/" in href))
+
+    company_label = span_with_text(soup, "Name:")
+    company_name = text_of(company_label.parent if company_label and company_label.parent.name == "span" else None,
+                           lambda v: clean_company_field(v, "Name:"))
+
+    website_label = span_with_text(soup, "Website:")
+    website = href_of(website_label.find_next_sibling("a") if website_label else None, clean_website)
+
+    employees_label = span_with_text(soup, "Employee Headcount")
+    employees = text_of(employees_label.parent if employees_label and employees_label.parent.name == "span" else None,
+                        lambda v: clean_company_field(v, "Employee Headcount"))
+
+    founded_label = span_with_text(soup, "Founded:")
+    founded = text_of(founded_label.parent if founded_label and founded_label.parent.name == "span" else None,
+                      lambda v: clean_company_field(v, "Founded:"))
+
+    return {
+        "Name": first_name,
+        "Last Name": last_name,
+        "Mobile Phone": mobile_phone,
+        "Email": email,
+        "Role": role,
+        "City": city,
+        "State": state,
+        "Country": country,
+        "Timezone": timezone,
+        "LinkedIn URL": linkedin_url,
+        "Company Name": company_name,
+        "Website": website,
+        "Employees": employees,
+        "Founded": founded
+    }
@@ -1,6 +1,5 @@
-import sqlite3
 import csv
-from utils.create_database import get_db_path
+from utils.create_database import connect
 
 def export_contacts_to_csv(csv_filename="contacts_export.csv"):
     """
@@ -9,7 +8,7 @@ def export_contacts_to_csv(csv_filename="contacts_export.csv"):
     :param csv_filename: The name of the output CSV file.
     """
     try:
-        conn = sqlite3.connect(get_db_path())
+        conn = connect()
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM contacts")  # Get all data from contacts table
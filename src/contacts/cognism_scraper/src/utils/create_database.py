@@ -1,58 +1,23 @@
 import sqlite3
 import os
+import sys
 
-# Dynamically determine the database path
-def get_db_path():
-    """Gets the absolute path to the database."""
-    # Get project root using relative path from this file
-    current_file = os.path.abspath(__file__)
-    utils_dir = os.path.dirname(current_file)
-    src_dir = os.path.dirname(utils_dir)
-    cognism_dir = os.path.dirname(src_dir)
-    contacts_dir = os.path.dirname(cognism_dir)
-    src_parent = os.path.dirname(contacts_dir)
-    project_root = os.path.dirname(src_parent)
-    
-    # First try the project root path
-    db_path = os.path.join(project_root, 'databases', 'database.db')
-    db_dir = os.path.dirname(db_path)
-    
-    # Ensure database directory exists
-    try:
-        if not os.path.exists(db_dir):
-            try:
-                os.makedirs(db_dir, exist_ok=True)
-                print(f"Created database directory: {db_dir}")
-            except Exception as e:
-                print(f"Error creating database directory at {db_dir}: {e}")
-                # Fall back to user home directory
-                user_home = os.path.expanduser("~")
-                db_dir = os.path.join(user_home, 'databases')
-                db_path = os.path.join(db_dir, 'database.db')
-                
-                if not os.path.exists(db_dir):
-                    os.makedirs(db_dir, exist_ok=True)
-                    print(f"Created fallback database directory: {db_dir}")
-        
-        # Print debug info
-        print(f"Using database at: {db_path}")
-        print(f"Database exists: {os.path.exists(db_path)}")
-        print(f"Database directory exists: {os.path.exists(db_dir)}")
-        
-        return db_path
-    except Exception as e:
-        print(f"Error setting up database path: {e}")
-        # Last resort - use local path
-        local_db = os.path.join(os.path.dirname(current_file), "cognism_database.db")
-        print(f"Using local database as last resort: {local_db}")
-        return local_db
+# Database path comes from the shared resolver in src/crm/db.py
+src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from crm.db import get_db_path, connect
+from crm.campaigns import ensure_state_counts
+from crm.indexes import apply_indexes
+from crm.domains import ensure_company_domains
 
 def create_table():
     """Creates the necessary tables if they don't exist."""
     try:
         # Make sure we can access the database
         db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
+        conn = connect()
         cursor = conn.cursor()
         
         # Keep the original contacts table for backward compatibility
@@ -107,8 +72,43 @@ def create_table():
                 UNIQUE(contact_id, campaign_id)
             )
         ''')
-    
+
+        # Saved page source of every scraped profile (see utils_contacts/snapshots.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS contact_snapshots (
+                url TEXT PRIMARY KEY,
+                path TEXT,
+                captured_at TEXT
+            )
+        ''')
+
+        # Persistent work queue of profile URLs (see utils_contacts/scrape_jobs.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_jobs (
+                url TEXT PRIMARY KEY,
+                contact_id TEXT,
+                segment TEXT,
+                timestamp TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires_at REAL,
+                last_error TEXT,
+                updated_at TEXT
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON scrape_jobs(status, lease_expires_at)")
+
         conn.commit()
+
+        # Secondary indexes, including contacts(Cognism_URL) used to match scraped URLs
+        apply_indexes(conn)
+
+        # Website -> company lookup used to link contacts (see src/crm/domains.py)
+        ensure_company_domains(conn)
+
+        # Per-state counters of contacts_campaign (see src/crm/campaigns.py)
+        ensure_state_counts(conn)
         conn.close()
         print(f"✅ Database tables ensured at {db_path}")
         return True
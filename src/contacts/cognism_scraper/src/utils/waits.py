@@ -0,0 +1,99 @@
+import time
+import random
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from config import PAGE_LOAD_TIMEOUT, WAIT_POLL_INTERVAL, PACING_JITTER, TAB_LOAD_TIME, SCROLL_WAIT_TIME
+
+# Readiness: wait on what the page shows, never longer than the timeout
+
+# Rendered once the profile header (name) or the company details are on the page
+PROFILE_READY_SCRIPT = """
+if (document.readyState !== 'complete') return false;
+var xpath = "//div[contains(@class, 't-font-semibold t-text-primary-850')] | //span[contains(text(), 'Name:')]";
+return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+"""
+
+def wait_until(driver, condition, timeout=PAGE_LOAD_TIMEOUT, poll=WAIT_POLL_INTERVAL):
+    """
+    Polls condition(driver) until it returns something truthy.
+
+    Returns that value, or None if the timeout passes (it doesn't raise, the
+    scraper carries on with whatever is on the page).
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+    except TimeoutException:
+        return None
+
+def wait_for_profile(driver, timeout=PAGE_LOAD_TIMEOUT):
+    """Waits until the profile page has loaded and rendered its details."""
+    ready = wait_until(driver, lambda d: d.execute_script(PROFILE_READY_SCRIPT), timeout)
+    if not ready:
+        print(f"⚠️ Profile not rendered after {timeout}s, extracting anyway.")
+    return bool(ready)
+
+def wait_for_change(driver, read_value, previous, timeout=PAGE_LOAD_TIMEOUT):
+    """
+    Waits until read_value(driver) differs from previous.
+
+    Returns the new value, or None if it didn't change before the timeout.
+    """
+    def changed(d):
+        try:
+            value = read_value(d)
+        except Exception:
+            return None  # element being re-rendered
+        return value if value != previous else None
+
+    return wait_until(driver, changed, timeout)
+
+def wait_for_stable_height(driver, timeout=PAGE_LOAD_TIMEOUT):
+    """Waits until the document height stops growing (lazy content finished loading)."""
+    last_height = [None]
+
+    def stable(d):
+        height = d.execute_script("return document.body.scrollHeight;")
+        is_stable = height == last_height[0]
+        last_height[0] = height
+        return is_stable
+
+    return wait_until(driver, stable, timeout)
+
+# Pacing: how often we act on the site, independent of how fast it loads
+
+class RateLimiter:
+    """
+    Spaces actions at least `interval` seconds apart, varied by ±jitter on
+    every call. Time spent working since the last action counts towards the
+    interval, so a slow page doesn't add a full delay on top.
+
+    An interval of 0 disables the limiter.
+    """
+
+    def __init__(self, interval, jitter=PACING_JITTER):
+        self.interval = interval
+        self.jitter = jitter
+        self._last = None
+        self._lock = threading.Lock()
+
+    def next_interval(self):
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self):
+        """Blocks until the next action is allowed."""
+        with self._lock:
+            if self._last is not None and self.interval > 0:
+                remaining = self._last + self.next_interval() - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+            self._last = time.monotonic()
+
+    def pause(self):
+        """A jittered pause of about `interval` seconds, regardless of the last action."""
+        if self.interval > 0:
+            time.sleep(self.next_interval())
+
+# Between opened tabs and between scroll moves (each scraping worker paces its own profiles)
+tab_pacer = RateLimiter(TAB_LOAD_TIME)
+scroll_pacer = RateLimiter(SCROLL_WAIT_TIME)
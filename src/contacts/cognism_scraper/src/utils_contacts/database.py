@@ -1,117 +1,312 @@
+import os
+import gzip
 import sqlite3
 import time
-import os
 import re
-from utils.create_database import create_table, get_db_path
+import queue
+import atexit
+import threading
+from collections import namedtuple
+from datetime import datetime
+from utils.create_database import create_table, get_db_path, connect
+from config import CONTACT_WRITE_BATCH_SIZE, CONTACT_WRITE_FLUSH_INTERVAL
+# Indexed website -> company matching (src/crm/domains.py)
+from crm.domains import resolve_company_id as resolve_company_id_for_website
+
+INSERT_CONTACT_SQL = '''
+    INSERT INTO contacts (
+        Name, Last_Name, Mobile_Phone, Email, Role,
+        City, State, Country, Timezone, LinkedIn_URL,
+        Website, Timestamp, Cognism_URL, contact_id, company_id
+    ) VALUES (
+        :Name, :Last_Name, :Mobile_Phone, :Email, :Role,
+        :City, :State, :Country, :Timezone, :LinkedIn_URL,
+        :Website, :Timestamp, :Cognism_URL, :contact_id, :company_id
+    )
+'''
+
+# Page source of a profile, written to path (gzip) by the ContactWriter
+Snapshot = namedtuple("Snapshot", "url path html")
 
 def print_db_path():
     """Prints the database path."""
     print(f"📂 Using database: {get_db_path()}")
 
-def save_to_db(data):
+def resolve_contact_id(cursor, data):
+    """Looks up contact_id from contacts_cognism_urls table if not provided."""
+    if 'contact_id' in data and data['contact_id']:
+        return
+    cognism_url = data.get('Cognism_URL')
+    if cognism_url:
+        cursor.execute("SELECT contact_id FROM contacts_cognism_urls WHERE url = ?", (cognism_url,))
+        result = cursor.fetchone()
+        if result:
+            data['contact_id'] = result[0]
+        else:
+            print(f"⚠️ No matching contact_id found for URL: {cognism_url}")
+            data['contact_id'] = "unknown"  # Provide a default value
+    else:
+        print("⚠️ No Cognism_URL provided, setting contact_id to 'unknown'")
+        data['contact_id'] = "unknown"
+
+def clean_website(data):
+    """Removes http://, https://, and trailing / from the website."""
+    if 'Website' in data and data['Website']:
+        website = re.sub(r'^https?://', '', data['Website'])
+        data['Website'] = re.sub(r'/$', '', website)
+
+def resolve_company_id(data):
+    """Looks up company_id from the companies' domains based on the website."""
+    website = data.get('Website')
+    if not website:
+        # No website provided
+        data['company_id'] = None
+        print("⚠️ No website available to match with company")
+        return
+
+    try:
+        data['company_id'] = resolve_company_id_for_website(website)
+        if not data['company_id']:
+            print(f"⚠️ No company found for website: {website}")
+    except Exception as e:
+        print(f"⚠️ Error looking up company: {e}")
+        data['company_id'] = None  # Set to NULL if there's an error
+
+def build_contact_row(extracted_data, data_entry):
+    """
+    Maps the fields returned by scrape_page (or parse_profile_html) and the
+    URL metadata (contact_id, timestamp, url) to the contacts table columns.
     """
-    Saves contact data to the database.
+    row = {
+        "Name": extracted_data.get("Name"),
+        "Last_Name": extracted_data.get("Last Name"),
+        "Mobile_Phone": extracted_data.get("Mobile Phone"),
+        "Email": extracted_data.get("Email"),
+        "Role": extracted_data.get("Role"),
+        "City": extracted_data.get("City"),
+        "State": extracted_data.get("State"),
+        "Country": extracted_data.get("Country"),
+        "Timezone": extracted_data.get("Timezone"),
+        "LinkedIn_URL": extracted_data.get("LinkedIn URL"),
+        "Website": extracted_data.get("Website"),
+        "Timestamp": data_entry.get("timestamp"),
+        "Cognism_URL": data_entry.get("url")
+    }
+
+    # Only add contact_id if it exists
+    if "contact_id" in data_entry:
+        row["contact_id"] = data_entry.get("contact_id")
+    return row
+
+class ContactWriter(threading.Thread):
     """
-    max_retries = 5
-    retry_delay = 2  # Seconds before retrying
+    Background thread that writes scraped contacts to the database.
+
+    The scraper enqueues contacts with put() and moves on; the writer inserts
+    them in batches, one transaction per batch, on a single connection opened
+    (and tables ensured) once when the thread starts. A batch is written when
+    it reaches batch_size contacts or flush_interval seconds after its first
+    contact, whichever comes first. Profile snapshots queued with
+    put_snapshot() are written on the same thread, so the browser workers do
+    no file or database I/O of their own.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size=CONTACT_WRITE_BATCH_SIZE, flush_interval=CONTACT_WRITE_FLUSH_INTERVAL,
+                 max_retries=5, retry_delay=2):
+        super().__init__(name="ContactWriter", daemon=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue()
+        self.written = 0
+        self.failed = 0
+
+    def put(self, data):
+        # Copy so the scraper can reuse its dict while the contact waits in the queue
+        self.queue.put(dict(data))
+
+    def put_snapshot(self, url, path, html):
+        self.queue.put(Snapshot(url, path, html))
+
+    def flush(self):
+        """Blocks until every contact queued so far has been written (or given up on)."""
+        # queue.join() would wait forever if the thread died with items pending
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and self.is_alive():
+                self.queue.all_tasks_done.wait(timeout=1)
+
+    def stop(self):
+        """Writes what is left in the queue and ends the thread."""
+        if self.is_alive():
+            self.queue.put(self._STOP)
+            self.join()
 
-    for attempt in range(max_retries):
+    def _next_batch(self):
+        """Waits for one contact, then collects more until the batch is full or the interval passes."""
+        first = self.queue.get()
+        if first is self._STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_snapshots(self, snapshots):
+        """Writes the snapshot files; returns the contact_snapshots rows of those saved."""
+        rows = []
+        for snapshot in snapshots:
+            try:
+                os.makedirs(os.path.dirname(snapshot.path), exist_ok=True)
+                with gzip.open(snapshot.path, "wt", encoding="utf-8") as snapshot_file:
+                    snapshot_file.write(snapshot.html)
+                rows.append((snapshot.url, snapshot.path, datetime.now().isoformat()))
+            except OSError as e:
+                print(f"⚠️ Error saving snapshot of {snapshot.url}: {e}")
+        return rows
+
+    def _insert(self, conn, contacts, snapshot_rows):
+        """Inserts contacts and snapshot rows in one transaction; returns the contacts written."""
+        cursor = conn.cursor()
+        # Lookups first: the company resolver uses its own connection, which would
+        # wait on this one's write lock if a write had already started
+        rows = []
+        for data in contacts:
+            resolve_contact_id(cursor, data)
+            clean_website(data)
+            resolve_company_id(data)
+            rows.append(data)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO contact_snapshots (url, path, captured_at) VALUES (?, ?, ?)",
+            snapshot_rows
+        )
+        cursor.executemany(INSERT_CONTACT_SQL, rows)
+        # Finish the scrape jobs in the same transaction as their contacts
+        finished_at = datetime.now().isoformat()
+        cursor.executemany(
+            "UPDATE scrape_jobs SET status = 'done', lease_expires_at = NULL, updated_at = ? WHERE url = ?",
+            [(finished_at, data.get('Cognism_URL')) for data in rows if data.get('Cognism_URL')]
+        )
+        conn.commit()
+        return len(rows)
+
+    def _write_one_by_one(self, conn, contacts, snapshot_rows):
+        """Fallback after a batch failed on bad data: only the failing rows are dropped."""
+        written = 0
+        try:
+            self._insert(conn, [], snapshot_rows)
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error saving {len(snapshot_rows)} snapshot record(s): {e}")
+        for data in contacts:
+            try:
+                written += self._insert(conn, [data], [])
+            except Exception as e:
+                conn.rollback()
+                self.failed += 1
+                print(f"❌ Error saving contact {data.get('Cognism_URL')}: {e}")
+        return written
+
+    def _write_batch(self, conn, batch):
+        contacts = [item for item in batch if not isinstance(item, Snapshot)]
+        snapshot_rows = self._write_snapshots([item for item in batch if isinstance(item, Snapshot)])
+        for attempt in range(self.max_retries):
+            try:
+                written = self._insert(conn, contacts, snapshot_rows)
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                print(f"❌ Database error: {e}. Retrying {attempt+1}/{self.max_retries}...")
+                time.sleep(self.retry_delay)
+                continue
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️ Batch of {len(contacts)} contact(s) failed ({e}), retrying one by one")
+                written = self._write_one_by_one(conn, contacts, snapshot_rows)
+            if written:
+                self.written += written
+                print(f"✅ {written} contact(s) saved to the database ({self.written} total)")
+            return
+        self.failed += len(contacts)
+        print(f"❌ Unable to write {len(contacts)} contact(s) to database. Ensure it is accessible.")
+
+    def run(self):
+        conn = None
         try:
-            # Get the correct database path from create_database
-            db_path = get_db_path()
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            # Ensure the table exists before inserting data
-            create_table()
-            
-            # Look up contact_id from contacts_cognism_urls table if not provided
-            if 'contact_id' not in data or not data['contact_id']:
-                cognism_url = data.get('Cognism_URL')
-                if cognism_url:
-                    print(f"🔍 Looking up contact_id for URL: {cognism_url}")
-                    cursor.execute("SELECT contact_id FROM contacts_cognism_urls WHERE url = ?", (cognism_url,))
-                    result = cursor.fetchone()
-                    if result:
-                        data['contact_id'] = result[0]
-                        print(f"✅ Found contact_id: {data['contact_id']}")
-                    else:
-                        print(f"⚠️ No matching contact_id found for URL: {cognism_url}")
-                        data['contact_id'] = "unknown"  # Provide a default value
-                else:
-                    print("⚠️ No Cognism_URL provided, setting contact_id to 'unknown'")
-                    data['contact_id'] = "unknown"
-
-            # Clean the website URL if present
-            if 'Website' in data and data['Website']:
-                website = data['Website']
-                # Remove http://, https://, and trailing /
-                website = re.sub(r'^https?://', '', website)
-                website = re.sub(r'/$', '', website)
-                data['Website'] = website
-            
-            # Look up company_id from companies table based on website domain
-            if 'Website' in data and data['Website']:
-                website = data['Website']
-                
-                # Try exact website match first
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
                 try:
-                    cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (website,))
-                    result = cursor.fetchone()
-                    
-                    # If not found, try alternate methods
-                    if not result:
-                        # Try with www prefix
-                        if not website.startswith('www.'):
-                            cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (f"www.{website}",))
-                            result = cursor.fetchone()
-                        
-                        # Try without www prefix
-                        if not result and website.startswith('www.'):
-                            cursor.execute("SELECT company_id FROM companies WHERE domain = ?", (website[4:],))
-                            result = cursor.fetchone()
-                    
-                    # If still not found, try LIKE match
-                    if not result:
-                        cursor.execute("SELECT company_id FROM companies WHERE domain LIKE ?", (f"%{website}%",))
-                        result = cursor.fetchone()
-                    
-                    if result:
-                        data['company_id'] = result[0]
-                        print(f"✅ Found company_id: {data['company_id']} for website: {website}")
-                    else:
-                        print(f"⚠️ No company found for website: {website}")
-                        data['company_id'] = None  # Set to NULL in the database
+                    if batch:
+                        if conn is None:
+                            # Tables are ensured once per writer, not once per contact
+                            create_table()
+                            conn = connect()
+                        self._write_batch(conn, batch)
                 except Exception as e:
-                    print(f"⚠️ Error looking up company: {e}")
-                    data['company_id'] = None  # Set to NULL if there's an error
-            else:
-                # No website provided
-                data['company_id'] = None
-                print("⚠️ No website available to match with company")
-            
-            # Insert data into the table (use the updated contacts table structure)
-            cursor.execute('''
-                INSERT INTO contacts (
-                    Name, Last_Name, Mobile_Phone, Email, Role,
-                    City, State, Country, Timezone, LinkedIn_URL,
-                    Website, Timestamp, Cognism_URL, contact_id, company_id
-                ) VALUES (
-                    :Name, :Last_Name, :Mobile_Phone, :Email, :Role,
-                    :City, :State, :Country, :Timezone, :LinkedIn_URL,
-                    :Website, :Timestamp, :Cognism_URL, :contact_id, :company_id
-                )
-            ''', data)
-
-            conn.commit()
-            conn.close()
-            print(f"✅ Contact data successfully saved to {db_path}")
-            return
-        except sqlite3.OperationalError as e:
-            print(f"❌ Database error: {e}. Retrying {attempt+1}/{max_retries}...")
-            time.sleep(retry_delay)
-        except Exception as e:
-            print(f"❌ Unexpected error saving contact: {e}")
-            break
+                    # Keep the thread alive: a dead writer would leave flush() and the queue hanging
+                    if conn is not None and conn.in_transaction:
+                        conn.rollback()
+                    contacts = sum(1 for item in batch if not isinstance(item, Snapshot))
+                    self.failed += contacts
+                    print(f"❌ Unable to write {contacts} contact(s): {e}")
+                finally:
+                    for _ in batch or ():
+                        self.queue.task_done()
+                    if stopping:
+                        self.queue.task_done()  # the stop marker
+        finally:
+            if conn is not None:
+                conn.close()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_contact_writer():
+    """Returns the process-wide contact writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            if _writer is not None and _writer.queue.unfinished_tasks:
+                print(f"⚠️ Contact writer stopped with {_writer.queue.unfinished_tasks} item(s) unwritten, starting a new one")
+            _writer = ContactWriter()
+            _writer.start()
+        return _writer
+
+def save_to_db(data):
+    """
+    Queues contact data to be saved to the database.
+
+    Returns immediately; the contact is written by the background
+    ContactWriter. Call flush_contacts() before reading the contacts back.
+    """
+    get_contact_writer().put(data)
+
+def flush_contacts():
+    """Waits until every queued contact has been written."""
+    if _writer is not None and _writer.is_alive():
+        _writer.flush()
+
+def close_contact_writer():
+    """Writes pending contacts and stops the writer thread."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+        if writer.failed:
+            print(f"⚠️ {writer.failed} contact(s) could not be saved.")
 
-    print(f"❌ Unable to write contact to database. Ensure it is accessible.")
\ No newline at end of file
+# Don't lose queued contacts if the scraper exits without closing the writer
+atexit.register(close_contact_writer)
@@ -1,5 +1,5 @@
-import time
-from config import TAB_LOAD_TIME, get_random_batch_size  # ✅ Import dynamic batch size
+from config import get_random_batch_size  # ✅ Import dynamic batch size
+from utils.waits import tab_pacer
 
 def open_new_tabs(driver, urls):
     """
@@ -17,10 +17,10 @@ def open_new_tabs(driver, urls):
                 print(f"⚠️ Skipping invalid URL: {url}")
                 continue
 
+            tab_pacer.wait()  # ✅ Paces tab openings; readiness is checked when the tab is scraped
             driver.execute_script("window.open('', '_blank');")
             driver.switch_to.window(driver.window_handles[-1])  
             driver.get(url)
-            time.sleep(TAB_LOAD_TIME)
             opened_tabs.append(driver.window_handles[-1])  # Store new tab handles
 
         yield opened_tabs  # Return only the new tabs opened in this batch
@@ -1,97 +1,113 @@
 import sqlite3
-import os
 from utils_contacts.read_db import get_urls_from_db
-from utils.create_database import create_table, get_db_path
+from utils.create_database import create_table, connect
 from config import OVERWRITE_SEGMENT  # Import overwrite setting
 
-def get_existing_urls():
-    """
-    Fetches all existing Cognism URLs from the contacts table in the SQLite database.
-    
-    :return: A dictionary of URLs with their associated segments.
-    """
-    # Get the correct database path from create_database
-    db_path = get_db_path()
-   
-    if not os.path.exists(db_path):
-        print(f"⚠️ Database file not found: {db_path}. Ensuring database structure...")
-        create_table()  # Call the function from database.py
-        print(f"✅ Database ready at: {db_path}")
-    
-    # Create the contacts table if it does not exist
-    try:
-        print(f"🔍 Connecting to database at: {db_path}")  # Debugging
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+# UPDATE ... FROM needs SQLite 3.33+
+UPDATE_FROM_SUPPORTED = sqlite3.sqlite_version_info >= (3, 33, 0)
 
-        cursor.execute("SELECT Cognism_URL, Segment FROM contacts")
-        existing_urls = {row[0]: row[1] for row in cursor.fetchall() if row[0]}  # Store as {url: segment}
+def contacts_have_segment(cursor):
+    """Older databases have a Segment column on contacts; newer ones don't."""
+    cursor.execute("PRAGMA table_info(contacts)")
+    return any(column[1] == "Segment" for column in cursor.fetchall())
 
-        conn.close()
-        print(f"✅ Found {len(existing_urls)} existing URLs in database.")
-        return existing_urls
-
-    except sqlite3.Error as e:
-        print(f"❌ Database error: {e}")
-        return {}
+def sync_segments(conn):
+    """
+    Reports (and, if OVERWRITE_SEGMENT is enabled, applies) segment changes
+    for URLs that were already scraped, with one statement.
 
-def update_segment(url, new_segment):
+    :return: The number of contacts whose segment differs.
+    """
+    cursor = conn.cursor()
+    if not contacts_have_segment(cursor):
+        return 0
+
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM contacts c
+        JOIN contacts_cognism_urls u ON u.url = c.Cognism_URL
+        WHERE c.Segment IS NOT u.contact_tag
+    """)
+    changed = cursor.fetchone()[0]
+    if not changed:
+        return 0
+
+    print(f"⚠️ {changed} URL(s) found in database with a different segment.")
+    if not OVERWRITE_SEGMENT:
+        print("🚫 Segment overwrite is disabled. Keeping old segments.")
+        return changed
+
+    if UPDATE_FROM_SUPPORTED:
+        cursor.execute("""
+            UPDATE contacts
+            SET Segment = u.contact_tag
+            FROM contacts_cognism_urls u
+            WHERE u.url = contacts.Cognism_URL
+            AND contacts.Segment IS NOT u.contact_tag
+        """)
+    else:
+        cursor.execute("""
+            UPDATE contacts
+            SET Segment = (SELECT u.contact_tag FROM contacts_cognism_urls u WHERE u.url = contacts.Cognism_URL)
+            WHERE Cognism_URL IN (
+                SELECT u.url FROM contacts_cognism_urls u
+                JOIN contacts c2 ON c2.Cognism_URL = u.url
+                WHERE c2.Segment IS NOT u.contact_tag
+            )
+        """)
+    conn.commit()
+    print(f"✅ Segment updated in database for {changed} contact(s).")
+    return changed
+
+def iter_new_urls():
     """
-    Updates the segment for an existing Cognism URL in the database.
+    Yields the URLs of contacts_cognism_urls that have not been scraped into
+    contacts yet, straight from the database cursor.
 
-    :param url: The Cognism URL to update.
-    :param new_segment: The new segment to overwrite.
+    :return: A generator of {contact_id, segment, url, timestamp} dictionaries.
     """
+    conn = connect()
     try:
-        # Get the correct database path
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("UPDATE contacts SET Segment = ? WHERE Cognism_URL = ?", (new_segment, url))
-        conn.commit()
+        # Anti-join on the indexed contacts.Cognism_URL column
+        cursor = conn.execute("""
+            SELECT u.contact_id, u.contact_tag, u.url, u.timestamp
+            FROM contacts_cognism_urls u
+            LEFT JOIN contacts c ON c.Cognism_URL = u.url
+            WHERE c.Cognism_URL IS NULL
+            ORDER BY u.rowid
+        """)
+        for contact_id, segment, url, timestamp in cursor:
+            yield {"contact_id": contact_id, "segment": segment, "url": url, "timestamp": timestamp}
+    finally:
         conn.close()
-        print(f"🔄 Updated segment for URL: {url}")
 
+def iter_new_urls_or_all():
+    """iter_new_urls, falling back to every stored URL if the database can't be read."""
+    try:
+        yield from iter_new_urls()
     except sqlite3.Error as e:
-        print(f"❌ Error updating segment for {url}: {e}")
+        print(f"❌ Database error: {e}")
+        # get_urls_from_db also reads the CSV backup; URLs already queued are skipped by enqueue_jobs
+        yield from get_urls_from_db()
 
 def filter_new_urls():
     """
     Filters out URLs that already exist in the database.
     If a URL exists but has a different segment, update the segment (if enabled in config).
-    
-    :return: A list of new URLs that are not present in the database.
-    """
-    # Load URLs from the database or CSV
-    url_entries = get_urls_from_db()
-    print(f"📥 Loaded {len(url_entries)} URLs with their contact_ids.")
-
-    # Get existing URLs from the database
-    existing_urls = get_existing_urls()
-
-    new_urls = []  # Store new URLs only
-
-    for entry in url_entries:
-        url = entry["url"]
-        segment = entry["segment"]
 
-        if url in existing_urls:
-            # Check if segment is different
-            if existing_urls[url] != segment:
-                print(f"⚠️ URL found in database, but segment is different: {url}")
-                print(f"   - Old segment: {existing_urls[url]}")
-                print(f"   - New segment: {segment}")
-
-                # Update segment if overwriting is enabled
-                if OVERWRITE_SEGMENT:
-                    update_segment(url, segment)
-                    print("✅ Segment updated in database.")
-                else:
-                    print("🚫 Segment overwrite is disabled. Keeping old segment.")
+    :return: A generator of the new URLs, read from the database as they are
+             consumed (e.g. by enqueue_jobs) instead of being loaded into a list.
+    """
+    # Make sure the tables and the Cognism_URL index exist before joining
+    create_table()
 
-        else:
-            new_urls.append(entry)  # Only add completely new URLs
+    # Segments are synced up front, before the caller starts writing scrape jobs
+    conn = connect()
+    try:
+        sync_segments(conn)
+    except sqlite3.Error as e:
+        print(f"❌ Database error syncing segments: {e}")
+    finally:
+        conn.close()
 
-    print(f"✅ {len(new_urls)} new URLs found (not in database).")
-    return new_urls
+    return iter_new_urls_or_all()
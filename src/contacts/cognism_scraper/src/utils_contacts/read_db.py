@@ -1,5 +1,4 @@
-import sqlite3
-from utils.create_database import get_db_path
+from utils.create_database import connect
 
 def get_urls_from_db():
     """
@@ -8,7 +7,7 @@ def get_urls_from_db():
     :return: A list of dictionaries [{segment, url, timestamp}, ...]
     """
     try:
-        conn = sqlite3.connect(get_db_path())
+        conn = connect()
         cursor = conn.cursor()
 
         # Use the new table name and field names
@@ -0,0 +1,124 @@
+import time
+from datetime import datetime
+from utils.create_database import create_table, connect
+from config import JOB_LEASE_SECONDS, MAX_JOB_ATTEMPTS
+
+# scrape_jobs holds one row per profile URL to scrape:
+#   pending      waiting for a worker
+#   in_progress  claimed by a worker until lease_expires_at; an expired lease
+#                (crashed or closed session) makes the job claimable again
+#   done         the contact was written (set by the ContactWriter, in the
+#                same transaction as the contact)
+#   failed       gave up after MAX_JOB_ATTEMPTS attempts
+
+CLAIMABLE = (
+    "(status = 'pending' OR "
+    f"(status = 'in_progress' AND lease_expires_at < ? AND attempts < {MAX_JOB_ATTEMPTS}))"
+)
+
+def now_iso():
+    return datetime.now().isoformat()
+
+def enqueue_jobs(url_entries):
+    """
+    Adds the URL entries to scrape_jobs, skipping URLs already queued.
+
+    url_entries can be any iterable (e.g. the filter_new_urls generator);
+    it's consumed row by row, never copied into a list.
+
+    :return: The number of new jobs.
+    """
+    create_table()
+    conn = connect()
+    try:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO scrape_jobs (url, contact_id, segment, timestamp, status, updated_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?)",
+            ((entry["url"], entry.get("contact_id"), entry.get("segment"), entry.get("timestamp"), now_iso())
+             for entry in url_entries)
+        )
+        conn.commit()
+        return conn.total_changes - before
+    finally:
+        conn.close()
+
+def count_claimable_jobs():
+    conn = connect()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM scrape_jobs WHERE {CLAIMABLE}", (time.time(),)).fetchone()[0]
+    finally:
+        conn.close()
+
+def get_job_counts():
+    """Number of jobs per status."""
+    conn = connect()
+    try:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM scrape_jobs GROUP BY status").fetchall())
+    finally:
+        conn.close()
+
+def claim_job(worker, lease_seconds=JOB_LEASE_SECONDS):
+    """
+    Atomically claims the oldest claimable job for worker.
+
+    The write lock is taken up front (BEGIN IMMEDIATE), so two workers (or two
+    processes) can never claim the same job.
+
+    :return: The job as a URL entry dictionary, or None if there is no work left.
+    """
+    conn = connect()
+    try:
+        conn.isolation_level = None  # explicit transaction below
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            # Jobs whose lease expired on their last attempt are given up
+            conn.execute(f"""
+                UPDATE scrape_jobs
+                SET status = 'failed', worker = NULL, lease_expires_at = NULL,
+                    last_error = 'Lease expired', updated_at = ?
+                WHERE status = 'in_progress' AND lease_expires_at < ? AND attempts >= {MAX_JOB_ATTEMPTS}
+            """, (now_iso(), now))
+            row = conn.execute(f"""
+                SELECT rowid, url, contact_id, segment, timestamp, attempts
+                FROM scrape_jobs
+                WHERE {CLAIMABLE}
+                ORDER BY rowid
+                LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            rowid, url, contact_id, segment, timestamp, attempts = row
+            conn.execute("""
+                UPDATE scrape_jobs
+                SET status = 'in_progress', worker = ?, attempts = attempts + 1,
+                    lease_expires_at = ?, updated_at = ?
+                WHERE rowid = ?
+            """, (worker, now + lease_seconds, now_iso(), rowid))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    return {"contact_id": contact_id, "segment": segment, "url": url, "timestamp": timestamp,
+            "attempts": attempts + 1}
+
+def fail_job(job, error):
+    """Returns the job to the queue, or marks it failed after MAX_JOB_ATTEMPTS attempts."""
+    status = "failed" if job["attempts"] >= MAX_JOB_ATTEMPTS else "pending"
+    conn = connect()
+    try:
+        conn.execute("""
+            UPDATE scrape_jobs
+            SET status = ?, worker = NULL, lease_expires_at = NULL, last_error = ?, updated_at = ?
+            WHERE url = ? AND status = 'in_progress'
+        """, (status, str(error)[:500], now_iso(), job["url"]))
+        conn.commit()
+    finally:
+        conn.close()
+    return status
@@ -0,0 +1,83 @@
+import os
+import gzip
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from utils.create_database import create_table, get_db_path, connect
+from utils_contacts.database import build_contact_row, save_to_db, close_contact_writer, get_contact_writer
+from contact_extractors.parse_html import parse_profile_html
+from config import SNAPSHOT_PARSE_WORKERS
+
+def get_snapshot_dir():
+    """Folder holding the saved profile pages, next to the database."""
+    return os.path.join(os.path.dirname(get_db_path()), "snapshots", "cognism")
+
+def get_snapshot_path(url):
+    return os.path.join(get_snapshot_dir(), hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
+
+def save_snapshot(url, html):
+    """
+    Queues the page source of a profile to be saved (gzip) and recorded in
+    contact_snapshots by the background ContactWriter; returns its path.
+    """
+    path = get_snapshot_path(url)
+    get_contact_writer().put_snapshot(url, path, html)
+    return path
+
+def load_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as snapshot:
+        return snapshot.read()
+
+def parse_snapshot(path):
+    """Parses a saved profile; runs in the worker processes."""
+    return parse_profile_html(load_snapshot(path))
+
+def get_unparsed_snapshots():
+    """
+    Returns the snapshots whose URL has no contact yet (the extraction failed
+    or was never saved), with the URL metadata needed to save them.
+    """
+    conn = connect()
+    try:
+        cursor = conn.execute("""
+            SELECT u.contact_id, u.contact_tag, u.url, u.timestamp, s.path
+            FROM contact_snapshots s
+            JOIN contacts_cognism_urls u ON u.url = s.url
+            LEFT JOIN contacts c ON c.Cognism_URL = s.url
+            WHERE c.Cognism_URL IS NULL
+            ORDER BY s.captured_at
+        """)
+        return [
+            {"contact_id": contact_id, "segment": segment, "url": url, "timestamp": timestamp, "path": path}
+            for contact_id, segment, url, timestamp, path in cursor.fetchall()
+        ]
+    finally:
+        conn.close()
+
+def reparse_snapshots(workers=SNAPSHOT_PARSE_WORKERS):
+    """
+    Re-runs the extraction of every unparsed snapshot in a process pool,
+    without opening Cognism, and saves the contacts found.
+
+    :return: The number of contacts saved.
+    """
+    create_table()
+    entries = [entry for entry in get_unparsed_snapshots() if os.path.exists(entry["path"])]
+    if not entries:
+        print("⚠️ No unparsed snapshots found.")
+        return 0
+
+    print(f"🔁 Parsing {len(entries)} saved profile(s) with {workers} worker(s)...")
+    saved = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(parse_snapshot, [entry["path"] for entry in entries], chunksize=16)
+        for entry, extracted_data in zip(entries, results):
+            if extracted_data["Name"] == "Not found":
+                print(f"⚠️ No data extracted from snapshot of {entry['url']}")
+                continue
+            save_to_db(build_contact_row(extracted_data, entry))
+            saved += 1
+
+    # Wait for the background writer to save the queued contacts
+    close_contact_writer()
+    print(f"✅ {saved} of {len(entries)} contact(s) recovered from snapshots.")
+    return saved
@@ -0,0 +1,164 @@
+import uuid
+import threading
+from utils.selenium_setup import initialize_driver
+from utils.waits import RateLimiter
+from utils_contacts.scraper import scrape_page
+from utils_contacts.database import save_to_db, build_contact_row, flush_contacts
+from utils_contacts.snapshots import save_snapshot
+from utils_contacts.scrape_jobs import enqueue_jobs, claim_job, fail_job, count_claimable_jobs, get_job_counts
+from config import SCRAPER_WORKERS, SCRAPING_DELAY, SAVE_SNAPSHOTS
+
+COGNISM_APP_URL = "https://app.cognism.com/"
+
+def export_session(driver):
+    """Cookies and localStorage of the logged-in browser, to log other browsers in."""
+    return {
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script("return Object.assign({}, window.localStorage);") or {}
+    }
+
+def import_session(driver, session):
+    """Loads an exported session into a fresh browser (it must be on the Cognism domain first)."""
+    driver.get(COGNISM_APP_URL)
+    for cookie in session["cookies"]:
+        cookie = dict(cookie)
+        cookie.pop("sameSite", None)  # Chrome rejects some exported values
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"⚠️ Could not copy cookie {cookie.get('name')}: {e}")
+    driver.execute_script(
+        "for (var key in arguments[0]) { window.localStorage.setItem(key, arguments[0][key]); }",
+        session["local_storage"]
+    )
+    driver.refresh()
+
+class ContactWorker(threading.Thread):
+    """
+    One browser scraping profiles claimed from the scrape_jobs table.
+
+    Each worker keeps its own randomized pacing between profiles and hands the
+    contacts to the background ContactWriter, which marks their jobs done.
+    """
+
+    def __init__(self, index, driver, session_id, on_progress=None, session=None):
+        super().__init__(name=f"ContactWorker-{index}", daemon=True)
+        self.index = index
+        self.driver = driver
+        self.session = session
+        self.worker_id = f"{session_id}:{index}"
+        self.on_progress = on_progress
+        self.pacer = RateLimiter(SCRAPING_DELAY)
+        self.scraped = 0
+        self.failed = 0
+
+    def scrape(self, data_entry):
+        if not data_entry["url"].startswith("http"):
+            print(f"⚠️ Skipping invalid URL: {data_entry['url']}")
+            return False
+
+        self.driver.get(data_entry["url"])
+        extracted_data = scrape_page(self.driver)
+
+        # Keep the rendered page so the extraction can be re-run offline
+        if SAVE_SNAPSHOTS:
+            try:
+                save_snapshot(data_entry["url"], self.driver.page_source)
+            except Exception as e:
+                print(f"⚠️ Error saving snapshot: {e}")
+
+        if not extracted_data:
+            print(f"⚠️ No data extracted for URL: {data_entry['url']}")
+            return False
+
+        corrected_data = build_contact_row(extracted_data, data_entry)
+        missing_keys = [key for key, value in corrected_data.items() if value is None]
+        if missing_keys:
+            print(f"⚠️ Missing keys after correction: {missing_keys}")
+            return False
+
+        save_to_db(corrected_data)  # ✅ Queued; written in batches by the background writer
+        return True
+
+    def run(self):
+        try:
+            if self.driver is None:
+                self.driver = initialize_driver()
+                import_session(self.driver, self.session)
+        except Exception as e:
+            print(f"❌ Worker {self.index} could not start a logged-in browser: {e}")
+            return
+
+        while True:
+            data_entry = claim_job(self.worker_id)
+            if data_entry is None:
+                break
+            try:
+                self.pacer.wait()  # ✅ Randomized pacing between this worker's profiles
+                if self.scrape(data_entry):
+                    self.scraped += 1
+                else:
+                    self.failed += 1
+                    fail_job(data_entry, "No data extracted")
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Worker {self.index} error processing {data_entry.get('url')}: {e}")
+                fail_job(data_entry, e)
+            finally:
+                if self.on_progress:
+                    self.on_progress(data_entry)
+
+def run_worker_pool(login_driver, url_entries=(), workers=SCRAPER_WORKERS, on_progress=None):
+    """
+    Adds url_entries to the scrape_jobs queue and scrapes every claimable job
+    (including work left unfinished by earlier sessions) with `workers`
+    browsers in parallel.
+
+    The logged-in browser is the first worker; the others are started with
+    its cookies and localStorage, so only one manual login is needed. The
+    extra browsers are closed when there is no work left.
+
+    :param on_progress: Called with (done, total) after every profile.
+    :return: {"scraped": ..., "failed": ...}
+    """
+    added = enqueue_jobs(url_entries)
+    total = count_claimable_jobs()
+    print(f"📋 {added} new job(s) queued, {total} job(s) to scrape.")
+    if not total:
+        return {"scraped": 0, "failed": 0}
+    workers = max(1, min(workers, total))
+
+    session = export_session(login_driver) if workers > 1 else None
+    session_id = uuid.uuid4().hex[:8]
+    done = [0]
+    progress_lock = threading.Lock()
+
+    def report(_data_entry):
+        with progress_lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0], total)
+
+    print(f"🚀 Scraping {total} profiles with {workers} browser(s)...")
+    pool = [
+        ContactWorker(i, login_driver if i == 0 else None, session_id, report, session)
+        for i in range(workers)
+    ]
+    for worker in pool:
+        worker.start()
+    for worker in pool:
+        worker.join()
+
+    for worker in pool[1:]:
+        if worker.driver is not None:
+            try:
+                worker.driver.quit()
+            except Exception as e:
+                print(f"⚠️ Error closing worker browser: {e}")
+
+    # Jobs are marked done when their contacts are written
+    flush_contacts()
+    scraped = sum(worker.scraped for worker in pool)
+    failed = sum(worker.failed for worker in pool)
+    print(f"✅ {scraped} profiles scraped, {failed} failed. Jobs: {get_job_counts()}")
+    return {"scraped": scraped, "failed": failed}
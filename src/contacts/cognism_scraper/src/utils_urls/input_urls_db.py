@@ -1,56 +1,93 @@
-import sqlite3
 import uuid
 import time
-import os
-from utils.create_database import get_db_path, create_table
+from utils.create_database import get_db_path, create_table, connect
 
-def save_urls_to_db(urls_data):
-    """Saves the list of URLs to the database in the contacts_cognism_urls table."""
-    if not urls_data or not isinstance(urls_data, list):
-        print("⚠️ No URLs to save or incorrect format.")
-        return
-    
-    try:
+class UrlSink:
+    """
+    Saves scraped Cognism URLs for one scraping session.
+
+    The table is ensured and the connection opened once, when the session
+    starts; every results page is then a single executemany and commit.
+    """
+
+    def __init__(self):
         # Ensure the table exists before inserting data
-        table_created = create_table()
-        
-        # Get the path to the database
-        db_path = get_db_path()
-        print(f"Opening database at: {db_path}")
-        
-        # Connect to the database
-        conn = sqlite3.connect(db_path, timeout=30)
-        cursor = conn.cursor()
-        
-        # Count URLs successfully saved
-        saved_count = 0
+        create_table()
+        print(f"Opening database at: {get_db_path()}")
+        self.conn = connect()
+        self.saved = 0
 
+    def save(self, urls_data):
+        """
+        Inserts the URLs of one page, skipping URLs already stored.
+
+        :return: The number of URLs actually inserted.
+        """
+        # Deduplicate within the page; the first entry for a URL wins
+        unique_entries = {}
         for entry in urls_data:
-            try:
-                # Rename segment to contact_tag as requested
-                contact_tag = entry["segment"]
-                url = entry["url"]
-                timestamp = entry["timestamp"]
-                
-                # Generate a unique contact_id for each entry
-                contact_id = str(uuid.uuid4())
-    
-                cursor.execute(
-                    "INSERT OR IGNORE INTO contacts_cognism_urls (contact_id, contact_tag, url, timestamp) VALUES (?, ?, ?, ?)",
-                    (contact_id, contact_tag, url, timestamp)
-                )
-                saved_count += 1
-            except Exception as e:
-                print(f"⚠️ Error saving URL {entry.get('url', 'unknown')}: {e}")
-                continue
+            url = entry.get("url")
+            if url and url not in unique_entries:
+                unique_entries[url] = entry
+
+        # Rename segment to contact_tag and generate a unique contact_id for each entry
+        rows = [
+            (str(uuid.uuid4()), entry.get("segment"), url, entry.get("timestamp"))
+            for url, entry in unique_entries.items()
+        ]
 
-        conn.commit()
-        conn.close()
+        before = self.conn.total_changes
+        try:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO contacts_cognism_urls (contact_id, contact_tag, url, timestamp) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+        except Exception:
+            # Don't let a half-written page be committed with the next one
+            self.conn.rollback()
+            raise
+
+        # Rows dropped by INSERT OR IGNORE don't count as changes
+        saved_count = self.conn.total_changes - before
+        self.saved += saved_count
+        return saved_count
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def save_urls_to_db(urls_data, sink=None):
+    """
+    Saves the list of URLs to the database in the contacts_cognism_urls table.
+
+    Pass the session's UrlSink as sink to reuse its connection; without one a
+    connection is opened just for this call.
+    """
+    if not urls_data or not isinstance(urls_data, list):
+        print("⚠️ No URLs to save or incorrect format.")
+        return 0
+    
+    try:
+        if sink is None:
+            with UrlSink() as own_sink:
+                saved_count = own_sink.save(urls_data)
+        else:
+            saved_count = sink.save(urls_data)
         
+        skipped = len(urls_data) - saved_count
         if saved_count > 0:
-            print(f"✅ {saved_count} URLs saved to database in contacts_cognism_urls table.")
+            print(f"✅ {saved_count} URLs saved to database in contacts_cognism_urls table ({skipped} duplicates skipped).")
         else:
-            print(f"⚠️ No URLs were saved to the database.")
+            print(f"⚠️ No new URLs were saved to the database ({skipped} duplicates skipped).")
+        return saved_count
 
     except Exception as e:
         print(f"⚠️ Error saving URLs to database: {e}")
@@ -73,3 +110,4 @@ def save_urls_to_db(urls_data):
             print(f"✅ Saved URLs to backup file: {csv_file}")
         except Exception as backup_error:
             print(f"❌ Failed to save backup file: {backup_error}")
+        return 0
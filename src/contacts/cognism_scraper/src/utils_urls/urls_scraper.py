@@ -1,8 +1,101 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
 from datetime import datetime
+from config import PAGE_LOAD_TIMEOUT, SCROLL_LOAD_TIMEOUT, SCROLL_SETTLE_TIME
+
+# Tope de pasos de scroll por página (una página de resultados tiene pocas decenas de filas)
+MAX_SCROLL_STEPS = 200
+
+# Un paso de la recolección, en una sola llamada a WebDriver:
+# lee los href renderizados, desplaza el viewport una altura completa y espera
+# (MutationObserver) a que la lista deje de cambiar durante settle_ms, como
+# máximo max_ms; luego vuelve a leer los href.
+HARVEST_STEP_SCRIPT = """
+var viewport = arguments[0], settleMs = arguments[1], maxMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var selector = "a.t-text-primary-600[href*='/search/prospects/persons/']";
+
+function harvest() {
+    var links = document.querySelectorAll(selector);
+    var hrefs = [];
+    for (var i = 0; i < links.length; i++) hrefs.push(links[i].getAttribute('href'));
+    return hrefs;
+}
+
+var pagination = document.querySelector('span.t-text-xs.t-mr-2');
+var before = harvest();
+var previousTop = viewport.scrollTop;
+viewport.scrollBy(0, viewport.clientHeight);
+var moved = viewport.scrollTop !== previousTop;
+
+var finished = false, quietTimer = null, deadline = null, observer = null;
+function finish() {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(deadline);
+    done({
+        hrefs: before.concat(harvest()),
+        moved: moved,
+        atBottom: viewport.scrollTop + viewport.clientHeight >= viewport.scrollHeight - 1,
+        pagination: pagination ? pagination.innerText : null
+    });
+}
+if (!moved) { finish(); return; }
+
+observer = new MutationObserver(function () {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(finish, settleMs);
+});
+observer.observe(viewport, {childList: true, subtree: true});
+quietTimer = setTimeout(finish, settleMs);
+deadline = setTimeout(finish, maxMs);
+"""
+
+def rows_on_page(pagination_text):
+    """Filas de la página según la paginación ("1 - 25 of 144" -> 25), o None."""
+    if not pagination_text:
+        return None
+    numbers = [int(num) for num in pagination_text.replace("-", " ").split() if num.isdigit()]
+    if len(numbers) >= 2 and numbers[1] >= numbers[0]:
+        return numbers[1] - numbers[0] + 1
+    return None
+
+def harvest_urls(driver, scroll_container):
+    """
+    Recorre la lista virtual un viewport por paso y devuelve los URLs únicos.
+
+    Termina cuando ya se vieron tantas filas como indica la paginación, o
+    cuando el viewport llega al final / ya no se desplaza.
+    """
+    # El paso espera dentro del navegador; el timeout de WebDriver debe cubrirlo
+    driver.set_script_timeout(SCROLL_LOAD_TIMEOUT + PAGE_LOAD_TIMEOUT)
+
+    seen_urls = set()
+    expected_rows = None
+    for step in range(1, MAX_SCROLL_STEPS + 1):
+        result = driver.execute_async_script(
+            HARVEST_STEP_SCRIPT, scroll_container,
+            int(SCROLL_SETTLE_TIME * 1000), int(SCROLL_LOAD_TIMEOUT * 1000)
+        )
+
+        for href in result["hrefs"]:
+            if href and "/search/prospects/persons/" in href:
+                seen_urls.add(f"https://app.cognism.com{href}" if href.startswith("/") else href)
+
+        if expected_rows is None:
+            expected_rows = rows_on_page(result["pagination"])
+
+        if expected_rows and len(seen_urls) >= expected_rows:
+            break
+        if result["atBottom"] or not result["moved"]:
+            break
+
+    print(f"🔎 {len(seen_urls)} URLs harvested in {step} scroll step(s)"
+          + (f" ({expected_rows} rows on page)" if expected_rows else ""))
+    return seen_urls
 
 def scrape_urls(driver, segment):
     """Extrae todos los URLs de perfiles de personas en la página implementando desplazamiento para listas virtualizadas."""
@@ -11,45 +104,24 @@ def scrape_urls(driver, segment):
         WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
-        
+
         # Esperar la presencia de la tabla con la lista de personas
         WebDriverWait(driver, 10).until(
             EC.presence_of_all_elements_located((By.XPATH, "//a[contains(@href, '/search/prospects/persons/') and contains(@class, 't-text-primary-600')]"))
         )
-        
+
         # Encontrar el contenedor de desplazamiento virtual
         scroll_container = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CLASS_NAME, "cdk-virtual-scroll-viewport"))
         )
-        
-        # Lista para guardar los URLs únicos
-        seen_urls = set()
-        previous_count = 0
-
-        while True:
-            # Buscar todos los enlaces en la tabla
-            url_elements = driver.find_elements(By.XPATH, "//a[contains(@href, '/search/prospects/persons/') and contains(@class, 't-text-primary-600')]")
-            
-            for elem in url_elements:
-                href = elem.get_attribute("href")
-                if href and "/search/prospects/persons/" in href:
-                    full_url = f"https://app.cognism.com{href}" if href.startswith("/") else href
-                    seen_urls.add(full_url)
-
-            # Desplazar hacia abajo en el contenedor virtual
-            driver.execute_script("arguments[0].scrollBy(0, 300);", scroll_container)
-            time.sleep(1.5)  # Esperar a que se carguen los nuevos elementos
-
-            # Si no se agregan más URLs, detener el bucle
-            if len(seen_urls) == previous_count:
-                break
-
-            previous_count = len(seen_urls)
+
+        # Recolectar los URLs únicos recorriendo la lista virtual
+        seen_urls = harvest_urls(driver, scroll_container)
 
         # Crear lista de diccionarios con URLs, segmento y timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         urls_data = [{"url": url, "segment": segment, "timestamp": timestamp} for url in seen_urls]
-        
+
         print(f"✅ Total URLs Extracted: {len(seen_urls)}")
         print(urls_data)
         return {"URLs": urls_data}
@@ -16,73 +16,9 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Make the database path accessible - use platform-independent path
-def get_db_path():
-    """Determine the appropriate database path"""
-    # HARDCODED PATH FOR WINDOWS - TRY THIS FIRST
-    if os.environ.get("DB_PATH") and os.name == 'nt':  # Only use on Windows
-        hardcoded_path = os.environ.get("DB_PATH")
-        print(f"Using hardcoded database path from environment: {hardcoded_path}")
-        
-        # Ensure directory exists
-        db_dir = os.path.dirname(hardcoded_path)
-        if not os.path.exists(db_dir):
-            try:
-                os.makedirs(db_dir, exist_ok=True)
-                print(f"Created database directory at: {db_dir}")
-            except Exception as e:
-                print(f"Could not create directory at {db_dir}: {e}")
-        return hardcoded_path
-    
-    # Hardcoded Windows path as fallback
-    if os.name == 'nt':  # Only use on Windows
-        windows_path = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-        print(f"Using hardcoded database path: {windows_path}")
-        
-        # Ensure directory exists
-        db_dir = os.path.dirname(windows_path)
-        if not os.path.exists(db_dir):
-            try:
-                os.makedirs(db_dir, exist_ok=True)
-                print(f"Created database directory at: {db_dir}")
-            except Exception as e:
-                print(f"Could not create directory at {db_dir}: {e}")
-        return windows_path
-    
-    # Try multiple potential project root locations as fallback
-    file_dir = os.path.dirname(os.path.abspath(__file__))
-    contacts_dir = file_dir
-    src_dir = os.path.dirname(contacts_dir)
-    project_root = os.path.dirname(src_dir)
-    
-    # Try the project root
-    db_dir = os.path.join(project_root, 'databases')
-    db_path = os.path.join(db_dir, 'database.db')
-    
-    if not os.path.exists(db_dir):
-        try:
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"Created database directory: {db_dir}")
-        except Exception as e:
-            print(f"Could not create database directory: {e}")
-            
-            # Try user's home directory as fallback
-            user_home = os.path.expanduser("~")
-            db_dir = os.path.join(user_home, 'databases')
-            db_path = os.path.join(db_dir, 'database.db')
-            
-            if not os.path.exists(db_dir):
-                try:
-                    os.makedirs(db_dir, exist_ok=True)
-                    print(f"Created fallback database directory in user home: {db_dir}")
-                except Exception as e2:
-                    print(f"Error creating fallback directory: {e2}")
-    
-    print(f"Using database at: {db_path}")
-    return db_path
-
-# Get the database path
-db_path = get_db_path()
+# Shared pooled connections (src/crm/db.py)
+from crm.db import connect
+from crm.campaigns import get_campaign_stats, get_campaign_totals
 
 class ContactCampaignWindow(QMainWindow):
     def __init__(self):
@@ -182,21 +118,18 @@ class ContactCampaignWindow(QMainWindow):
     def load_campaigns(self):
         """Load campaigns from the database."""
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
-            # Query campaigns with contact counts
+            # Query campaigns; contact counts come from the per-state counters
             cursor.execute("""
-                SELECT 
-                    c.campaign_id, 
-                    c.campaign_name, 
-                    c.created_at,
-                    (SELECT COUNT(*) FROM contacts_campaign cc WHERE cc.campaign_id = c.campaign_id) as contact_count
-                FROM campaigns c
-                ORDER BY c.created_at DESC
+                SELECT campaign_id, campaign_name, created_at
+                FROM campaigns
+                ORDER BY created_at DESC
             """)
             
             campaigns = cursor.fetchall()
+            contact_counts = get_campaign_totals(conn, 'contacts_campaign')
             conn.close()
             
             # Clear the table
@@ -204,7 +137,8 @@ class ContactCampaignWindow(QMainWindow):
             
             # Add campaigns to the table
             for row, campaign in enumerate(campaigns):
-                campaign_id, name, created_at, contact_count = campaign
+                campaign_id, name, created_at = campaign
+                contact_count = contact_counts.get(campaign_id, 0)
                 
                 self.campaign_list.insertRow(row)
                 self.campaign_list.setItem(row, 0, QTableWidgetItem(str(campaign_id)))
@@ -264,44 +198,15 @@ class ContactCampaignWindow(QMainWindow):
         
         try:
             # Get stats from database
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Total contacts
-            cursor.execute(
-                "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ?", 
-                (self.selected_campaign_id,)
-            )
-            total = cursor.fetchone()[0]
-            
-            # Approved contacts
-            cursor.execute(
-                "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND current_state = 'approved'", 
-                (self.selected_campaign_id,)
-            )
-            approved = cursor.fetchone()[0]
-            
-            # Rejected contacts
-            cursor.execute(
-                "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND current_state = 'rejected'", 
-                (self.selected_campaign_id,)
-            )
-            rejected = cursor.fetchone()[0]
-            
-            # Undecided contacts
-            cursor.execute(
-                "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND current_state = 'undecided'", 
-                (self.selected_campaign_id,)
-            )
-            undecided = cursor.fetchone()[0]
-            
+            conn = connect()
+            stats = get_campaign_stats(conn, 'contacts_campaign', self.selected_campaign_id)
             conn.close()
             
             # Update labels
-            self.total_contacts_label.setText(f"Total Contacts: {total}")
-            self.approved_contacts_label.setText(f"Approved: {approved}")
-            self.rejected_contacts_label.setText(f"Rejected: {rejected}")
-            self.undecided_contacts_label.setText(f"Undecided: {undecided}")
+            self.total_contacts_label.setText(f"Total Contacts: {stats['total']}")
+            self.approved_contacts_label.setText(f"Approved: {stats['approved']}")
+            self.rejected_contacts_label.setText(f"Rejected: {stats['rejected']}")
+            self.undecided_contacts_label.setText(f"Undecided: {stats['undecided']}")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error updating campaign stats: {str(e)}")
@@ -325,7 +230,7 @@ class ContactCampaignWindow(QMainWindow):
             
         try:
             # Connect to the database
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Query distinct batch tags and their contact counts
@@ -436,7 +341,7 @@ class ContactCampaignWindow(QMainWindow):
             return
             
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Get current count
@@ -597,7 +502,7 @@ class SearchContactsDialog(QDialog):
     def load_approved_companies(self):
         """Load approved companies for the selected campaign."""
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Get approved companies for this campaign
@@ -630,7 +535,7 @@ class SearchContactsDialog(QDialog):
     def load_contact_tags(self):
         """Load available contact tags"""
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Query for distinct contact tags
@@ -748,7 +653,7 @@ ORDER BY c.Name, c.Last_Name""".format(self.campaign_id)
             return
         
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Check which contacts are already in the campaign
@@ -906,7 +811,7 @@ ORDER BY c.Name, c.Last_Name""".format(self.campaign_id)
             batch_tag = f"manual_add_{timestamp}"
         
         try:
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             
             # Generate batch identifier
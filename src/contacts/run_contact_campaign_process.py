@@ -10,77 +10,22 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Make the database path accessible with fallback
-def get_db_path():
-    """Determine the appropriate database path"""
-    # Try the project root first
-    file_dir = os.path.dirname(os.path.abspath(__file__))
-    contacts_dir = file_dir
-    src_dir = os.path.dirname(contacts_dir)
-    project_root = os.path.dirname(src_dir)
-    
-    db_dir = os.path.join(project_root, 'databases')
-    db_path = os.path.join(db_dir, 'database.db')
-    
-    # Ensure the database directory exists
-    if not os.path.exists(db_dir):
-        try:
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"Created database directory: {db_dir}")
-        except Exception as e:
-            print(f"Could not create database directory: {e}")
-            
-            # Try user's home directory as fallback
-            user_home = os.path.expanduser("~")
-            db_dir = os.path.join(user_home, 'databases')
-            db_path = os.path.join(db_dir, 'database.db')
-            
-            if not os.path.exists(db_dir):
-                try:
-                    os.makedirs(db_dir, exist_ok=True)
-                    print(f"Created fallback database directory in user home: {db_dir}")
-                except Exception as e2:
-                    print(f"Error creating fallback directory: {e2}")
-    
-    print(f"Using database at: {db_path}")
-    return db_path
-
-# Get the database path
-db_path = get_db_path()
+# Shared pooled connections (src/crm/db.py)
+from crm.db import connect
+from crm.domains import resolve_company_id
+from crm.campaigns import get_campaign_stats as read_campaign_stats
 
 def get_campaign_stats(campaign_id):
     """Get statistics for a campaign."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Get total count
-    cursor.execute(
-        "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ?", 
-        (campaign_id,)
-    )
-    total = cursor.fetchone()[0]
-    
-    # Get count by state
-    states = {}
-    for state in ['undecided', 'approved', 'rejected']:
-        cursor.execute(
-            "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND current_state = ?", 
-            (campaign_id, state)
-        )
-        states[state] = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    return {
-        'total': total,
-        'undecided': states['undecided'],
-        'approved': states['approved'],
-        'rejected': states['rejected']
-    }
+    conn = connect()
+    try:
+        return read_campaign_stats(conn, 'contacts_campaign', campaign_id)
+    finally:
+        conn.close()
 
 def list_campaigns():
     """List all available campaigns."""
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     cursor.execute("SELECT campaign_id, campaign_name, created_at FROM campaigns ORDER BY created_at DESC")
@@ -120,7 +65,7 @@ def select_campaign():
             campaign_id = int(campaign_id)
             
             # Verify campaign exists
-            conn = sqlite3.connect(db_path)
+            conn = connect()
             cursor = conn.cursor()
             cursor.execute("SELECT campaign_name FROM campaigns WHERE campaign_id = ?", (campaign_id,))
             result = cursor.fetchone()
@@ -149,7 +94,7 @@ def select_campaign():
 
 def get_company_ids_for_campaign(campaign_id):
     """Get all company IDs in a campaign with approved status."""
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     cursor.execute(
@@ -167,7 +112,7 @@ def search_contacts_for_companies(company_ids, search_query=None):
     if not company_ids:
         return []
     
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     query = """
@@ -234,7 +179,7 @@ def add_contacts_to_campaign(campaign_id, campaign_name, contact_ids):
         batch_tag = f"cli_add_{timestamp}"
         print(f"Using default batch tag: {batch_tag}")
     
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     # Generate batch identifier
@@ -247,12 +192,16 @@ def add_contacts_to_campaign(campaign_id, campaign_name, contact_ids):
         try:
             # Get company_id for this contact
             cursor.execute(
-                "SELECT company_id FROM contacts WHERE contact_id = ?",
+                "SELECT company_id, Website FROM contacts WHERE contact_id = ?",
                 (contact_id,)
             )
             result = cursor.fetchone()
             company_id = result[0] if result else None
             
+            # Contacts scraped before their company was imported have no company_id yet
+            if not company_id and result and result[1]:
+                company_id = resolve_company_id(result[1])
+            
             cursor.execute(
                 """
                 INSERT INTO contacts_campaign 
@@ -345,7 +294,7 @@ def clear_campaign_contacts():
         return
     
     # Clear contacts
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     # Get current count
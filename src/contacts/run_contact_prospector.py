@@ -1,9 +1,9 @@
 import os
 import sys
-import sqlite3
 import webbrowser
 import time
 import subprocess
+import threading
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
                            QHBoxLayout, QWidget, QLabel, QGroupBox, QComboBox,
@@ -31,26 +31,15 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Make the database path accessible - use absolute path for reliability
-db_path = r"C:\Users\EliasTsoukatos\Documents\software_code\Elias_CRM\databases\database.db"
-
-# Verify database path exists
-if not os.path.exists(db_path):
-    print(f"ERROR: Database not found at {db_path}")
-    
-    # Try to find it using relative path
-    fallback_path = os.path.join(project_root, 'databases', 'database.db')
-    if os.path.exists(fallback_path):
-        print(f"Using fallback database path: {fallback_path}")
-        db_path = fallback_path
-    else:
-        print(f"Fallback database path not found either: {fallback_path}")
-
-print(f"Using database at: {db_path}")
+# Shared pooled connections (src/crm/db.py)
+from crm.db import connect
+from crm.campaigns import get_campaign_stats as read_campaign_stats
+from crm.state_updates import (queue_state_update, flush_state_updates, close_state_writer,
+                                add_failure_handler, remove_failure_handler)
 
 def get_campaigns():
     """Get all campaigns from the database."""
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     cursor.execute("SELECT campaign_id, campaign_name, created_at FROM campaigns ORDER BY created_at DESC")
@@ -61,7 +50,8 @@ def get_campaigns():
 
 def get_campaign_contacts(campaign_id, state='undecided', batch_id=None):
     """Get all contacts for a given campaign with specified state."""
-    conn = sqlite3.connect(db_path)
+    flush_state_updates()  # read back decisions still queued
+    conn = connect()
     cursor = conn.cursor()
     
     query = """
@@ -103,7 +93,7 @@ def get_campaign_contacts(campaign_id, state='undecided', batch_id=None):
 
 def get_campaign_batches(campaign_id):
     """Get all batches for a campaign."""
-    conn = sqlite3.connect(db_path)
+    conn = connect()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -121,54 +111,39 @@ def get_campaign_batches(campaign_id):
 
 def get_campaign_stats(campaign_id, batch_id=None):
     """Get campaign statistics (approved, rejected, undecided counts)."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    stats = {}
-    states = ['undecided', 'approved', 'rejected']
-    
-    for state in states:
-        query = "SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND current_state = ?"
-        params = [campaign_id, state]
-        
-        if batch_id:
-            query += " AND campaign_batch_id = ?"
-            params.append(batch_id)
-            
-        cursor.execute(query, params)
-        stats[state] = cursor.fetchone()[0]
-    
-    conn.close()
-    return stats
+    flush_state_updates()  # count decisions still queued
+    conn = connect()
+    try:
+        return read_campaign_stats(conn, 'contacts_campaign', campaign_id, batch_id or None)
+    finally:
+        conn.close()
 
-def update_contact_state(counter, new_state, reason=None, notes=None):
-    """Update a contact's state in a campaign."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    if reason and notes:
-        cursor.execute(
-            "UPDATE contacts_campaign SET current_state = ?, reason = ?, notes = ? WHERE counter = ?",
-            (new_state, reason, notes, counter)
-        )
-    elif reason:
-        cursor.execute(
-            "UPDATE contacts_campaign SET current_state = ?, reason = ? WHERE counter = ?",
-            (new_state, reason, counter)
-        )
-    elif notes:
-        cursor.execute(
-            "UPDATE contacts_campaign SET current_state = ?, notes = ? WHERE counter = ?",
-            (new_state, notes, counter)
-        )
-    else:
-        cursor.execute(
-            "UPDATE contacts_campaign SET current_state = ? WHERE counter = ?",
-            (new_state, counter)
+def get_contact_states(counters):
+    """Current state and notes of campaign contacts, by counter."""
+    flush_state_updates()  # read back decisions still queued
+    conn = connect()
+    try:
+        placeholders = ", ".join("?" for _ in counters)
+        cursor = conn.execute(
+            f"SELECT counter, current_state, notes FROM contacts_campaign WHERE counter IN ({placeholders})",
+            list(counters)
         )
-    
-    conn.commit()
-    conn.close()
+        return {counter: (state, notes) for counter, state, notes in cursor.fetchall()}
+    finally:
+        conn.close()
+
+def update_contact_state(counter, new_state, reason=None, notes=None):
+    """
+    Update a contact's state in a campaign.
+
+    The update is queued and written in the background (see crm.state_updates).
+    """
+    values = {'current_state': new_state}
+    if reason:
+        values['reason'] = reason
+    if notes:
+        values['notes'] = notes
+    queue_state_update('contacts_campaign', {'counter': counter}, values)
     return True
 
 class BrowserThread(QThread):
@@ -249,6 +224,9 @@ class BrowserThread(QThread):
             pass
 
 class ContactProspectorWindow(QMainWindow):
+    # Emitted from the state writer thread when decisions could not be saved
+    decisions_failed = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Contact Prospector")
@@ -260,6 +238,7 @@ class ContactProspectorWindow(QMainWindow):
         self.current_campaign_id = None
         self.current_campaign_name = None
         self.current_batch_id = None
+        self.stats = None
         self.contacts = []
         self.current_index = 0
         
@@ -271,6 +250,12 @@ class ContactProspectorWindow(QMainWindow):
         
         self.driver = None  # Will be set when browser is ready
         
+        # Decisions the background writer could not save
+        self.failed_updates = []
+        self.failed_updates_lock = threading.Lock()
+        self.decisions_failed.connect(self.on_decisions_failed)
+        add_failure_handler(self.on_state_write_failure)
+        
         self.init_ui()
         self.load_campaigns()
         
@@ -549,7 +534,22 @@ class ContactProspectorWindow(QMainWindow):
         if not self.current_campaign_id:
             return
             
-        stats = get_campaign_stats(self.current_campaign_id, self.current_batch_id)
+        self.stats = get_campaign_stats(self.current_campaign_id, self.current_batch_id)
+        self.show_stats()
+    
+    def adjust_stats(self, old_state, new_state):
+        """Moves one contact from old_state to new_state in the displayed statistics."""
+        if self.stats is None or old_state == new_state:
+            return
+        if old_state in self.stats:
+            self.stats[old_state] -= 1
+        if new_state in self.stats:
+            self.stats[new_state] += 1
+        self.show_stats()
+    
+    def show_stats(self):
+        """Display the campaign statistics."""
+        stats = self.stats
         
         total = stats['undecided'] + stats['approved'] + stats['rejected']
         self.total_label.setText(f"Total: {total}")
@@ -672,8 +672,53 @@ class ContactProspectorWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Could not open LinkedIn URL: {str(e)}")
     
+    def on_state_write_failure(self, updates):
+        """Failure handler of the state writer; runs on the writer thread."""
+        with self.failed_updates_lock:
+            self.failed_updates.extend(updates)
+        self.decisions_failed.emit()
+    
+    def take_failed_updates(self):
+        with self.failed_updates_lock:
+            updates, self.failed_updates = self.failed_updates, []
+        return updates
+    
+    def on_decisions_failed(self):
+        """Reverts the contacts whose decision could not be saved to their state in the database."""
+        updates = self.take_failed_updates()
+        if not updates:
+            return
+        
+        counters = {where['counter'] for table, where, values in updates
+                    if table == 'contacts_campaign' and 'counter' in where}
+        saved_states = get_contact_states(counters) if counters else {}
+        for index, contact in enumerate(self.contacts):
+            if contact[0] in saved_states:
+                contact_list = list(contact)
+                contact_list[13], notes = saved_states[contact[0]]
+                if len(contact_list) > 16:
+                    contact_list[16] = notes
+                self.contacts[index] = tuple(contact_list)
+        
+        self.update_stats()
+        self.display_current_contact()
+        QMessageBox.warning(
+            self, "Decisions Not Saved",
+            f"{len(updates)} decision(s) could not be saved to the database and were reverted."
+        )
+    
     def closeEvent(self, event):
         """Clean up resources when window is closed."""
+        # Write the decisions still queued
+        close_state_writer()
+        remove_failure_handler(self.on_state_write_failure)
+        unsaved = self.take_failed_updates()
+        if unsaved:
+            QMessageBox.warning(
+                self, "Decisions Not Saved",
+                f"{len(unsaved)} decision(s) could not be saved to the database."
+            )
+        
         try:
             # Clean up browser thread
             if hasattr(self, 'browser_thread') and self.browser_thread is not None:
@@ -698,18 +743,13 @@ class ContactProspectorWindow(QMainWindow):
         # Get notes from the text edit
         notes = self.notes_edit.toPlainText().strip()
         
-        # Update the database
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE contacts_campaign SET current_state = ?, notes = ? WHERE counter = ?",
-            (new_state, notes, counter)
-        )
-        conn.commit()
-        conn.close()
+        # Queue the database update (written in the background)
+        queue_state_update('contacts_campaign', {'counter': counter},
+                           {'current_state': new_state, 'notes': notes})
         
         # Update the display - handle both formats (with or without notes)
         contact_list = list(self.contacts[self.current_index])
+        old_state = contact_list[13]
         
         if len(contact_list) == 16:  # Old format without notes
             # Add notes to the end of the tuple
@@ -725,8 +765,8 @@ class ContactProspectorWindow(QMainWindow):
         # Display the updated contact
         self.display_current_contact()
         
-        # Update stats
-        self.update_stats()
+        # Update stats (moved between states locally, the write may still be queued)
+        self.adjust_stats(old_state, new_state)
         
         # Automatically move to next contact if available
         if self.current_index < len(self.contacts) - 1:
@@ -0,0 +1,219 @@
+"""
+Set-based helpers to fill companies_campaign from a user's SQL query.
+
+The query is only ever used as a subquery, so its rows stay inside SQLite:
+
+    columns, total = describe_query(conn, query)
+    added = add_companies_from_query(conn, query, campaign_id, campaign_name,
+                                     batch_tag, batch_id, limit=500)
+
+add_companies_from_query() is one INSERT OR IGNORE ... SELECT statement that
+skips companies already in the campaign (UNIQUE(company_id, campaign_id)) and
+returns the number of rows inserted. Nothing is committed here.
+
+Campaign statistics come from campaign_state_counts, a (table, campaign,
+state) -> count table kept up to date by triggers on companies_campaign and
+contacts_campaign (installed by ensure_state_counts() when the schema is
+created). get_campaign_stats() reads it in one indexed lookup, or falls back
+to a single GROUP BY current_state when the triggers aren't installed yet or
+when filtering by batch.
+"""
+
+STATES = ('undecided', 'approved', 'rejected')
+
+# Campaign tables whose rows are counted per state
+STATE_COUNT_TABLES = ('companies_campaign', 'contacts_campaign')
+
+# NULL campaign ids / states are counted under 0 / '' (the key can't be NULL)
+STATE_COUNT_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_state_counts_insert
+AFTER INSERT ON {table}
+BEGIN
+    INSERT INTO campaign_state_counts (table_name, campaign_id, state, count)
+    VALUES ('{table}', IFNULL(NEW.campaign_id, 0), IFNULL(NEW.current_state, ''), 1)
+    ON CONFLICT (table_name, campaign_id, state) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_state_counts_delete
+AFTER DELETE ON {table}
+BEGIN
+    UPDATE campaign_state_counts SET count = count - 1
+    WHERE table_name = '{table}' AND campaign_id = IFNULL(OLD.campaign_id, 0)
+    AND state = IFNULL(OLD.current_state, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS {table}_state_counts_update
+AFTER UPDATE OF current_state, campaign_id ON {table}
+WHEN OLD.current_state IS NOT NEW.current_state OR OLD.campaign_id IS NOT NEW.campaign_id
+BEGIN
+    UPDATE campaign_state_counts SET count = count - 1
+    WHERE table_name = '{table}' AND campaign_id = IFNULL(OLD.campaign_id, 0)
+    AND state = IFNULL(OLD.current_state, '');
+    INSERT INTO campaign_state_counts (table_name, campaign_id, state, count)
+    VALUES ('{table}', IFNULL(NEW.campaign_id, 0), IFNULL(NEW.current_state, ''), 1)
+    ON CONFLICT (table_name, campaign_id, state) DO UPDATE SET count = count + 1;
+END;
+"""
+
+
+def normalize_query(query):
+    """
+    Strips whitespace and trailing semicolons so the query can be nested.
+
+    Callers put the query on lines of its own, so a trailing -- comment can't
+    swallow the closing parenthesis.
+    """
+    return query.strip().rstrip(";").strip()
+
+
+def describe_query(conn, query):
+    """
+    Returns (column names, row count) of a query without fetching its rows.
+
+    Raises sqlite3.Error if the query is invalid.
+    """
+    query = normalize_query(query)
+    cursor = conn.execute(f"SELECT * FROM (\n{query}\n) LIMIT 0")
+    columns = [column[0] for column in cursor.description]
+    total = conn.execute(f"SELECT COUNT(*) FROM (\n{query}\n)").fetchone()[0]
+    return columns, total
+
+
+def count_new_companies(conn, query, campaign_id):
+    """Distinct companies of the query that are not in the campaign yet."""
+    query = normalize_query(query)
+    return conn.execute(f"""
+        SELECT COUNT(DISTINCT q.company_id) FROM (
+{query}
+        ) q
+        WHERE q.company_id IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM companies_campaign cc
+            WHERE cc.campaign_id = ? AND cc.company_id = q.company_id
+        )
+    """, (campaign_id,)).fetchone()[0]
+
+
+def add_companies_from_query(conn, query, campaign_id, campaign_name, batch_tag, batch_id, limit=None):
+    """
+    Inserts up to `limit` companies of the query (all if None) into the campaign.
+
+    Companies already in the campaign don't count towards the limit.
+    Returns the number of companies added.
+    """
+    query = normalize_query(query)
+    conn.execute(f"""
+        INSERT OR IGNORE INTO companies_campaign
+            (company_id, campaign_id, campaign_name, campaign_batch_tag, campaign_batch_id)
+        SELECT q.company_id, ?, ?, ?, ?
+        FROM (
+{query}
+        ) q
+        WHERE q.company_id IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM companies_campaign cc
+            WHERE cc.campaign_id = ? AND cc.company_id = q.company_id
+        )
+        LIMIT ?
+    """, (campaign_id, campaign_name, batch_tag, batch_id, campaign_id, -1 if limit is None else limit))
+    return conn.execute("SELECT changes()").fetchone()[0]
+
+
+def _check_table(table):
+    if table not in STATE_COUNT_TABLES:
+        raise ValueError(f"No state counts for table {table!r}")
+
+
+def has_state_counts(conn, table):
+    """True if campaign_state_counts is maintained for table."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+        (f"{table}_state_counts_insert",)
+    ).fetchone() is not None
+
+
+def ensure_state_counts(conn):
+    """
+    Creates campaign_state_counts and installs its triggers on every campaign
+    table that exists. A table getting its triggers for the first time has its
+    counts rebuilt, in the same transaction, from its current rows.
+    """
+    began = not conn.in_transaction
+    if began:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS campaign_state_counts (
+                table_name TEXT NOT NULL,
+                campaign_id INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (table_name, campaign_id, state)
+            ) WITHOUT ROWID
+        """)
+        for table in STATE_COUNT_TABLES:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if not exists or has_state_counts(conn, table):
+                continue
+            for statement in STATE_COUNT_TRIGGERS.format(table=table).split("END;"):
+                if statement.strip():
+                    conn.execute(statement + "END;")
+            conn.execute("DELETE FROM campaign_state_counts WHERE table_name = ?", (table,))
+            conn.execute(f"""
+                INSERT INTO campaign_state_counts (table_name, campaign_id, state, count)
+                SELECT ?, IFNULL(campaign_id, 0), IFNULL(current_state, ''), COUNT(*)
+                FROM {table}
+                GROUP BY 2, 3
+            """, (table,))
+        if began:
+            conn.commit()
+    except Exception:
+        if began:
+            conn.rollback()
+        raise
+
+
+def get_campaign_stats(conn, table, campaign_id, batch_id=None):
+    """
+    Counts of a campaign's rows per state, plus 'total'.
+
+    :param table: 'companies_campaign' or 'contacts_campaign'.
+    :param batch_id: Only count rows of this campaign_batch_id.
+    :return: {'total': ..., 'undecided': ..., 'approved': ..., 'rejected': ...}
+             (other states found in the table are included too).
+    """
+    _check_table(table)
+    if batch_id is None and has_state_counts(conn, table):
+        rows = conn.execute(
+            "SELECT state, count FROM campaign_state_counts "
+            "WHERE table_name = ? AND campaign_id = ? AND count > 0",
+            (table, campaign_id)
+        ).fetchall()
+    else:
+        query = f"SELECT IFNULL(current_state, ''), COUNT(*) FROM {table} WHERE campaign_id = ?"
+        params = [campaign_id]
+        if batch_id is not None:
+            query += " AND campaign_batch_id = ?"
+            params.append(batch_id)
+        rows = conn.execute(query + " GROUP BY 1", params).fetchall()
+
+    stats = {state: 0 for state in STATES}
+    stats.update({state: count for state, count in rows})
+    stats['total'] = sum(count for _, count in rows)
+    return stats
+
+
+def get_campaign_totals(conn, table):
+    """Number of rows of table per campaign, as {campaign_id: total}."""
+    _check_table(table)
+    if has_state_counts(conn, table):
+        rows = conn.execute(
+            "SELECT campaign_id, SUM(count) FROM campaign_state_counts "
+            "WHERE table_name = ? GROUP BY campaign_id",
+            (table,)
+        ).fetchall()
+    else:
+        rows = conn.execute(f"SELECT campaign_id, COUNT(*) FROM {table} GROUP BY campaign_id").fetchall()
+    return dict(rows)
@@ -0,0 +1,213 @@
+"""
+Shared database access layer.
+
+The database path is resolved once per process and connections are handed
+out from a small pool instead of being opened (and probed for) on every
+call. Modules import it after putting the ``src`` directory on sys.path:
+
+    from crm.db import get_connection
+
+    with get_connection() as conn:
+        conn.execute("SELECT ...")
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# RUTA HARDCODEADA A LA BASE DE DATOS (ajústala si es necesario)
+HARD_CODED_DB_PATH = r"C:\Users\EliasTsoukatos\Documents\software_code\Elias_CRM\databases\database.db"
+
+# src/crm/db.py -> project root
+DEFAULT_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Idle connections kept around for reuse; extra ones are really closed
+MAX_IDLE_CONNECTIONS = 8
+
+# Seconds a connection waits on a locked database before raising
+BUSY_TIMEOUT = 30
+
+_db_path = None
+_path_lock = threading.Lock()
+
+
+def _ensure_folder(db_path):
+    """Returns True if the folder of db_path exists or could be created."""
+    db_folder = os.path.dirname(db_path)
+    if not db_folder:
+        return False
+    try:
+        os.makedirs(db_folder, exist_ok=True)
+        return True
+    except OSError:
+        return False
+
+
+def _candidate_paths():
+    """Database locations in the order every module used to try them."""
+    candidates = [os.environ.get('DB_PATH'), HARD_CODED_DB_PATH]
+
+    project_root = os.environ.get('PROJECT_ROOT') or DEFAULT_PROJECT_ROOT
+    candidates.append(os.path.join(project_root, 'databases', 'database.db'))
+
+    candidates.append(os.path.join(os.path.expanduser("~"), 'databases', 'database.db'))
+
+    if os.name == 'nt':  # Windows
+        appdata = os.environ.get('APPDATA', '')
+        if appdata:
+            candidates.append(os.path.join(appdata, 'Elias_CRM', 'databases', 'database.db'))
+
+    return [path for path in candidates if path]
+
+
+def get_db_path():
+    """
+    Returns the absolute path to the database.
+
+    The fallback chain (DB_PATH, hardcoded Windows path, PROJECT_ROOT,
+    home directory, APPDATA) is only walked the first time.
+    """
+    global _db_path
+    if _db_path is None:
+        with _path_lock:
+            if _db_path is None:
+                for candidate in _candidate_paths():
+                    if _ensure_folder(candidate):
+                        _db_path = os.path.abspath(candidate)
+                        break
+                else:
+                    raise Exception("Could not resolve a database path with any of the fallback paths")
+                print(f"🔍 Using database at: {_db_path}")
+    return _db_path
+
+
+def set_db_path(db_path):
+    """Points the pool at a different database file, closing idle connections."""
+    global _db_path
+    with _path_lock:
+        _pool.close_all()
+        _db_path = os.path.abspath(db_path) if db_path else None
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose close() hands it back to the pool.
+
+    Legacy call sites that do ``conn = connect(); ...; conn.close()`` keep
+    working unchanged, they just stop paying for a new connection each time.
+    """
+
+    def close(self):
+        _pool.release(self)
+
+    def _close(self):
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of preconfigured SQLite connections.
+
+    Connections are created with check_same_thread=False so that a connection
+    released by one thread can be checked out by another; a connection is
+    only ever used by the thread that currently holds it.
+    """
+
+    def __init__(self, max_idle=MAX_IDLE_CONNECTIONS):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _configure(self, conn):
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000};")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -16000;")
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = sqlite3.connect(
+                get_db_path(),
+                timeout=BUSY_TIMEOUT,
+                check_same_thread=False,
+                factory=PooledConnection,
+            )
+            self._configure(conn)
+        conn._pool_idle = False
+        return conn
+
+    def release(self, conn):
+        if getattr(conn, '_pool_idle', False):
+            return  # already returned (close() called twice)
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.isolation_level = ""
+        except sqlite3.ProgrammingError:
+            return  # connection is unusable, drop it
+        conn._pool_idle = True
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn._close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn._close()
+            except sqlite3.Error:
+                pass
+
+
+_pool = ConnectionPool()
+
+
+def connect(row_factory=None):
+    """
+    Checks a connection out of the pool.
+
+    Call close() on it when done; that returns it to the pool and rolls back
+    anything left uncommitted.
+    """
+    conn = _pool.acquire()
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    return conn
+
+
+@contextmanager
+def get_connection(row_factory=None):
+    """
+    Context manager around a pooled connection.
+
+    Commits on success, rolls back on error and always returns the
+    connection to the pool.
+    """
+    conn = connect(row_factory)
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def close_all():
+    """Closes every idle pooled connection (call on application exit)."""
+    _pool.close_all()
+
+
+atexit.register(close_all)
@@ -0,0 +1,350 @@
+"""
+Website -> company resolver.
+
+Company domains are normalized into the company_domains table:
+
+    host                 acme.co.uk / blog.acme.com (PRIMARY KEY)
+    reversed_host        uk.co.acme / com.acme.blog (indexed)
+    registrable_domain   acme.co.uk / acme.com      (indexed)
+
+A website is matched with index lookups only, from most to least specific:
+the exact host, any parent host (blog.acme.com -> acme.com), any company
+hosted on a subdomain of it (a range scan over reversed_host) and finally any
+company on the same registrable domain. Unlike ``domain LIKE '%site%'`` this
+never scans the companies table and never matches acme.com to notacme.com.
+Shared hosting domains (github.io, herokuapp.com, ...) count as suffixes, so
+foo.github.io is never matched to a company on bar.github.io.
+
+company_domains is filled from companies incrementally (by rowid), so the
+statements that write companies don't need to maintain it. Triggers on
+companies count the edits and deletes of domains in company_domains_sync; the
+next sync after one rebuilds company_domains. The table and triggers are set
+up at startup (ensure_company_domains, next to apply_indexes) and the sync
+runs from the code that writes companies (sync_company_domains), inside the
+caller's transaction. Lookups only read, so resolving a website never waits
+on a caller's open write transaction. Results are kept in a small LRU cache
+in front of the database.
+
+    from crm.domains import resolve_company_id, sync_company_domains
+
+    company_id = resolve_company_id("https://www.blog.acme.com/team")
+
+    # after writing companies, on the same connection
+    sync_company_domains(conn)
+    conn.commit()
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from crm.db import get_connection
+
+# Second-level labels under which registrations happen one level deeper (acme.co.uk)
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "net.nz",
+    "co.za", "org.za",
+    "co.jp", "ne.jp", "or.jp",
+    "co.in", "net.in", "org.in", "firm.in",
+    "co.il", "org.il",
+    "co.kr", "or.kr",
+    "com.br", "net.br", "org.br",
+    "com.mx", "org.mx",
+    "com.ar", "com.co", "com.pe", "com.ve", "com.uy", "com.ec", "com.bo", "com.py",
+    "com.cn", "net.cn", "org.cn",
+    "com.hk", "com.sg", "com.my", "com.tw", "com.tr", "com.ua", "com.pl",
+    "com.es", "com.pt", "com.ph", "com.pk", "com.ng", "com.eg", "com.sa",
+}
+
+# Hosting domains whose subdomains belong to unrelated customers
+SHARED_HOST_SUFFIXES = {
+    "github.io", "gitlab.io", "herokuapp.com", "netlify.app", "vercel.app", "pages.dev",
+    "web.app", "firebaseapp.com", "appspot.com", "azurewebsites.net", "cloudfront.net",
+    "wixsite.com", "wordpress.com", "blogspot.com", "squarespace.com", "weebly.com",
+    "webflow.io", "myshopify.com", "business.site", "godaddysites.com", "square.site",
+    "carrd.co", "notion.site", "substack.com", "framer.website", "glitch.me", "onrender.com",
+}
+
+# Domains under which every label is a separate registration
+PUBLIC_SUFFIXES = MULTI_LABEL_SUFFIXES | SHARED_HOST_SUFFIXES
+
+# Resolved websites kept in memory per process
+CACHE_SIZE = 4096
+
+# Seconds between checks whether company_domains changed since results were cached
+SYNC_INTERVAL = 30
+
+
+def normalize_host(website):
+    """
+    Reduces a website or domain to its lowercase host without www.
+
+    "https://www.Acme.com:443/team" -> "acme.com"
+    """
+    if not website:
+        return ""
+    website = website.strip().lower()
+    if "://" not in website:
+        website = "https://" + website
+    try:
+        host = urlparse(website).hostname or ""
+    except ValueError:
+        return ""
+    host = host.strip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def registrable_domain(host):
+    """
+    The registered part of a host: blog.acme.co.uk -> acme.co.uk,
+    blog.acme.github.io -> acme.github.io.
+    """
+    labels = host.split(".")
+    for i in range(1, len(labels) - 1):
+        if ".".join(labels[i:]) in PUBLIC_SUFFIXES:
+            return ".".join(labels[i - 1:])
+    return ".".join(labels[-2:])
+
+
+def reverse_labels(host):
+    """acme.com -> com.acme, so that subdomains sort right after their parent."""
+    return ".".join(reversed(host.split(".")))
+
+
+# Count edits and deletes of company domains; inserts are picked up by rowid
+SYNC_TRIGGERS = {
+    "company_domains_on_update": """
+        CREATE TRIGGER IF NOT EXISTS company_domains_on_update
+        AFTER UPDATE OF company_id, domain, website ON companies
+        WHEN OLD.company_id IS NOT NEW.company_id
+            OR OLD.domain IS NOT NEW.domain
+            OR OLD.website IS NOT NEW.website
+        BEGIN
+            UPDATE company_domains_sync SET changes = changes + 1;
+        END;
+    """,
+    "company_domains_on_delete": """
+        CREATE TRIGGER IF NOT EXISTS company_domains_on_delete
+        AFTER DELETE ON companies
+        BEGIN
+            UPDATE company_domains_sync SET changes = changes + 1;
+        END;
+    """,
+}
+
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def _ensure_triggers(conn):
+    """
+    Installs the sync triggers on companies. They're dropped with the table
+    (DROP TABLE + RENAME migrations); a table getting them anew is counted as
+    changed. Returns False if there's no companies table yet.
+    """
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'companies'"
+    )}
+    if set(SYNC_TRIGGERS) <= existing:
+        return True
+    if not _table_exists(conn, "companies"):
+        return False
+    for name, statement in SYNC_TRIGGERS.items():
+        if name not in existing:
+            conn.execute(statement)
+    conn.execute("UPDATE company_domains_sync SET changes = changes + 1")
+    return True
+
+
+def ensure_company_domains(conn):
+    """
+    Creates company_domains, its sync state and the triggers on companies, and
+    brings company_domains up to date. Runs at startup (db_initializer and the
+    Cognism scraper's create_table) and after migrations that rebuild companies.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS company_domains (
+            host TEXT PRIMARY KEY,
+            reversed_host TEXT NOT NULL,
+            registrable_domain TEXT NOT NULL,
+            company_id TEXT NOT NULL,
+            company_rowid INTEGER
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_company_domains_reversed ON company_domains(reversed_host);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_company_domains_registrable ON company_domains(registrable_domain);")
+    # changes: edits/deletes counted by the triggers, built: changes at the last rebuild,
+    # last_rowid: last companies rowid added to company_domains
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS company_domains_sync (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            changes INTEGER NOT NULL,
+            built INTEGER NOT NULL,
+            last_rowid INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(company_domains_sync)")}
+    if "last_rowid" not in columns:
+        conn.execute("ALTER TABLE company_domains_sync ADD COLUMN last_rowid INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE company_domains_sync SET changes = changes + 1")
+    # A new sync table means company_domains (if any) predates it: rebuild
+    conn.execute("INSERT OR IGNORE INTO company_domains_sync (id, changes, built) VALUES (1, 1, 0)")
+    sync_company_domains(conn)
+    conn.commit()
+
+
+def sync_company_domains(conn):
+    """
+    Adds companies created since the last sync to company_domains, or
+    rebuilds it if companies had domains edited or deleted since.
+
+    Runs on the caller's connection and leaves committing to the caller, so
+    it can share the transaction that wrote the companies. The first company
+    registered for a host keeps it, like the import dedupe does.
+
+    :return: The number of hosts added.
+    """
+    if not _table_exists(conn, "company_domains_sync") or not _ensure_triggers(conn):
+        return 0  # not set up yet (ensure_company_domains) or no companies table
+
+    changes, built, last_rowid = conn.execute(
+        "SELECT changes, built, last_rowid FROM company_domains_sync"
+    ).fetchone()
+    if changes != built:
+        conn.execute("DELETE FROM company_domains")
+        last_rowid = 0
+
+    cursor = conn.execute("""
+        SELECT rowid, company_id, domain, website FROM companies
+        WHERE rowid > ?
+        ORDER BY rowid
+    """, (last_rowid,))
+    rows = []
+    for rowid, company_id, domain, website in cursor.fetchall():
+        last_rowid = rowid
+        host = normalize_host(domain) or normalize_host(website)
+        if host and company_id:
+            rows.append((host, reverse_labels(host), registrable_domain(host), company_id, rowid))
+    before = conn.total_changes
+    conn.executemany("""
+        INSERT OR IGNORE INTO company_domains
+        (host, reversed_host, registrable_domain, company_id, company_rowid)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    added = conn.total_changes - before
+    conn.execute("UPDATE company_domains_sync SET built = ?, last_rowid = ?", (changes, last_rowid))
+    return added
+
+
+class DomainResolver:
+    """
+    Resolves websites to company_ids through company_domains, with an LRU cache.
+
+    Read-only: company_domains is kept up to date by sync_company_domains.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, sync_interval=SYNC_INTERVAL):
+        self.cache_size = cache_size
+        self.sync_interval = sync_interval
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._state = None  # company_domains_sync row the cached results were read with
+        self._last_check = 0
+
+    def _check_state(self, conn):
+        """Drops the cached results if company_domains changed since they were read."""
+        now = time.monotonic()
+        if self._state is not None and now - self._last_check < self.sync_interval:
+            return
+        self._last_check = now
+        try:
+            state = conn.execute("SELECT built, last_rowid FROM company_domains_sync").fetchone()
+        except sqlite3.OperationalError:
+            state = None  # not set up yet
+        with self._lock:
+            if state != self._state:
+                self._cache.clear()
+                self._state = state
+
+    def _lookup(self, conn, host):
+        # 1. Exact host, then the closest parent host (blog.acme.com -> acme.com)
+        labels = host.split(".")
+        base = registrable_domain(host)
+        candidates = []
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            candidates.append(candidate)
+            if candidate == base:
+                break
+        placeholders = ",".join("?" * len(candidates))
+        row = conn.execute(f"""
+            SELECT company_id FROM company_domains
+            WHERE host IN ({placeholders})
+            ORDER BY LENGTH(host) DESC
+            LIMIT 1
+        """, candidates).fetchone()
+        if row:
+            return row[0]
+
+        # 2. A company hosted on a subdomain of this host (acme.com -> shop.acme.com)
+        prefix = reverse_labels(host) + "."
+        row = conn.execute("""
+            SELECT company_id FROM company_domains
+            WHERE reversed_host >= ? AND reversed_host < ?
+            ORDER BY LENGTH(reversed_host), reversed_host
+            LIMIT 1
+        """, (prefix, prefix[:-1] + "/")).fetchone()  # "/" sorts right after "."
+        if row:
+            return row[0]
+
+        # 3. Any company on the same registrable domain (blog.acme.com -> shop.acme.com)
+        row = conn.execute("""
+            SELECT company_id FROM company_domains
+            WHERE registrable_domain = ?
+            ORDER BY company_rowid
+            LIMIT 1
+        """, (base,)).fetchone()
+        return row[0] if row else None
+
+    def resolve(self, website):
+        """Returns the company_id matching website, or None."""
+        host = normalize_host(website)
+        # A bare suffix (com, co.uk, github.io) would match every company under it
+        if "." not in host or host in PUBLIC_SUFFIXES:
+            return None
+
+        with get_connection() as conn:
+            self._check_state(conn)
+            with self._lock:
+                if host in self._cache:
+                    self._cache.move_to_end(host)
+                    return self._cache[host]
+            try:
+                company_id = self._lookup(conn, host)
+            except sqlite3.OperationalError:
+                return None  # company_domains not created yet
+
+        with self._lock:
+            self._cache[host] = company_id
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return company_id
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+resolver = DomainResolver()
+
+
+def resolve_company_id(website):
+    """Shortcut for resolver.resolve(website)."""
+    return resolver.resolve(website)
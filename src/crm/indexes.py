@@ -0,0 +1,61 @@
+"""
+Versioned set of secondary indexes for the hot lookups and joins.
+
+apply_indexes() runs at startup (db_initializer and the Cognism scraper's
+create_table) and after migrations that rebuild a table. It compares the set
+with the indexes in sqlite_master, so an index dropped with its table (e.g.
+DROP TABLE + RENAME) is created again. Indexes on tables that don't exist yet
+are skipped. PRAGMA user_version records INDEX_VERSION once the whole set is
+in place; bump it when the set changes.
+"""
+
+INDEX_VERSION = 3
+
+# name -> (table, columns)
+INDEXES = {
+    "idx_companies_domain": ("companies", ("domain",)),
+    "idx_company_ratings_company_id": ("company_ratings", ("company_id",)),
+    "idx_contacts_contact_id": ("contacts", ("contact_id",)),
+    "idx_contacts_company_id": ("contacts", ("company_id",)),
+    "idx_contacts_cognism_url": ("contacts", ("Cognism_URL",)),
+    "idx_contacts_campaign_campaign_state": (
+        "contacts_campaign", ("campaign_id", "current_state", "campaign_batch_tag")
+    ),
+    # Batch tag list of the phone dialer
+    "idx_contacts_campaign_batch_tag": ("contacts_campaign", ("campaign_batch_tag",)),
+    "idx_companies_campaign_campaign_batch": (
+        "companies_campaign", ("campaign_id", "campaign_batch_id")
+    ),
+    # Keyset pagination of a campaign's companies on (added_at, counter)
+    "idx_companies_campaign_campaign_added": (
+        "companies_campaign", ("campaign_id", "added_at")
+    ),
+}
+
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")').fetchall()}
+
+
+def apply_indexes(conn):
+    """
+    Creates the missing indexes of INDEXES.
+
+    :return: True if the whole set is in place.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    complete = True
+    for index_name, (table, columns) in INDEXES.items():
+        if index_name in existing:
+            continue
+        if not set(columns) <= _table_columns(conn, table):
+            complete = False  # table not created yet, retried on the next startup
+            continue
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table}" ({column_list})')
+
+    if complete and conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    conn.commit()
+    return complete
@@ -0,0 +1,60 @@
+"""
+Cached view of the database schema.
+
+Built once from sqlite_master and PRAGMA table_info so that per-record code
+(custom table mapping in the preprocessor, the CSV import GUI) does not query
+the schema over and over. Code that changes the schema must call
+catalog.invalidate() afterwards.
+"""
+
+import threading
+
+from crm.db import get_connection
+
+
+class SchemaCatalog:
+    """Table -> column list map, loaded lazily and reloaded after invalidate()."""
+
+    def __init__(self):
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        tables = {}
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+            for (table_name,) in cursor.fetchall():
+                cursor.execute(f'PRAGMA table_info("{table_name}");')
+                tables[table_name] = [column[1] for column in cursor.fetchall()]
+        return tables
+
+    def _snapshot(self):
+        tables = self._tables
+        if tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self._load()
+                tables = self._tables
+        return tables
+
+    def tables(self):
+        """Returns the names of every table in the database."""
+        return list(self._snapshot())
+
+    def has_table(self, table_name):
+        return table_name in self._snapshot()
+
+    def columns(self, table_name):
+        """Returns the column names of table_name, or [] if it does not exist."""
+        return list(self._snapshot().get(table_name, []))
+
+    def invalidate(self):
+        """Drops the cached schema; the next read reloads it."""
+        with self._lock:
+            self._tables = None
+
+
+catalog = SchemaCatalog()
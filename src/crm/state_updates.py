@@ -0,0 +1,212 @@
+"""
+Write-behind queue for approve/reject decisions made in the prospectors.
+
+The GUI queues an UPDATE and moves on; a background thread writes the queued
+updates in one transaction at most every FLUSH_INTERVAL seconds. Updates of
+the same row that are still waiting are merged into one (the later values
+win), so flipping a decision back and forth costs a single write:
+
+    from crm.state_updates import queue_state_update, flush_state_updates
+
+    queue_state_update("companies_campaign",
+                       {"company_id": company_id, "campaign_id": campaign_id},
+                       {"current_state": "approved"})
+    ...
+    flush_state_updates()  # before reading the rows back, and on close
+
+Updates that can't be written are passed to the handlers registered with
+add_failure_handler(), so the windows can revert what they show.
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from crm.db import connect
+
+# Seconds a queued update may wait for more decisions before it is written
+FLUSH_INTERVAL = 0.5
+
+# Called from the writer thread with the updates that could not be written
+_failure_handlers = []
+
+
+class StateUpdateWriter(threading.Thread):
+    """Background thread writing queued row updates in batched transactions."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_retries=5, retry_delay=1):
+        super().__init__(name="StateUpdateWriter", daemon=True)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.failed = 0
+        self._pending = OrderedDict()  # (table, where) -> column values to set
+        self._cond = threading.Condition()
+        self._writing = False
+        self._flush_requested = False
+        self._stopping = False
+
+    def put(self, table, where, values):
+        """Queues UPDATE table SET values WHERE where (both dicts of column -> value)."""
+        key = (table, tuple(where.items()))
+        with self._cond:
+            merged = self._pending.pop(key, {})
+            merged.update(values)
+            self._pending[key] = merged
+            self._cond.notify_all()
+
+    def flush(self):
+        """Blocks until every update queued so far has been written (or given up on)."""
+        with self._cond:
+            while self._pending or self._writing:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait()
+
+    def stop(self):
+        """Writes what is left in the queue and ends the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join()
+
+    def _next_batch(self):
+        """Waits for an update, then gives later decisions flush_interval to join it."""
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            deadline = time.monotonic() + self.flush_interval
+            while self._pending and not (self._flush_requested or self._stopping):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, OrderedDict()
+            self._writing = bool(batch)
+            self._flush_requested = False
+            return batch
+
+    def _update(self, conn, items):
+        """Runs the updates of items ((table, where) -> values) in one transaction."""
+        for (table, where), values in items:
+            assignments = ", ".join(f"{column} = ?" for column in values)
+            conditions = " AND ".join(f"{column} = ?" for column, _ in where)
+            conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE {conditions}",
+                list(values.values()) + [value for _, value in where]
+            )
+        conn.commit()
+
+    def _report_failures(self, items):
+        self.failed += len(items)
+        print(f"Unable to save {len(items)} decision(s) to the database.")
+        updates = [(table, dict(where), values) for (table, where), values in items]
+        for handler in list(_failure_handlers):
+            try:
+                handler(updates)
+            except Exception as e:
+                print(f"Error reporting unsaved decisions: {e}")
+
+    def _write_batch(self, conn, batch):
+        items = list(batch.items())
+        for attempt in range(self.max_retries):
+            try:
+                self._update(conn, items)
+                return
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                print(f"Database error saving decisions: {e}. Retrying {attempt + 1}/{self.max_retries}...")
+                time.sleep(self.retry_delay)
+            except Exception as e:
+                conn.rollback()
+                print(f"Unexpected error saving decisions: {e}. Retrying one by one...")
+                failed = []
+                for item in items:
+                    try:
+                        self._update(conn, [item])
+                    except Exception as e2:
+                        conn.rollback()
+                        print(f"Error saving decision for {item[0][0]} {dict(item[0][1])}: {e2}")
+                        failed.append(item)
+                if failed:
+                    self._report_failures(failed)
+                return
+        self._report_failures(items)
+
+    def run(self):
+        conn = connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    break  # stopping with nothing left to write
+                try:
+                    self._write_batch(conn, batch)
+                finally:
+                    with self._cond:
+                        self._writing = False
+                        self._cond.notify_all()
+        finally:
+            conn.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_state_writer():
+    """Returns the process-wide state update writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = StateUpdateWriter()
+            _writer.start()
+        return _writer
+
+
+def add_failure_handler(handler):
+    """
+    Registers handler(updates), called from the writer thread with the updates
+    that could not be written: a list of (table, where, values) tuples.
+    """
+    _failure_handlers.append(handler)
+
+
+def remove_failure_handler(handler):
+    if handler in _failure_handlers:
+        _failure_handlers.remove(handler)
+
+
+def queue_state_update(table, where, values):
+    """Queues an update of the rows of table matching where; returns immediately."""
+    get_state_writer().put(table, where, values)
+
+
+def flush_state_updates():
+    """Waits until every queued update has been written."""
+    if _writer is not None and _writer.is_alive():
+        _writer.flush()
+
+
+def close_state_writer():
+    """
+    Writes pending updates and stops the writer thread (call when a prospector closes).
+
+    :return: The number of updates the writer could not save.
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is None:
+        return 0
+    writer.stop()
+    if writer.failed:
+        print(f"{writer.failed} decision(s) could not be saved.")
+    return writer.failed
+
+
+# Don't lose queued decisions if the application exits without closing the writer
+atexit.register(close_state_writer)
@@ -29,16 +29,16 @@ for path in [companies_dir, src_companies_dir, contacts_dir, cognism_dir]:
     if path not in sys.path:
         sys.path.insert(0, path)
 
+# Shared crm package (src/crm) lives next to this file
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
 # Import necessary modules
 from db_initializer import check_for_database
 from migrate_social_links import migrate_social_links
 from clean_verifications import clean_verification_records
 from clean_ratings import clean_rating_records
-
-
-def get_db_path():
-    """Retorna la ruta de la base de datos usando la ruta hardcodeada."""
-    return HARD_CODED_DB_PATH
+from crm.db import get_db_path, connect
 
 
 def initialize_app():
@@ -472,7 +472,12 @@ os.environ['PROJECT_ROOT'] = os.path.dirname(os.path.dirname(current_dir))
 os.environ['DB_PATH'] = r""" + f'"{HARD_CODED_DB_PATH}"' + """
 
 from src_companies.csv_import_gui import run_csv_import_gui
-run_csv_import_gui()
+
+# Guarded: the preprocessing worker processes re-import this script (spawn)
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    run_csv_import_gui()
                     """)
                 os.chdir(companies_dir)
                 subprocess.Popen([sys.executable, temp_script])
@@ -585,22 +590,18 @@ run_csv_import_gui()
         if not batch_tag:
             batch_tag = "initial"
         try:
-            import sqlite3
-            conn = sqlite3.connect(HARD_CODED_DB_PATH)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            from crm.campaigns import describe_query
+            conn = connect()
             try:
-                cursor.execute(campaign_query)
-                results = cursor.fetchall()
-                if not results:
+                columns, total_results = describe_query(conn, campaign_query)
+                if not total_results:
                     QMessageBox.warning(self, "Query Error", "This query returned 0 results.")
                     conn.close()
                     return
-                if 'company_id' not in dict(results[0]):
+                if 'company_id' not in columns:
                     QMessageBox.warning(self, "Query Error", "Query results must include company_id field.")
                     conn.close()
                     return
-                total_results = len(results)
                 if num_companies_requested == 0 or num_companies_requested > total_results:
                     num_companies = total_results
                 else:
@@ -632,15 +633,15 @@ import uuid
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+sys.path.append(r"{current_dir}")
 
-DB_PATH = r"{HARD_CODED_DB_PATH}"
+from crm.db import get_db_path, connect
+from crm.campaigns import describe_query, add_companies_from_query
 
 def get_db_connection():
     try:
-        print(f"Connecting to database at: {{DB_PATH}}")
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        print(f"Connecting to database at: {{get_db_path()}}")
+        return connect(row_factory=sqlite3.Row)
     except Error as e:
         print(f"Error connecting to database: {{e}}")
         return None
@@ -651,39 +652,27 @@ def create_campaign():
         print("Database connection failed")
         return False
     try:
-        campaign_name = "{campaign_name}"
-        query = "{campaign_query}"
-        campaign_batch_tag = "{batch_tag}"
+        campaign_name = {campaign_name!r}
+        query = {campaign_query!r}
+        campaign_batch_tag = {batch_tag!r}
         num_companies_requested = {num_companies}
         cursor = conn.cursor()
         try:
-            cursor.execute(query)
-            results = cursor.fetchall()
-            if not results:
+            columns, total_results = describe_query(conn, query)
+            if not total_results:
                 print("Query returned 0 results.")
                 return False
-            if 'company_id' not in dict(results[0]):
+            if 'company_id' not in columns:
                 print("Query results must include company_id field.")
                 return False
-            companies_to_add = results[:num_companies_requested]
             campaign_batch_id = str(uuid.uuid4())
             cursor.execute("INSERT INTO campaigns (campaign_name, query) VALUES (?, ?)",
                            (campaign_name, query))
             campaign_id = cursor.lastrowid
-            added_count = 0
-            for company in companies_to_add:
-                try:
-                    cursor.execute(
-                        \"\"\"INSERT INTO companies_campaign 
-                           (company_id, campaign_id, campaign_name, 
-                            campaign_batch_tag, campaign_batch_id) 
-                           VALUES (?, ?, ?, ?, ?)\"\"\",
-                        (company['company_id'], campaign_id, campaign_name, 
-                         campaign_batch_tag, campaign_batch_id)
-                    )
-                    added_count += 1
-                except sqlite3.IntegrityError:
-                    continue
+            added_count = add_companies_from_query(
+                conn, query, campaign_id, campaign_name,
+                campaign_batch_tag, campaign_batch_id, limit=num_companies_requested
+            )
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             cursor.execute(
                 "INSERT INTO import_logs (batch_tag, batch_id, source, timestamp) VALUES (?, ?, ?, ?)",
@@ -736,8 +725,7 @@ input("Press Enter to continue...")
     def refresh_campaign_list(self):
         try:
             import sqlite3
-            conn = sqlite3.connect(HARD_CODED_DB_PATH)
-            conn.row_factory = sqlite3.Row
+            conn = connect(row_factory=sqlite3.Row)
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT c.campaign_id, c.campaign_name, 
@@ -839,21 +827,17 @@ import datetime
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+sys.path.append(r"{current_dir}")
 
 project_root = os.path.dirname(os.path.dirname(current_dir))
 os.environ['PROJECT_ROOT'] = project_root
 
-if os.environ.get("DB_PATH") and os.name == 'nt':
-    DB_PATH = os.environ.get("DB_PATH")
-else:
-    DB_PATH = r"{HARD_CODED_DB_PATH}"
+from crm.db import get_db_path, connect
 
 def get_db_connection():
     try:
-        print(f"Connecting to database at: {{DB_PATH}}")
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        print(f"Connecting to database at: {{get_db_path()}}")
+        return connect(row_factory=sqlite3.Row)
     except Exception as e:
         print(f"Error connecting to database: {{e}}")
         return None
@@ -971,8 +955,7 @@ input("\\nPress Enter to continue...")
             batch_list.setAlternatingRowColors(True)
             layout.addWidget(batch_list)
             import sqlite3
-            conn = sqlite3.connect(HARD_CODED_DB_PATH)
-            conn.row_factory = sqlite3.Row
+            conn = connect(row_factory=sqlite3.Row)
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT 
@@ -1027,8 +1010,7 @@ input("\\nPress Enter to continue...")
         layout.addWidget(batch_combo)
         try:
             import sqlite3
-            conn = sqlite3.connect(HARD_CODED_DB_PATH)
-            conn.row_factory = sqlite3.Row
+            conn = connect(row_factory=sqlite3.Row)
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT DISTINCT 
@@ -1205,8 +1187,7 @@ subprocess.call(command)
             batch_combo.addItem("All Batches", "all")
             layout.addWidget(batch_combo)
             try:
-                conn = sqlite3.connect(HARD_CODED_DB_PATH)
-                conn.row_factory = sqlite3.Row
+                conn = connect(row_factory=sqlite3.Row)
                 cursor = conn.cursor()
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
                 tables = cursor.fetchall()
@@ -1590,84 +1571,18 @@ subprocess.call(command)
                         self.cognism_status.setText("URLs scraped successfully! Now scraping contact details...")
                         self.cognism_status.setStyleSheet("font-size: 14px; color: blue; font-weight: bold; padding: 10px;")
                         print("Starting contact details scraping...")
-                        from utils_contacts.database import save_to_db, print_db_path
-                        from utils_contacts.scraper import scrape_page
-                        from utils_contacts.read_db import get_urls_from_db
                         from utils_contacts.no_duplicates import filter_new_urls
-                        from utils_contacts.navigate import open_new_tabs
-                        from config import SCRAPING_DELAY
-                        import time
-                        login_tab = self.cognism_driver.current_window_handle
+                        from utils_contacts.worker_pool import run_worker_pool
+                        from utils_contacts.database import close_contact_writer
+                        from config import SCRAPER_WORKERS
+                        # Streamed into scrape_jobs by run_worker_pool, which reports how many were queued
                         url_entries = filter_new_urls()
-                        if not url_entries:
-                            print("⚠️ No new URLs found. All entries already exist in the database.")
-                        else:
-                            urls = [entry["url"] for entry in url_entries]
-                            print(f"✅ {len(urls)} new URLs found and ready for processing.")
-                            print(f"Starting to process {len(urls)} URLs in batches")
-                            batches = open_new_tabs(self.cognism_driver, urls)
-                            for batch_index, tabs in enumerate(batches):
-                                print(f"Processing batch {batch_index+1} with {len(tabs)} tabs")
-                                print(f"Current tab handles: {tabs}")
-                                for tab_index, tab in enumerate(tabs):
-                                    try:
-                                        self.cognism_driver.switch_to.window(tab)
-                                        try:
-                                            entry_index = (batch_index * len(tabs)) + tab_index
-                                            if entry_index >= len(url_entries):
-                                                print(f"⚠️ Index {entry_index} is out of range (max: {len(url_entries)-1})")
-                                                continue
-                                            data_entry = url_entries[entry_index]
-                                            current_url = self.cognism_driver.current_url
-                                            print(f"Processing tab URL: {current_url}")
-                                            self.cognism_status.setText(f"Scraping contact {entry_index + 1} of {len(urls)}...")
-                                            QApplication.processEvents()
-                                            extracted_data = scrape_page(self.cognism_driver)
-                                        except Exception as index_error:
-                                            print(f"⚠️ Error accessing data entry: {index_error}")
-                                            continue
-                                        if extracted_data and 'data_entry' in locals():
-                                            extracted_data.update({
-                                                "Segment": data_entry.get("segment", "unknown"),
-                                                "Timestamp": data_entry.get("timestamp", "unknown"),
-                                                "Cognism URL": data_entry.get("url", current_url if 'current_url' in locals() else "unknown")
-                                            })
-                                            corrected_data = {
-                                                "Name": extracted_data.get("Name"),
-                                                "Last_Name": extracted_data.get("Last Name"),
-                                                "Mobile_Phone": extracted_data.get("Mobile Phone"),
-                                                "Email": extracted_data.get("Email"),
-                                                "Role": extracted_data.get("Role"),
-                                                "City": extracted_data.get("City"),
-                                                "State": extracted_data.get("State"),
-                                                "Country": extracted_data.get("Country"),
-                                                "Timezone": extracted_data.get("Timezone"),
-                                                "LinkedIn_URL": extracted_data.get("LinkedIn URL"),
-                                                "Company_Name": extracted_data.get("Company Name"),
-                                                "Website": extracted_data.get("Website"),
-                                                "Employees": extracted_data.get("Employees"),
-                                                "Founded": extracted_data.get("Founded"),
-                                                "Segment": extracted_data.get("Segment"),
-                                                "Timestamp": extracted_data.get("Timestamp"),
-                                                "Cognism_URL": extracted_data.get("Cognism URL")
-                                            }
-                                            save_to_db(corrected_data)
-                                        else:
-                                            print(f"⚠️ No data extracted for URL: {data_entry['url']}")
-                                        time.sleep(SCRAPING_DELAY)
-                                    except Exception as e:
-                                        print(f"⚠️ Error processing tab: {e}")
-                                for tab in tabs:
-                                    try:
-                                        self.cognism_driver.switch_to.window(tab)
-                                        self.cognism_driver.close()
-                                    except Exception as e:
-                                        print(f"⚠️ Error closing tab: {e}")
-                                try:
-                                    self.cognism_driver.switch_to.window(login_tab)
-                                except Exception as e:
-                                    print(f"⚠️ Error switching back to login tab: {e}")
-                            print("✅ Contact scraping completed.")
+                        def report_progress(done, total):
+                            self.cognism_status.setText(f"Scraped {done} of {total} contacts...")
+                        # Jobs are persisted in scrape_jobs, so unfinished work of an interrupted session is resumed here
+                        run_worker_pool(self.cognism_driver, url_entries, SCRAPER_WORKERS, on_progress=report_progress)
+                        close_contact_writer()
+                        print("✅ Contact scraping completed.")
                     except Exception as e:
                         print(f"Error during scraping: {str(e)}")
                         raise
@@ -36,16 +36,13 @@ except ImportError:
     SELENIUM_AVAILABLE = False
     print("Selenium not available. Will use basic webbrowser module instead.")
 
-# Database path - use hardcoded path for Windows
-import os
-project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Database path - shared resolver in src/crm/db.py
+src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
 
-# Use hardcoded path for Windows
-if os.name == 'nt':  # Windows
-    DB_PATH = "C:\\Users\\EliasTsoukatos\\Documents\\software_code\\Elias_CRM\\databases\\database.db"
-else:
-    # Create the database path for other platforms
-    DB_PATH = os.path.join(project_root, 'databases', 'database.db')
+from crm.db import connect
+from crm.domains import resolve_company_id
 
 # Browser thread for handling URLs
 class BrowserThread(QThread):
@@ -396,6 +393,23 @@ class PhoneDialerApp:
             except:
                 return default
     
+    def _with_resolved_company(self, cursor, contact):
+        """Returns contact with company fields filled from its website if it has no company"""
+        if contact['company_name'] or not contact['contact_website']:
+            return contact
+        company_id = resolve_company_id(contact['contact_website'])
+        if not company_id:
+            return contact
+        cursor.execute("SELECT name, website FROM companies WHERE company_id = ?", (company_id,))
+        company = cursor.fetchone()
+        if not company:
+            return contact
+        contact = dict(contact)
+        contact['company_id'] = company_id
+        contact['company_name'] = company['name']
+        contact['company_website'] = company['website']
+        return contact
+    
     def _get_contacts_by_company_id(self, company_id):
         """Safely get indices of contacts from the same company"""
         if not company_id:
@@ -430,8 +444,7 @@ class PhoneDialerApp:
         """Load company campaigns and contact batch tags for the phone dialer"""
         try:
             # Connect to database
-            conn = sqlite3.connect(DB_PATH)
-            conn.row_factory = sqlite3.Row
+            conn = connect(row_factory=sqlite3.Row)
             cursor = conn.cursor()
             
             # First check if company_id column exists in contacts_campaign table
@@ -507,8 +520,7 @@ class PhoneDialerApp:
         """Load contacts for the selected campaign and batch tag"""
         try:
             # Connect to database
-            conn = sqlite3.connect(DB_PATH)
-            conn.row_factory = sqlite3.Row
+            conn = connect(row_factory=sqlite3.Row)
             cursor = conn.cursor()
             
             # Get approved contacts for this campaign, filtered by tag if specified
@@ -531,7 +543,8 @@ class PhoneDialerApp:
                     COALESCE(cc.company_id, c.company_id) as company_id,
                     cc.notes,
                     cc.counter,
-                    co.website as company_website
+                    co.website as company_website,
+                    c.Website as contact_website
                 FROM contacts_campaign cc
                 LEFT JOIN contacts c ON cc.contact_id = c.contact_id
                 LEFT JOIN companies co ON c.company_id = co.company_id
@@ -552,6 +565,9 @@ class PhoneDialerApp:
             cursor.execute(query, params)
             contacts = cursor.fetchall()
             
+            # Match contacts without a company through their own website
+            contacts = [self._with_resolved_company(cursor, contact) for contact in contacts]
+            
             conn.close()
             
             # Store contacts in list
@@ -835,7 +851,7 @@ class PhoneDialerApp:
                 return
                 
             try:
-                conn = sqlite3.connect(DB_PATH)
+                conn = connect()
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE contacts_campaign SET notes = ? WHERE counter = ?",
@@ -1186,7 +1202,7 @@ class PhoneDialerApp:
             return
             
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             try:
@@ -1249,7 +1265,7 @@ class PhoneDialerApp:
                     QMessageBox.warning(self.parent, "Error", "Company ID not found for this contact.")
                 return
                 
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -1372,7 +1388,7 @@ class PhoneDialerApp:
                     QMessageBox.warning(self.parent, "Error", "Contact ID not found.")
                 return
                 
-            conn = sqlite3.connect(DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             
             cursor.execute("""
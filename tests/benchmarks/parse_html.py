@@ -0,0 +1,32 @@
+"""
+Parsing speed of contact_extractors.parse_html on the saved profile fixture.
+
+Not part of the test run (timings depend on the machine):
+
+    python tests/benchmarks/parse_html.py [pages]
+"""
+
+import os
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COGNISM_SRC_DIR = os.path.join(os.path.dirname(TESTS_DIR), "src", "contacts", "cognism_scraper", "src")
+FIXTURE = os.path.join(TESTS_DIR, "fixtures", "cognism", "profile_full.html")
+
+
+def main(pages=200):
+    sys.path.insert(0, COGNISM_SRC_DIR)
+    from contact_extractors.parse_html import PARSER, parse_profile_html
+
+    with open(FIXTURE, encoding="utf-8") as fixture:
+        html = fixture.read()
+    started = time.perf_counter()
+    for _ in range(pages):
+        parse_profile_html(html)
+    per_page = (time.perf_counter() - started) / pages
+    print(f"parse_profile_html ({PARSER}): {per_page * 1000:.2f} ms/page over {pages} pages")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,47 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# Tests import the shared crm package and the modules that use it from src/
+# (the Cognism scraper's modules import each other from its own src folder)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, "src")
+COMPANIES_SRC_DIR = os.path.join(SRC_DIR, "companies", "src_companies")
+COGNISM_SRC_DIR = os.path.join(SRC_DIR, "contacts", "cognism_scraper", "src")
+for path in (SRC_DIR, COMPANIES_SRC_DIR, COGNISM_SRC_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def load_module(name, path):
+    """Imports a module by file path, under a name that doesn't clash with the other scrapers."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Points crm.db at a fresh database file for the test."""
+    from crm.db import set_db_path
+
+    path = tmp_path / "database.db"
+    set_db_path(str(path))
+    yield str(path)
+    set_db_path(None)
+
+
+@pytest.fixture
+def crm_schema(db_path):
+    """Database with every table the app creates at startup, plus the index set."""
+    import db_initializer
+
+    assert db_initializer.create_tables(db_path)
+    create_database = load_module(
+        "cognism_create_database", os.path.join(COGNISM_SRC_DIR, "utils", "create_database.py")
+    )
+    assert create_database.create_table()
+    return db_path
@@ -0,0 +1,56 @@
+"""Lazily paged companies of a campaign (run_company_prospector.CampaignCompanies)."""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("selenium")
+
+from conftest import SRC_DIR  # noqa: E402
+
+sys.path.append(os.path.join(SRC_DIR, "companies"))
+from run_company_prospector import CampaignCompanies  # noqa: E402
+
+
+@pytest.fixture
+def conn(crm_schema):
+    conn = sqlite3.connect(crm_schema)
+    conn.executemany("INSERT INTO companies (company_id, name) VALUES (?, ?)",
+                     [(f"c{index}", f"Company {index}") for index in range(1, 6)])
+    # Same added_at, so the newest first order is c5, c4, ..., c1
+    conn.executemany("INSERT INTO companies_campaign (counter, company_id, campaign_id, added_at) "
+                     "VALUES (?, ?, 1, '2025-01-01')", [(index, f"c{index}") for index in range(1, 6)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_companies_removed_between_page_loads(conn):
+    companies = CampaignCompanies(1, page_size=2)
+    assert companies[0]["company_id"] == "c5"
+
+    conn.execute("DELETE FROM companies_campaign WHERE company_id IN ('c1', 'c2')")
+    conn.commit()
+
+    # Page 1 now has one row: the campaign is counted again instead of failing on a short page
+    assert companies[2]["company_id"] == "c3"
+    assert len(companies) == 3
+    with pytest.raises(IndexError):
+        companies[3]
+
+
+def test_reload_counts_the_campaign_again(conn):
+    companies = CampaignCompanies(1, page_size=2)
+    assert companies[4]["company_id"] == "c1"
+
+    conn.execute("INSERT INTO companies (company_id, name) VALUES ('c0', 'Company 0')")
+    conn.execute("INSERT INTO companies_campaign (counter, company_id, campaign_id, added_at) "
+                 "VALUES (0, 'c0', 1, '2024-01-01')")
+    conn.commit()
+    companies.reload()
+
+    assert len(companies) == 6
+    assert [companies[index]["company_id"] for index in range(6)] == ["c5", "c4", "c3", "c2", "c1", "c0"]
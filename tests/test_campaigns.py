@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from crm.campaigns import add_companies_from_query, count_new_companies, describe_query
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE companies (company_id TEXT PRIMARY KEY, name TEXT);
+        CREATE TABLE companies_campaign (
+            counter INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id TEXT,
+            campaign_id INTEGER,
+            campaign_name TEXT,
+            campaign_batch_tag TEXT,
+            campaign_batch_id TEXT,
+            UNIQUE(company_id, campaign_id)
+        );
+    """)
+    conn.executemany("INSERT INTO companies VALUES (?, ?)", [(f"c{i}", f"Company {i}") for i in range(10)])
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT company_id FROM companies",
+    "SELECT company_id FROM companies;",
+    "SELECT company_id FROM companies -- all of them",
+])
+def test_user_query_is_nested_safely(conn, query):
+    assert describe_query(conn, query) == (["company_id"], 10)
+    assert count_new_companies(conn, query, 1) == 10
+    assert add_companies_from_query(conn, query, 1, "campaign", "tag", "batch", limit=4) == 4
+
+
+def test_companies_already_in_campaign_are_skipped(conn):
+    query = "SELECT company_id FROM companies"
+    add_companies_from_query(conn, query, 1, "campaign", "tag", "batch1", limit=4)
+    assert count_new_companies(conn, query, 1) == 6
+    assert add_companies_from_query(conn, query, 1, "campaign", "tag", "batch2") == 6
+    assert add_companies_from_query(conn, query, 1, "campaign", "tag", "batch3") == 0
@@ -0,0 +1,104 @@
+"""Resumable import of a Clutch dataset (clutch_dataset.consume_dataset)."""
+
+import json
+import sqlite3
+
+import pytest
+
+import clutch_dataset
+import db_initializer
+from clutch_dataset import LocalDatasetClient, consume_dataset, get_checkpoint, save_checkpoint
+
+BATCH_ID = "batch-1"
+ITEMS = [{"name": f"Company {index}", "website": f"https://company{index}.com"} for index in range(7)]
+
+
+class Interrupted(Exception):
+    """The import process going away between two pages."""
+
+
+@pytest.fixture
+def client(crm_schema, tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    path.write_text("".join(json.dumps(item) + "\n" for item in ITEMS), encoding="utf-8")
+    return LocalDatasetClient(str(path))
+
+
+def consume(client, offset=0, on_page=None):
+    return consume_dataset(client, BATCH_ID, "tag", None, client.path, offset=offset,
+                           page_size=3, poll_interval=0, on_page=on_page)
+
+
+def resume(client):
+    """What run_clutch_scraper does on the next run: continue from the saved offset."""
+    return consume(client, offset=get_checkpoint(BATCH_ID)["last_offset"])
+
+
+def imported_websites(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT website FROM companies"))
+    finally:
+        conn.close()
+
+
+def test_interrupted_import_resumes_from_the_checkpoint(client, crm_schema):
+    def interrupt(offset):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        consume(client, on_page=interrupt)
+    checkpoint = get_checkpoint(BATCH_ID)
+    assert (checkpoint["last_offset"], checkpoint["status"]) == (3, "running")
+    assert imported_websites(crm_schema) == sorted(item["website"] for item in ITEMS[:3])
+
+    assert resume(client) == 4
+    checkpoint = get_checkpoint(BATCH_ID)
+    assert (checkpoint["last_offset"], checkpoint["status"]) == (7, "done")
+    assert imported_websites(crm_schema) == sorted(item["website"] for item in ITEMS)
+
+
+def test_crash_in_the_middle_of_a_page_does_not_duplicate_companies(client, crm_schema, monkeypatch):
+    preprocessor = clutch_dataset.preprocessor
+    pages = []
+
+    def crash_on_second_page(items, *args, **kwargs):
+        pages.append(items)
+        if len(pages) == 2:
+            # Part of the page reaches the database before the crash
+            preprocessor(items[:1], *args, **kwargs)
+            raise Interrupted()
+        preprocessor(items, *args, **kwargs)
+
+    monkeypatch.setattr(clutch_dataset, "preprocessor", crash_on_second_page)
+    with pytest.raises(Interrupted):
+        consume(client)
+    assert get_checkpoint(BATCH_ID)["last_offset"] == 3
+
+    monkeypatch.setattr(clutch_dataset, "preprocessor", preprocessor)
+    # The whole page is read again; the company already written is matched by domain
+    assert resume(client) == 4
+    assert get_checkpoint(BATCH_ID)["last_offset"] == 7
+    assert imported_websites(crm_schema) == sorted(item["website"] for item in ITEMS)
+
+
+def test_checkpoints_table_keyed_by_batch_only_is_migrated(db_path):
+    # clutch_checkpoints as created before runs were keyed by run_key
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE clutch_checkpoints (
+            batch_id TEXT PRIMARY KEY, run_id TEXT, dataset_id TEXT,
+            last_offset INTEGER DEFAULT 0, status TEXT DEFAULT 'running', updated_at TEXT
+        )
+    """)
+    conn.execute("INSERT INTO clutch_checkpoints (batch_id, run_id, dataset_id, last_offset) "
+                 "VALUES (?, 'run-1', 'dataset-1', 40)", (BATCH_ID,))
+    conn.commit()
+    conn.close()
+
+    assert db_initializer.create_tables(db_path)
+    assert get_checkpoint(BATCH_ID)["last_offset"] == 40
+
+    save_checkpoint(BATCH_ID, "run-2", "dataset-2", 10, run_key="urls-2")
+    assert get_checkpoint(BATCH_ID, "urls-2")["last_offset"] == 10
+    assert get_checkpoint(BATCH_ID)["run_id"] == "run-1"
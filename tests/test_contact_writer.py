@@ -0,0 +1,110 @@
+"""Background ContactWriter of the Cognism scraper (utils_contacts.database)."""
+
+import sqlite3
+
+import pytest
+
+import crm.db
+import crm.domains
+from utils_contacts.database import ContactWriter, build_contact_row
+from utils_contacts.snapshots import get_snapshot_path, load_snapshot
+
+
+def contact(index, **fields):
+    extracted = {"Name": f"Name {index}", "Last Name": "Lopez", "Email": f"{index}@acme.com",
+                 "Website": "https://acme.com", **fields}
+    entry = {"url": f"https://app.cognism.com/search/prospects/{index}", "timestamp": "2025-01-01",
+             "contact_id": f"k{index}"}
+    return build_contact_row(extracted, entry)
+
+
+@pytest.fixture(autouse=True)
+def domain_resolver(monkeypatch):
+    """A resolver per test: the module one keeps the sync state of an earlier database."""
+    monkeypatch.setattr(crm.domains, "resolver", crm.domains.DomainResolver(sync_interval=0))
+
+
+@pytest.fixture
+def writer(crm_schema):
+    writer = ContactWriter(flush_interval=0.05, retry_delay=0)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def test_snapshots_written_by_writer(crm_schema, writer):
+    url = "https://app.cognism.com/search/prospects/1"
+    path = get_snapshot_path(url)
+    writer.put_snapshot(url, path, "<html>profile</html>")
+    writer.flush()
+
+    assert load_snapshot(path) == "<html>profile</html>"
+    conn = sqlite3.connect(crm_schema)
+    try:
+        assert conn.execute("SELECT path FROM contact_snapshots WHERE url = ?", (url,)).fetchall() == [(path,)]
+    finally:
+        conn.close()
+
+
+def test_bad_contact_only_drops_its_row(crm_schema, writer):
+    """A row the database rejects doesn't take the rest of its batch down with it."""
+    for index in range(5):
+        writer.put(contact(index, Email=["not", "a", "value"]) if index == 2 else contact(index))
+    writer.flush()
+
+    conn = sqlite3.connect(crm_schema)
+    try:
+        saved = [row[0] for row in conn.execute("SELECT contact_id FROM contacts ORDER BY contact_id")]
+    finally:
+        conn.close()
+    assert saved == ["k0", "k1", "k3", "k4"]
+    assert writer.written == 4
+    assert writer.failed == 1
+
+
+def test_contact_queued_with_snapshot_gets_its_company(crm_schema, writer, monkeypatch):
+    """The company lookup doesn't wait on the batch's own write transaction."""
+    monkeypatch.setattr(crm.db, "BUSY_TIMEOUT", 1)
+    crm.db.close_all()
+    conn = sqlite3.connect(crm_schema)
+    conn.execute("INSERT INTO companies (company_id, name, domain) VALUES ('c-acme', 'Acme', 'acme.com')")
+    crm.domains.sync_company_domains(conn)
+    conn.commit()
+
+    url = "https://app.cognism.com/search/prospects/1"
+    writer.put_snapshot(url, get_snapshot_path(url), "<html>profile</html>")
+    writer.put(contact(1))
+    writer.flush()
+
+    try:
+        assert conn.execute("SELECT contact_id, company_id FROM contacts").fetchall() == [("k1", "c-acme")]
+    finally:
+        conn.close()
+
+
+def test_writer_survives_an_unexpected_error(crm_schema, writer, monkeypatch):
+    write_snapshots = writer._write_snapshots
+    failures = [ValueError("boom")]
+
+    def broken_once(snapshots):
+        if failures:
+            raise failures.pop()
+        return write_snapshots(snapshots)
+
+    monkeypatch.setattr(writer, "_write_snapshots", broken_once)
+    writer.put_snapshot("https://app.cognism.com/search/prospects/1", "unused", "<html></html>")
+    writer.put(contact(1))
+    writer.flush()
+    assert writer.is_alive()
+    assert writer.failed == 1
+
+    writer.put(contact(2))
+    writer.flush()
+    assert writer.written == 1
+
+
+def test_flush_does_not_wait_for_a_dead_writer():
+    writer = ContactWriter()  # never started, like a writer whose thread died
+    writer.put(contact(1))
+    writer.flush()
+    assert writer.queue.unfinished_tasks == 1
@@ -0,0 +1,84 @@
+"""Bulk company writes (db_writer.BulkCompanyWriter)."""
+
+import sqlite3
+
+import pytest
+
+from crm.schema import catalog
+from db_writer import BulkCompanyWriter
+from domain_index import DomainIndex
+
+
+def company(index, **fields):
+    return {
+        "companies": {"company_id": f"c{index}", "name": f"Company {index}",
+                      "website": f"https://company{index}.com", "domain": f"company{index}.com", **fields},
+        "batch_tag": "tag",
+        "batch_id": "batch-1",
+    }
+
+
+@pytest.fixture
+def domain_index(crm_schema):
+    return DomainIndex()
+
+
+def write(companies, domain_index):
+    # Domains are registered before the write, as the preprocessor does
+    for data in companies:
+        domain_index.add(data["companies"]["domain"], data["companies"]["company_id"])
+    with BulkCompanyWriter(domain_index=domain_index) as writer:
+        writer.write_all(companies)
+    return writer
+
+
+def saved_company_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT company_id FROM companies ORDER BY company_id")]
+    finally:
+        conn.close()
+
+
+def test_failed_company_is_retried_alone_and_forgotten_by_the_index(crm_schema, domain_index):
+    # A list can't be bound as a column value, so this company fails on its own
+    writer = write([company(1), company(2, name=["bad"]), company(3)], domain_index)
+
+    assert (writer.written, writer.failed) == (2, 1)
+    assert saved_company_ids(crm_schema) == ["c1", "c3"]
+    # A later record of the same domain must not link to the company that was never written
+    assert domain_index.get("company2.com") is None
+    assert domain_index.get("company1.com") == "c1"
+
+
+def test_failed_update_of_an_existing_company_keeps_its_domain(crm_schema, domain_index):
+    write([company(1)], domain_index)
+    writer = write([company(1, name=["bad"]), company(2)], domain_index)
+
+    assert writer.failed == 1
+    assert domain_index.get("company1.com") == "c1"
+
+
+@pytest.fixture
+def custom_table(crm_schema):
+    conn = sqlite3.connect(crm_schema)
+    conn.execute("CREATE TABLE company_awards (id INTEGER PRIMARY KEY, company_id TEXT, value TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    catalog.invalidate()
+    yield "company_awards"
+    catalog.invalidate()
+
+
+def test_failing_custom_table_only_skips_its_rows(crm_schema, domain_index, custom_table):
+    first = company(1, name="Acme")
+    first["company_awards"] = [{"value": "Best agency"}, {"value": None}]
+    writer = write([first, company(2)], domain_index)
+
+    assert (writer.written, writer.failed) == (2, 0)
+    assert saved_company_ids(crm_schema) == ["c1", "c2"]
+    conn = sqlite3.connect(crm_schema)
+    try:
+        assert conn.execute("SELECT company_id, value FROM company_awards").fetchall() == [("c1", "Best agency")]
+    finally:
+        conn.close()
@@ -0,0 +1,120 @@
+"""Website -> company resolution (crm.domains)."""
+
+import sqlite3
+import time
+
+import pytest
+
+import crm.db
+from crm.domains import DomainResolver, ensure_company_domains, registrable_domain, sync_company_domains
+
+COMPANIES = [
+    ("c-acme", "acme.com", "https://www.acme.com"),
+    ("c-shop", None, "https://shop.globex.co.uk/store"),
+    ("c-foo", "foo.github.io", None),
+    ("c-app", None, "https://tool.herokuapp.com"),
+]
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE companies (company_id TEXT PRIMARY KEY, name TEXT, domain TEXT, website TEXT)")
+    conn.executemany("INSERT INTO companies (company_id, domain, website) VALUES (?, ?, ?)", COMPANIES)
+    conn.commit()
+    ensure_company_domains(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def resolver(conn):
+    return DomainResolver(sync_interval=0)
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("acme.com", "acme.com"),
+    ("blog.acme.com", "acme.com"),
+    ("blog.acme.co.uk", "acme.co.uk"),
+    ("docs.foo.github.io", "foo.github.io"),
+    ("github.io", "github.io"),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected
+
+
+@pytest.mark.parametrize("website, company_id", [
+    ("https://acme.com/team", "c-acme"),
+    ("blog.acme.com", "c-acme"),
+    ("globex.co.uk", "c-shop"),          # company on a subdomain
+    ("www.globex.co.uk/about", "c-shop"),
+    ("foo.github.io", "c-foo"),
+    ("notacme.com", None),
+])
+def test_resolve(resolver, website, company_id):
+    assert resolver.resolve(website) == company_id
+
+
+@pytest.mark.parametrize("website", ["bar.github.io", "github.io", "other.herokuapp.com", "herokuapp.com"])
+def test_shared_hosts_do_not_match_other_tenants(resolver, website):
+    assert resolver.resolve(website) is None
+
+
+def sync(conn):
+    """What the company writers do after writing (db_writer)."""
+    sync_company_domains(conn)
+    conn.commit()
+
+
+def test_new_companies_are_picked_up(conn, resolver):
+    assert resolver.resolve("initech.com") is None
+    conn.execute("INSERT INTO companies (company_id, domain) VALUES ('c-initech', 'initech.com')")
+    sync(conn)
+    assert resolver.resolve("initech.com") == "c-initech"
+
+
+def test_edited_and_deleted_domains_are_picked_up(conn, resolver):
+    assert resolver.resolve("acme.com") == "c-acme"
+    assert resolver.resolve("foo.github.io") == "c-foo"
+
+    conn.execute("UPDATE companies SET domain = 'acme.io', website = NULL WHERE company_id = 'c-acme'")
+    conn.execute("DELETE FROM companies WHERE company_id = 'c-foo'")
+    sync(conn)
+
+    assert resolver.resolve("acme.com") is None
+    assert resolver.resolve("acme.io") == "c-acme"
+    assert resolver.resolve("foo.github.io") is None
+
+
+def test_rebuilt_companies_table_gets_triggers_again(conn, resolver):
+    assert resolver.resolve("acme.com") == "c-acme"
+
+    # DROP TABLE + RENAME, as the social links migration does
+    conn.execute("CREATE TABLE companies_new (company_id TEXT PRIMARY KEY, name TEXT, domain TEXT, website TEXT)")
+    conn.execute("INSERT INTO companies_new SELECT * FROM companies WHERE company_id != 'c-acme'")
+    conn.execute("DROP TABLE companies")
+    conn.execute("ALTER TABLE companies_new RENAME TO companies")
+    conn.commit()
+    ensure_company_domains(conn)
+    assert resolver.resolve("acme.com") is None
+
+    conn.execute("UPDATE companies SET domain = 'acme.com' WHERE company_id = 'c-shop'")
+    sync(conn)
+    assert resolver.resolve("acme.com") == "c-shop"
+
+
+def test_resolve_does_not_wait_for_an_open_write_transaction(conn, resolver, monkeypatch):
+    monkeypatch.setattr(crm.db, "BUSY_TIMEOUT", 5)
+    crm.db.close_all()
+    assert resolver.resolve("acme.com") == "c-acme"
+
+    # A writer in the middle of a batch, e.g. the contact campaign loop
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("INSERT INTO companies (company_id, domain) VALUES ('c-initech', 'initech.com')")
+    try:
+        start = time.monotonic()
+        assert resolver.resolve("initech.com") is None  # not committed yet
+        assert resolver.resolve("blog.acme.com") == "c-acme"
+        assert time.monotonic() - start < 1
+    finally:
+        conn.rollback()
@@ -0,0 +1,66 @@
+"""
+Offline extraction of saved Cognism profile pages (contact_extractors.parse_html),
+run on the fixtures in tests/fixtures/cognism. The parsing speed is measured
+by tests/benchmarks/parse_html.py, outside the test run.
+"""
+
+import os
+
+import pytest
+
+from contact_extractors.parse_html import parse_profile_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "cognism")
+
+EXPECTED = {
+    "profile_full.html": {
+        "Name": "Ana",
+        "Last Name": "Maria Lopez",
+        "Mobile Phone": "+15550002",
+        "Email": "ana@acme.com",
+        "Role": "Chief Technology Officer",
+        "City": "Austin",
+        "State": "Texas",
+        "Country": "United States",
+        "Timezone": "CT",
+        "LinkedIn URL": "https://www.linkedin.com/in/ana",
+        "Company Name": "Acme Corp",
+        "Website": "https://acme.com",
+        "Employees": "51-200",
+        "Founded": "1999",
+    },
+    # Single name, direct line only, no location / website / company details
+    "profile_partial.html": {
+        "Name": "Prince",
+        "Last Name": "Not found",
+        "Mobile Phone": "Not found",
+        "Email": "Not found",
+        "Role": "Head of Sales",
+        "City": "Not found",
+        "State": "Not found",
+        "Country": "Not found",
+        "Timezone": "Not applicable",
+        "LinkedIn URL": "Not found",
+        "Company Name": "Purple Rain LLC",
+        "Website": "Not found",
+        "Employees": "Not found",
+        "Founded": "Not found",
+    },
+}
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as fixture:
+        return fixture.read()
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_parse_profile_html(name):
+    assert parse_profile_html(read_fixture(name)) == EXPECTED[name]
+
+
+def test_parse_profile_html_empty_page():
+    data = parse_profile_html("<html><body></body></html>")
+    assert set(data) == set(EXPECTED["profile_full.html"])
+    assert data["Name"] == "Not found"
+    assert data["Timezone"] == "Not applicable"
+
@@ -0,0 +1,217 @@
+"""
+Query-plan regression tests: the prospector, dialer and campaign queries must
+use an index on the large tables, never a full SCAN.
+
+The GUI modules need PyQt5 and Selenium at import time, so their queries are
+repeated here as written in the source (each one names its function). Queries
+of the crm package are captured from the real functions.
+"""
+
+import re
+import sqlite3
+
+import pytest
+
+# Tables that grow with every import / campaign
+LARGE_TABLES = {"contacts", "companies_campaign", "contacts_campaign", "company_ratings"}
+
+SQL_KEYWORDS = {"on", "where", "join", "left", "inner", "group", "order", "limit", "using", "set"}
+
+COMPANY_FROM = """
+    FROM companies_campaign cc
+    JOIN companies c ON cc.company_id = c.company_id
+    LEFT JOIN company_locations cl ON cl.location_id = (
+        SELECT location_id FROM company_locations
+        WHERE company_id = cc.company_id
+            AND (office_type = 'headquarters' OR office_type IS NULL)
+        ORDER BY office_type IS NULL, location_id
+        LIMIT 1
+    )
+    LEFT JOIN company_ratings cr ON cr.rating_id = (
+        SELECT MAX(rating_id) FROM company_ratings WHERE company_id = cc.company_id
+    )
+"""
+
+QUERIES = {
+    # companies/run_company_prospector.py
+    "get_campaign_batches (companies)": ("""
+        SELECT campaign_batch_tag, campaign_batch_id, COUNT(*) as company_count
+        FROM companies_campaign
+        WHERE campaign_id = ?
+        GROUP BY campaign_batch_tag, campaign_batch_id
+        ORDER BY added_at DESC
+    """, (1,)),
+    "CampaignCompanies._count": (
+        "SELECT COUNT(*) FROM companies_campaign cc JOIN companies c ON cc.company_id = c.company_id"
+        " WHERE cc.campaign_id = ? AND cc.campaign_batch_id = ?", (1, "b")),
+    "CampaignCompanies._select": (
+        f"SELECT cc.counter, c.name, cl.city, cr.overall_rating {COMPANY_FROM}"
+        " WHERE cc.campaign_id = ? AND (cc.added_at, cc.counter) < (?, ?)"
+        " ORDER BY cc.added_at DESC, cc.counter DESC LIMIT ? OFFSET ?", (1, "2025", 10, 200, 0)),
+    "CampaignCompanies.first_index_with_state": (
+        "SELECT cc.added_at, cc.counter FROM companies_campaign cc "
+        "JOIN companies c ON cc.company_id = c.company_id"
+        " WHERE cc.campaign_id = ? AND cc.current_state = ?"
+        " ORDER BY cc.added_at DESC, cc.counter DESC LIMIT 1", (1, "undecided")),
+    "update_company_state": (
+        "UPDATE companies_campaign SET current_state = ? WHERE company_id = ? AND campaign_id = ?",
+        ("approved", "c1", 1)),
+
+    # contacts/run_contact_prospector.py
+    "get_campaign_contacts": ("""
+        SELECT cc.counter, c.id, c.Name, co.name, cc.current_state, cc.notes
+        FROM contacts_campaign cc
+        JOIN contacts c ON cc.contact_id = c.contact_id
+        LEFT JOIN companies co ON c.company_id = co.company_id
+        WHERE cc.campaign_id = ? AND cc.current_state = ? AND cc.campaign_batch_id = ?
+    """, (1, "undecided", "b")),
+    "get_campaign_batches (contacts)": ("""
+        SELECT DISTINCT campaign_batch_id, campaign_batch_tag,
+        (SELECT COUNT(*) FROM contacts_campaign WHERE campaign_id = ? AND campaign_batch_id = cc.campaign_batch_id) as count
+        FROM contacts_campaign cc
+        WHERE cc.campaign_id = ?
+        ORDER BY cc.added_at DESC
+    """, (1, 1)),
+    "update_contact_state": (
+        "UPDATE contacts_campaign SET current_state = ?, notes = ? WHERE counter = ?",
+        ("approved", "", 1)),
+
+    # contacts/run_contact_campaign_process.py
+    "get_company_ids_for_campaign": (
+        "SELECT company_id FROM companies_campaign WHERE campaign_id = ? AND current_state = 'approved'", (1,)),
+    "search_contacts_for_companies": ("""
+        SELECT c.contact_id, c.Name, c.Last_Name, c.Role, c.Email, c.LinkedIn_URL, c.company_id,
+            co.name as company_name
+        FROM contacts c
+        JOIN companies co ON c.company_id = co.company_id
+        WHERE c.company_id IN (?, ?)
+        AND (c.Name LIKE ? OR c.Last_Name LIKE ? OR c.Role LIKE ? OR c.Email LIKE ?)
+    """, ("c1", "c2", "%a%", "%a%", "%a%", "%a%")),
+    "add_contacts_to_campaign (company lookup)": (
+        "SELECT company_id, Website FROM contacts WHERE contact_id = ?", ("k1",)),
+    "remove_contacts_from_campaign": (
+        "DELETE FROM contacts_campaign WHERE campaign_id = ?", (1,)),
+
+    # phone_dialer/phone_dialer.py
+    "load_campaigns (company campaigns)": ("""
+        SELECT c.campaign_id, c.campaign_name, COUNT(cc.company_id) as total_companies, c.created_at
+        FROM campaigns c
+        LEFT JOIN companies_campaign cc ON c.campaign_id = cc.campaign_id
+        GROUP BY c.campaign_id
+        ORDER BY c.created_at DESC
+    """, ()),
+    "load_campaigns (batch tags)": ("""
+        SELECT DISTINCT campaign_batch_tag
+        FROM contacts_campaign
+        WHERE campaign_batch_tag IS NOT NULL
+        ORDER BY campaign_batch_tag
+    """, ()),
+    "load_contacts": ("""
+        SELECT c.id, c.contact_id, c.Name, co.name as company_name, cc.campaign_batch_tag, cc.counter
+        FROM contacts_campaign cc
+        LEFT JOIN contacts c ON cc.contact_id = c.contact_id
+        LEFT JOIN companies co ON c.company_id = co.company_id
+        WHERE cc.campaign_id = ?
+        AND cc.current_state = 'approved'
+        AND c.contact_id IS NOT NULL
+        AND cc.campaign_batch_tag = ?
+        ORDER BY c.Name, c.Last_Name
+    """, (1, "t")),
+    "reject_company_contacts (campaign lookup)": ("""
+        SELECT DISTINCT campaign_id
+        FROM contacts_campaign
+        WHERE contact_id IN (
+            SELECT contact_id FROM contacts WHERE company_id = ?
+        )
+        LIMIT 1
+    """, ("c1",)),
+    "reject_company_contacts (contacts)": ("""
+        UPDATE contacts_campaign
+        SET current_state = 'rejected', reason = 'All company contacts rejected', notes = ?
+        WHERE contact_id IN (
+            SELECT contact_id FROM contacts WHERE company_id = ?
+        )
+        AND campaign_id = ?
+        AND current_state = 'approved'
+    """, ("", "c1", 1)),
+    "reject_company_contacts (company)": ("""
+        UPDATE companies_campaign
+        SET current_state = 'rejected', reason = 'All contacts rejected'
+        WHERE company_id = ?
+        AND campaign_id = ?
+        AND current_state = 'approved'
+    """, ("c1", 1)),
+    "reject_contact": (
+        "UPDATE contacts_campaign SET current_state = 'rejected', reason = 'Manually rejected', notes = ? "
+        "WHERE contact_id = ? AND current_state = 'approved'", ("", "k1")),
+}
+
+
+def table_aliases(sql):
+    """alias (or table name) -> table for every table in FROM / JOIN / UPDATE clauses."""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def large_table_scans(conn, sql, params):
+    aliases = table_aliases(sql)
+    scans = []
+    for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall():
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+
+@pytest.fixture
+def conn(crm_schema):
+    conn = sqlite3.connect(crm_schema)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_uses_indexes(conn, name):
+    sql, params = QUERIES[name]
+    assert large_table_scans(conn, sql, params) == [], f"{name} scans a large table"
+
+
+def test_crm_campaign_queries_use_indexes(conn):
+    """Statements run by crm.campaigns, captured with a trace callback."""
+    from crm.campaigns import (add_companies_from_query, count_new_companies, describe_query,
+                               get_campaign_stats, get_campaign_totals)
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    query = "SELECT company_id FROM companies WHERE headcount > 50"
+    describe_query(conn, query)
+    count_new_companies(conn, query, 1)
+    add_companies_from_query(conn, query, 1, "campaign", "tag", "batch", limit=10)
+    for table in ("companies_campaign", "contacts_campaign"):
+        get_campaign_stats(conn, table, 1)
+        get_campaign_stats(conn, table, 1, batch_id="batch")
+        get_campaign_totals(conn, table)
+    conn.set_trace_callback(None)
+
+    scans = {}
+    for sql in statements:
+        if not sql.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+            continue
+        found = large_table_scans(conn, sql, ())
+        if found:
+            scans[sql] = found
+    assert scans == {}
+
+
+def test_apply_indexes_recreates_dropped_index(conn):
+    """An index lost with its table (DROP + RENAME migrations) comes back on the next run."""
+    from crm.indexes import INDEXES, apply_indexes
+
+    conn.execute("DROP INDEX idx_companies_domain")
+    assert apply_indexes(conn)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(INDEXES) <= names
@@ -0,0 +1,29 @@
+"""Queueing of new Cognism profile URLs as scrape jobs."""
+
+import sqlite3
+import types
+
+from utils_contacts.no_duplicates import filter_new_urls
+from utils_contacts.scrape_jobs import enqueue_jobs, get_job_counts
+
+
+def test_new_urls_are_streamed_into_scrape_jobs(crm_schema):
+    urls = [f"https://app.cognism.com/search/prospects/{index}" for index in range(5)]
+    conn = sqlite3.connect(crm_schema)
+    conn.executemany(
+        "INSERT INTO contacts_cognism_urls (contact_id, contact_tag, url, timestamp) VALUES (?, 'seg', ?, '2025')",
+        [(f"k{index}", url) for index, url in enumerate(urls)]
+    )
+    conn.execute("INSERT INTO contacts (Name, Cognism_URL, contact_id) VALUES ('Ana', ?, 'k0')", (urls[0],))
+    conn.commit()
+
+    url_entries = filter_new_urls()
+    assert isinstance(url_entries, types.GeneratorType)
+    assert enqueue_jobs(url_entries) == 4
+    # Already queued URLs are skipped
+    assert enqueue_jobs(filter_new_urls()) == 0
+    assert get_job_counts() == {"pending": 4}
+
+    queued = {row[0] for row in conn.execute("SELECT url FROM scrape_jobs")}
+    conn.close()
+    assert queued == set(urls[1:])
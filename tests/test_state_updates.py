@@ -0,0 +1,65 @@
+"""Write-behind queue of the prospector decisions (crm.state_updates)."""
+
+import sqlite3
+
+import pytest
+
+from crm.state_updates import StateUpdateWriter, add_failure_handler, remove_failure_handler
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE contacts_campaign (counter INTEGER PRIMARY KEY, current_state TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO contacts_campaign VALUES (?, 'undecided', '')", [(1,), (2,), (3,)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def failures():
+    reported = []
+    add_failure_handler(reported.extend)
+    yield reported
+    remove_failure_handler(reported.extend)
+
+
+@pytest.fixture
+def writer():
+    writer = StateUpdateWriter(flush_interval=0.01, max_retries=2, retry_delay=0)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def states(conn):
+    return dict(conn.execute("SELECT counter, current_state FROM contacts_campaign"))
+
+
+def test_repeated_decisions_are_merged(conn, writer, failures):
+    writer.put("contacts_campaign", {"counter": 1}, {"current_state": "approved"})
+    writer.put("contacts_campaign", {"counter": 1}, {"current_state": "rejected", "notes": "no"})
+    writer.flush()
+
+    assert states(conn) == {1: "rejected", 2: "undecided", 3: "undecided"}
+    assert failures == []
+
+
+def test_bad_update_is_reported_and_the_rest_written(conn, writer, failures):
+    writer.put("contacts_campaign", {"counter": 1}, {"current_state": "approved"})
+    writer.put("contacts_campaign", {"counter": 2}, {"current_state": "approved", "notes": ["not", "a", "value"]})
+    writer.put("contacts_campaign", {"counter": 3}, {"current_state": "rejected"})
+    writer.flush()
+
+    assert states(conn) == {1: "approved", 2: "undecided", 3: "rejected"}
+    assert [where for table, where, values in failures] == [{"counter": 2}]
+    assert writer.failed == 1
+
+
+def test_batch_reported_when_retries_run_out(conn, writer, failures):
+    writer.put("missing_table", {"counter": 1}, {"current_state": "approved"})
+    writer.flush()
+
+    assert failures == [("missing_table", {"counter": 1}, {"current_state": "approved"})]
+    assert writer.failed == 1
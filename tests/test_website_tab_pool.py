@@ -0,0 +1,112 @@
+"""Browser tab pool of the company prospector, with a fake driver."""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("selenium")
+
+from conftest import SRC_DIR  # noqa: E402
+
+sys.path.append(os.path.join(SRC_DIR, "companies"))
+from run_company_prospector import WebsiteTabPool, get_search_url  # noqa: E402
+
+
+class FakeDriver:
+    """Tabs as handle -> URL; the status of a URL is looked up in statuses."""
+
+    def __init__(self):
+        self.urls = {"main": "https://duckduckgo.com"}
+        self.names = {}
+        self.current = "main"
+        self.statuses = {}
+        self.switched = []     # every handle switched to, i.e. brought to the front
+        self.isolated = set()  # tabs window.open() can no longer find by name
+        self.opened = 0
+
+    @property
+    def window_handles(self):
+        return list(self.urls)
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        self.current = handle
+        self.switched.append(handle)
+
+    def close(self):
+        del self.urls[self.current]
+        self.names.pop(self.current, None)
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.open"):
+            url, name = args
+            handle = next((handle for handle, tab_name in self.names.items()
+                           if tab_name == name and handle not in self.isolated), None)
+            if handle is None:
+                self.opened += 1
+                handle = f"tab{self.opened}"
+                self.names[handle] = name
+            self.urls[handle] = url
+        else:
+            return self.statuses.get(self.urls[self.current], "loading")
+
+
+def company(name, website=None):
+    return {"company_id": name.lower(), "name": name, "website": website}
+
+
+def test_search_url_quotes_the_name():
+    assert get_search_url(company("Smith & Sons #1")) == "https://www.google.com/search?q=Smith+%26+Sons+%231"
+
+
+def test_website_failing_after_show_switches_to_search():
+    driver = FakeDriver()
+    pool = WebsiteTabPool(driver, prefetch=1)
+    acme = company("Acme", "acme.com")
+
+    pool.show(acme, [company("Globex", "globex.com")])
+    assert driver.urls[driver.current] == "https://acme.com"
+    assert pool.check_current()  # still loading
+
+    driver.statuses["https://acme.com"] = "error"
+    assert not pool.check_current()
+    assert driver.urls[driver.current] == get_search_url(acme)
+    assert "https://acme.com" in pool.unreachable
+
+
+def test_prefetch_tabs_load_without_coming_to_the_front():
+    driver = FakeDriver()
+    pool = WebsiteTabPool(driver, prefetch=1)
+    acme, globex, initech = company("Acme", "acme.com"), company("Globex", "globex.com"), company("Initech", "initech.com")
+    pool.show(acme, [globex])
+    globex_tab = pool._find_tab("https://globex.com")
+
+    driver.switched.clear()
+    pool.show(globex, [initech])
+    # Acme's tab is reused for Initech from the window on screen
+    assert set(driver.switched) == {globex_tab}
+    assert sorted(driver.urls.values()) == ["https://duckduckgo.com", "https://globex.com", "https://initech.com"]
+
+
+def test_tab_that_cannot_be_reached_by_name_is_replaced():
+    driver = FakeDriver()
+    pool = WebsiteTabPool(driver, prefetch=1)
+    acme, globex, initech = company("Acme", "acme.com"), company("Globex", "globex.com"), company("Initech", "initech.com")
+    pool.show(acme, [globex])
+    globex_tab = pool._find_tab("https://globex.com")
+    driver.isolated.add(globex_tab)
+
+    pool.show(acme, [initech])
+    assert globex_tab not in driver.urls
+    assert sorted(pool.tabs.values()) == ["https://acme.com", "https://initech.com"]
+    assert len(driver.urls) == 3
+    assert driver.urls[driver.current] == "https://acme.com"